@@ -15,6 +15,9 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 import logging
 
+from core.control_api import ControlClient
+from core.log_pipeline import format_log_entry, format_log_line
+
 # Suppress logging for CLI
 logging.getLogger().setLevel(logging.CRITICAL)
 
@@ -25,16 +28,21 @@ class HyprlandAICLI:
         self.base_path = Path("/home/sasha/hyprland-project/ai_optimization")
         self.python_path = self.base_path / "venv" / "bin" / "python"
         self.orchestrator_path = self.base_path / "main_orchestrator.py"
+        self.client = ControlClient()  # Talks to the running orchestrator
         
     def run_command(self, args):
         """Run CLI command based on arguments"""
         if args.command == "status":
+            if args.watch:
+                return self._watch_status()
             return self._show_status(args.detailed)
         elif args.command == "start":
             return self._start_system()
         elif args.command == "stop":
             return self._stop_system()
         elif args.command == "restart":
+            if args.component:
+                return self._restart_component(args.component)
             return self._restart_system()
         elif args.command == "logs":
             return self._show_logs(args.follow, args.lines)
@@ -45,49 +53,36 @@ class HyprlandAICLI:
         elif args.command == "health":
             return self._health_check()
         elif args.command == "optimize":
-            return self._force_optimization()
+            return self._force_optimization(notify=args.notify)
         elif args.command == "stats":
             return self._show_statistics()
         else:
             print(f"Unknown command: {args.command}")
             return False
 
+    def _request(self, command: str, args: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Send a command to the running orchestrator; None when it is not running"""
+        try:
+            reply = self.client.request(command, args, timeout=timeout)
+        except OSError:
+            return None
+        if not reply.get('ok'):
+            print(f"❌ {reply.get('result', {}).get('error', 'Command failed')}")
+        return reply
+
     def _show_status(self, detailed: bool = False) -> bool:
         """Show system status"""
         try:
-            # Check if orchestrator is running
-            result = subprocess.run(
-                ['pgrep', '-f', 'main_orchestrator.py'],
-                capture_output=True, text=True
-            )
-            
-            is_running = result.returncode == 0
-            
-            # Check systemd service status
-            service_result = subprocess.run(
-                ['systemctl', '--user', 'is-active', 'hyprland-ai-optimization'],
-                capture_output=True, text=True
-            )
-            
-            service_status = service_result.stdout.strip()
+            reply = self._request('status')
+            is_running = reply is not None
             
             print("🤖 Hyprland AI Optimization System Status")
             print("=" * 50)
             print(f"Process Running: {'✅ Yes' if is_running else '❌ No'}")
-            print(f"Service Status: {service_status}")
             
-            if is_running and detailed:
-                # Get detailed status from orchestrator
-                status_result = subprocess.run([
-                    str(self.python_path), str(self.orchestrator_path), '--status'
-                ], capture_output=True, text=True, cwd=self.base_path)
-                
-                if status_result.returncode == 0:
-                    try:
-                        status_data = json.loads(status_result.stdout)
-                        self._print_detailed_status(status_data)
-                    except json.JSONDecodeError:
-                        print("Could not parse detailed status")
+            if is_running and detailed and reply.get('ok'):
+                self._print_detailed_status(reply['result'])
             
             return True
             
@@ -95,6 +90,29 @@ class HyprlandAICLI:
             print(f"Error checking status: {e}")
             return False
 
+    def _watch_status(self) -> bool:
+        """Print status snapshots as the orchestrator publishes them"""
+        try:
+            for message in self.client.subscribe(['status']):
+                if 'event' in message:
+                    status = message['data']
+                elif message.get('ok'):
+                    status = message['result']['snapshot'].get('status')
+                else:
+                    print(f"❌ {message.get('result', {}).get('error')}")
+                    return False
+                if status:
+                    print(f"[{status.get('timestamp', '')}] health {status.get('system_health_score', 0):.1f}% | "
+                          f"issues {status.get('active_issues', 0)} | "
+                          f"optimizations {status.get('total_optimizations', 0)}")
+            return True
+        except OSError:
+            print("❌ System is not running")
+            return False
+        except KeyboardInterrupt:
+            print("\nStatus watch stopped")
+            return True
+
     def _print_detailed_status(self, status: Dict[str, Any]):
         """Print detailed status information"""
         print("\n📊 Detailed Status:")
@@ -108,6 +126,16 @@ class HyprlandAICLI:
         print(f"Performance Score: {status.get('performance_score', 0):.1f}%")
         print(f"Stability Score: {status.get('stability_score', 0):.1f}%")
         print(f"Uptime: {status.get('uptime_hours', 0):.1f} hours")
+        print(f"Engine Restarts: {status.get('engine_restarts', 0)}")
+        
+        budget = status.get('resource_budget')
+        if budget and budget.get('usage'):
+            usage, limits = budget['usage'], budget['budget']
+            print(f"\n⚖️  Resource Budget (throttle level {budget['throttle']['level']}):")
+            print(f"  CPU: {usage['cpu_percent']:.2f}% / {limits['cpu_percent']:.1f}%")
+            print(f"  Memory: {usage['rss_mb']:.0f} / {limits['rss_mb']:.0f} MB")
+            print(f"  Wakeups: {usage['wakeups_per_minute']:.0f} / {limits['wakeups_per_minute']:.0f} per minute")
+            print(f"  Spawns: {usage['spawns_per_minute']:.1f} / {limits['spawns_per_minute']:.0f} per minute")
 
     def _start_system(self) -> bool:
         """Start the AI optimization system"""
@@ -180,21 +208,47 @@ class HyprlandAICLI:
             return self._start_system()
         return False
 
+    def _restart_component(self, component: str) -> bool:
+        """Restart one engine inside the running orchestrator"""
+        print(f"🔄 Restarting {component}...")
+        reply = self._request('restart_component', {'component': component}, timeout=30)
+        if reply is None:
+            print("❌ System is not running")
+            return False
+        if reply.get('ok'):
+            print(f"✅ {component} restarted ({reply['result'].get('restarts', 0)} restarts so far)")
+        return bool(reply.get('ok'))
+
     def _show_logs(self, follow: bool = False, lines: int = 50) -> bool:
         """Show system logs"""
         try:
             log_file = self.base_path / "logs" / "orchestrator.log"
             
+            # Recent records from the running orchestrator's memory
+            if not follow:
+                reply = self._request('logs', {'limit': lines})
+                if reply and reply.get('ok') and 'records' in reply['result']:
+                    print(f"📜 Last {len(reply['result']['records'])} log records")
+                    for entry in reply['result']['records']:
+                        print(format_log_entry(entry))
+                    return True
+            
             if not log_file.exists():
                 print("No log file found")
                 return False
             
             if follow:
                 print(f"📜 Following logs from {log_file} (Ctrl+C to stop)")
-                subprocess.run(['tail', '-f', str(log_file)])
+                # -F reopens the file after it is rotated
+                with subprocess.Popen(['tail', '-F', '-n', str(lines), str(log_file)],
+                                      stdout=subprocess.PIPE, text=True) as tail:
+                    for line in tail.stdout:
+                        print(format_log_line(line), flush=True)
             else:
                 print(f"📜 Last {lines} lines from {log_file}")
-                subprocess.run(['tail', '-n', str(lines), str(log_file)])
+                result = subprocess.run(['tail', '-n', str(lines), str(log_file)], capture_output=True, text=True)
+                for line in result.stdout.splitlines():
+                    print(format_log_line(line))
             
             return True
             
@@ -210,29 +264,22 @@ class HyprlandAICLI:
         try:
             print("📋 Generating system report...")
             
-            result = subprocess.run([
-                str(self.python_path), str(self.orchestrator_path), '--report'
-            ], capture_output=True, text=True, cwd=self.base_path)
-            
-            if result.returncode != 0:
-                print("❌ Failed to generate report")
+            reply = self._request('report')
+            if reply is None:
+                print("❌ System is not running")
                 return False
-            
-            try:
-                report_data = json.loads(result.stdout)
-                
-                if output_file:
-                    with open(output_file, 'w') as f:
-                        json.dump(report_data, f, indent=2)
-                    print(f"✅ Report saved to {output_file}")
-                else:
-                    self._print_report_summary(report_data)
-                
-                return True
-                
-            except json.JSONDecodeError:
-                print("❌ Could not parse report data")
+            if not reply.get('ok'):
                 return False
+            
+            report_data = reply['result']
+            if output_file:
+                with open(output_file, 'w') as f:
+                    json.dump(report_data, f, indent=2)
+                print(f"✅ Report saved to {output_file}")
+            else:
+                self._print_report_summary(report_data)
+            
+            return True
                 
         except Exception as e:
             print(f"Error generating report: {e}")
@@ -405,26 +452,54 @@ class HyprlandAICLI:
         
         return checks_passed >= total_checks * 0.8
 
-    def _force_optimization(self) -> bool:
+    def _force_optimization(self, notify: bool = False) -> bool:
         """Force an immediate optimization cycle"""
         try:
             print("⚡ Triggering immediate optimization...")
             
-            if not self._is_system_running():
+            reply = self._request('optimize', timeout=60)
+            if reply is None:
                 print("❌ System is not running")
+                if notify:
+                    self._notify("AI Optimization", "System is not running")
                 return False
+            if not reply.get('ok'):
+                if notify:
+                    self._notify("AI Optimization", reply.get('result', {}).get('error', 'Command failed'))
+                return False
+            
+            result = reply['result']
+            timings = result.get('timings_ms', {})
+            score = result.get('predicted_score')
+            changed = result.get('changed', {})
             
-            # This would require adding a trigger mechanism to the orchestrator
-            # For now, just inform the user
-            print("ℹ️  Manual optimization trigger not yet implemented")
-            print("🔄 The system automatically optimizes based on conditions")
+            print(f"✅ Optimization completed{' (joined running cycle)' if result.get('coalesced') else ''}")
+            print(f"Predicted Score: {score:.3f}" if score is not None else "Predicted Score: n/a")
+            print("\n⚙️ Chosen Configuration:")
+            for key, value in result.get('config', {}).items():
+                print(f"  {key} = {value}{'  (changed)' if key in changed else ''}")
+            print("\n⏱️ Timing (ms):")
+            for stage in ('collect', 'predict', 'diff', 'apply', 'total'):
+                if stage in timings:
+                    print(f"  {stage:<8} {timings[stage]:>8.2f}")
             
+            if notify:
+                self._notify("AI Optimization",
+                             f"{len(changed)} options changed in {timings.get('total', 0):.0f} ms")
             return True
             
         except Exception as e:
             print(f"Error forcing optimization: {e}")
             return False
 
+    def _notify(self, title: str, message: str):
+        """Desktop notification for runs without a terminal (keybinds)"""
+        try:
+            subprocess.run(['notify-send', '-i', 'system-run', title, message],
+                           capture_output=True, timeout=5)
+        except (OSError, subprocess.SubprocessError):
+            pass
+
     def _show_statistics(self) -> bool:
         """Show system statistics"""
         try:
@@ -467,11 +542,7 @@ class HyprlandAICLI:
 
     def _is_system_running(self) -> bool:
         """Check if the system is running"""
-        result = subprocess.run(
-            ['pgrep', '-f', 'main_orchestrator.py'],
-            capture_output=True
-        )
-        return result.returncode == 0
+        return self.client.is_running()
 
 def main():
     """Main CLI entry point"""
@@ -482,6 +553,7 @@ def main():
 Examples:
   %(prog)s status           # Show system status
   %(prog)s status --detailed # Show detailed status
+  %(prog)s status --watch    # Stream status updates
   %(prog)s start            # Start the system
   %(prog)s stop             # Stop the system
   %(prog)s logs --follow    # Follow logs in real-time
@@ -497,6 +569,8 @@ Examples:
     status_parser = subparsers.add_parser('status', help='Show system status')
     status_parser.add_argument('--detailed', '-d', action='store_true', 
                               help='Show detailed status information')
+    status_parser.add_argument('--watch', '-w', action='store_true',
+                              help='Stream status updates from the running system')
     
     # Start command
     subparsers.add_parser('start', help='Start the AI optimization system')
@@ -505,7 +579,9 @@ Examples:
     subparsers.add_parser('stop', help='Stop the AI optimization system')
     
     # Restart command
-    subparsers.add_parser('restart', help='Restart the AI optimization system')
+    restart_parser = subparsers.add_parser('restart', help='Restart the AI optimization system')
+    restart_parser.add_argument('--component', choices=['ai_optimizer', 'adaptive_config', 'self_healing'],
+                                help='Restart only this engine inside the running system')
     
     # Logs command
     logs_parser = subparsers.add_parser('logs', help='Show system logs')
@@ -535,7 +611,9 @@ Examples:
     subparsers.add_parser('health', help='Perform system health check')
     
     # Optimize command
-    subparsers.add_parser('optimize', help='Force immediate optimization')
+    optimize_parser = subparsers.add_parser('optimize', help='Force immediate optimization')
+    optimize_parser.add_argument('--notify', action='store_true',
+                                 help='Report the result as a desktop notification')
     
     # Stats command
     subparsers.add_parser('stats', help='Show system statistics')
@@ -6,9 +6,19 @@ __version__ = "1.0.0"
 __author__ = "AI-Driven Hyprland Optimizer"
 __description__ = "Intelligent self-healing and adaptive optimization for Hyprland"
 
-from .ai_optimizer import AIOptimizer
-from .adaptive_config import AdaptiveConfigManager
-from .self_healing import SelfHealingSystem
+# Engines are imported lazily so lightweight modules (e.g. config_parser) can be
+# used without pulling in the ML dependencies
+_ENGINES = {
+    'AIOptimizer': '.ai_optimizer',
+    'AdaptiveConfigManager': '.adaptive_config',
+    'SelfHealingSystem': '.self_healing'
+}
+
+def __getattr__(name):
+    if name in _ENGINES:
+        import importlib
+        return getattr(importlib.import_module(_ENGINES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'AIOptimizer',
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Activity Classifier
+Classifies a set of window classes or process names into an activity category
+with one compiled pattern over all indicator lists, explicit precedence and
+memoized results. Rule tables are data and can be loaded from a JSON file.
+"""
+
+import json
+import logging
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Rule sets in precedence order: the first category that matches wins.
+DEFAULT_RULE_SETS: Dict[str, List[Dict[str, Any]]] = {
+    # Window classes from hyprctl clients (AdaptiveConfigManager)
+    'window_classes': [
+        {'category': 'gaming', 'indicators': [
+            'steam', 'lutris', 'wine', 'proton', 'gamemode',
+            'minecraft', 'dota', 'csgo', 'valorant', 'league'
+        ]},
+        {'category': 'development', 'indicators': [
+            'code', 'vim', 'neovim', 'emacs', 'intellij', 'pycharm',
+            'vscode', 'atom', 'sublime', 'terminal', 'kitty', 'alacritty'
+        ]},
+        {'category': 'media', 'indicators': [
+            'firefox', 'chrome', 'mpv', 'vlc', 'spotify', 'discord',
+            'youtube', 'netflix', 'plex', 'kodi'
+        ]},
+    ],
+    # Process names (learning-system workload detection)
+    'processes': [
+        {'category': 'gaming', 'indicators': ['steam', 'lutris', 'heroic', 'wine', 'proton']},
+        {'category': 'development', 'indicators': [
+            'code', 'nvim', 'vim', 'jetbrains', 'cargo', 'make', 'gcc', 'python'
+        ]},
+        {'category': 'media', 'indicators': ['vlc', 'mpv', 'ffmpeg', 'obs', 'gimp', 'inkscape', 'blender']},
+        {'category': 'productivity', 'indicators': [
+            'firefox', 'chrome', 'thunderbird', 'libreoffice', 'discord'
+        ]},
+    ]
+}
+
+@dataclass
+class Classification:
+    """Winning category, its confidence and the number of names matched per category"""
+    category: Optional[str]
+    confidence: float
+    matched: Dict[str, int] = field(default_factory=dict)
+
+class ActivityClassifier:
+    """Single-pass, memoized classifier over a precedence-ordered rule table"""
+
+    def __init__(self, rules: List[Dict[str, Any]], cache_size: int = 1024):
+        # Explicit 'priority' overrides list order (lower wins)
+        ordered = sorted(enumerate(rules), key=lambda item: (item[1].get('priority', item[0]), item[0]))
+        self.categories = [rule['category'] for _, rule in ordered]
+
+        # One zero-width lookahead per position finds every indicator start, including
+        # overlapping ones; at a shared start the higher-precedence category wins.
+        groups = []
+        for index, (_, rule) in enumerate(ordered):
+            indicators = sorted({i.lower() for i in rule['indicators']}, key=len, reverse=True)
+            if indicators:
+                groups.append(f"(?P<c{index}>{'|'.join(re.escape(i) for i in indicators)})")
+        self.pattern = re.compile(f"(?=(?:{'|'.join(groups)}))") if groups else None
+
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[FrozenSet[str], Classification]' = OrderedDict()
+        self.stats = {'lookups': 0, 'cache_hits': 0}
+
+    @classmethod
+    def load(cls, rule_set: str, rules_file: Optional[Path] = None, **kwargs) -> 'ActivityClassifier':
+        """Classifier for a named rule set, taken from rules_file when it defines it"""
+        rules = DEFAULT_RULE_SETS[rule_set]
+        if rules_file is not None and Path(rules_file).exists():
+            try:
+                with open(rules_file) as f:
+                    rules = json.load(f).get(rule_set, rules)
+                logger.info(f"Loaded {rule_set} activity rules from {rules_file}")
+            except Exception as e:
+                logger.error(f"Error loading activity rules from {rules_file}: {e}")
+        return cls(rules, **kwargs)
+
+    def classify(self, names: Iterable[str]) -> Classification:
+        """Classify a set of window classes or process names"""
+        key = frozenset(name.lower() for name in names if name)
+        self.stats['lookups'] += 1
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return cached
+
+        result = self._classify(key)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def _classify(self, names: FrozenSet[str]) -> Classification:
+        if not names or self.pattern is None:
+            return Classification(category=None, confidence=0.0)
+
+        # Count names (not indicator hits) per category
+        matched_names: Dict[int, set] = {}
+        for name in names:
+            for match in self.pattern.finditer(name):
+                matched_names.setdefault(int(match.lastgroup[1:]), set()).add(name)
+
+        if not matched_names:
+            return Classification(category=None, confidence=0.0)
+
+        winner = min(matched_names)
+        share = len(matched_names[winner]) / len(names)
+        return Classification(
+            category=self.categories[winner],
+            # Precedence decides the category; confidence grows with its share of the names
+            confidence=round(0.5 + 0.5 * share, 3),
+            matched={self.categories[i]: len(n) for i, n in sorted(matched_names.items())}
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "categories": self.categories,
+            "cached_sets": len(self._cache),
+            **self.stats
+        }
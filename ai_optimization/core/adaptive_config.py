@@ -8,25 +8,30 @@ import asyncio
 import json
 import logging
 import numpy as np
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Set
 import time
 from datetime import datetime, timedelta
 import hashlib
-import sqlite3
-from collections import defaultdict, Counter
-import subprocess
+from collections import defaultdict, deque, Counter
 import re
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
-import threading
-import queue
-import pickle
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+from .activity_classifier import ActivityClassifier
+from .adaptive_store import AdaptiveStore
+from .config_parser import HyprlandConfigParser
+from .config_reconciler import ConfigReconciler
+from .config_watcher import ConfigWatcher
+from .context_clusterer import IncrementalContextClusterer
+from .context_forecaster import ContextForecaster
+from .event_bus import ConfigApplied, ConservativeMode, ContextChanged, EventBus, Subscription
+from .history_store import ConfigHistoryStore
+from .hypr_events import HyprlandEventListener
+from .metrics_exporter import LOOP_SECONDS, timed_run
+from .resource_budget import Throttle
+from .profile_index import ProfileIndex, embed_context, usage_weight
+from .workspace_profiles import WorkspaceProfile, WorkspaceProfileSet
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -45,6 +50,8 @@ class UserContext:
     is_coding: bool
     is_media_consumption: bool
     user_activity_pattern: str
+    cluster_id: Optional[int] = None
+    context_id: Optional[int] = None  # user_contexts row id once stored
 
 @dataclass
 class ConfigurationChange:
@@ -76,17 +83,55 @@ class AdaptiveConfigManager:
         
         # Database for storing learning data
         self.db_path = self.data_path / "adaptive_config.db"
-        self._init_database()
+        self.checkpoint_path = self.data_path / "warm_start.ckpt"  # Usage patterns and forecaster across restarts
+        self.store = AdaptiveStore(self.db_path)
         
         # Learning components
-        self.context_clusterer = KMeans(n_clusters=5, random_state=42)
-        self.scaler = StandardScaler()
+        self.context_clusterer = IncrementalContextClusterer(self.data_path / "context_clusters.pkl")
         self.preference_profiles: Dict[str, PreferenceProfile] = {}
+        self.cluster_profiles: Dict[int, str] = {}  # cluster id -> profile id
+        self.profile_index = ProfileIndex()  # Profiles with a context centroid
+        self._dirty_profiles: Set[str] = set()  # Changed since the last save
+        self.autosave_interval = 300  # seconds
+        self._last_autosave = time.time()
+        self.last_heartbeat: Optional[float] = None  # time.monotonic() of the last loop iteration
+        self.throttle = Throttle()  # Set by the orchestrator to keep the daemon within its resource budget
+        
+        # Coordination with the other engines; the orchestrator's bus replaces this private one
+        self.events = EventBus()
+        self.conservative = ConservativeMode()  # Profiles wait while self-healing works on an issue
+        
+        # Window class -> activity rules (override in adaptive_data/activity_rules.json)
+        self.activity_classifier = ActivityClassifier.load(
+            'window_classes', self.data_path / "activity_rules.json"
+        )
         
         # Configuration tracking
-        self.config_history: List[ConfigurationChange] = []
+        # Bounded columnar history; older rows spill to config_changes
+        self.config_history = ConfigHistoryStore(self.store)
+        self.config_parser = HyprlandConfigParser()
+        self.config_watcher = ConfigWatcher(
+            self.config_path / "hyprland.conf", self.config_parser, self._handle_config_file_change
+        )
+        self._file_options: Dict[str, Dict[str, Any]] = {}  # Options set per config file
         self.current_context: Optional[UserContext] = None
         self.active_profile: Optional[str] = None
+        self.reconciler = ConfigReconciler()  # Desired vs observed compositor options
+        
+        # Predictive pre-switching: profiles of likely next activities are prepared each
+        # cycle and applied on the first window of that activity
+        self.forecaster = ContextForecaster()
+        self.hypr_events = HyprlandEventListener()
+        self.prediction_threshold = 0.3
+        self._prepared: Dict[str, Tuple[str, float]] = {}  # activity -> (profile id, probability)
+        self._switch_started: Optional[Tuple[str, float]] = None  # activity, monotonic time of its first window
+        self.switch_latencies_ms = {'predicted': deque(maxlen=100), 'reactive': deque(maxlen=100)}
+        self.prediction_stats = {'prepared': 0, 'hits': 0, 'misses': 0}
+        
+        # Workspace-scoped option sets, applied from precompiled batches on workspace switch
+        self.workspace_profiles = WorkspaceProfileSet()
+        self.active_workspace: Optional[Tuple[int, str]] = None
+        self.workspace_switch_ms = deque(maxlen=100)
         
         # Pattern recognition
         self.usage_patterns = defaultdict(list)
@@ -100,97 +145,62 @@ class AdaptiveConfigManager:
         # Load existing data
         self._load_preference_profiles()
         self._load_usage_patterns()
+        self._load_workspace_profiles()
         
         logger.info("Adaptive Configuration Manager initialized")
 
-    def _init_database(self):
-        """Initialize SQLite database for storing learning data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # User contexts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_contexts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp REAL,
-                hour_of_day INTEGER,
-                day_of_week INTEGER,
-                active_applications TEXT,
-                workspace_layout TEXT,
-                window_count INTEGER,
-                screen_brightness REAL,
-                system_load REAL,
-                battery_level REAL,
-                is_gaming INTEGER,
-                is_coding INTEGER,
-                is_media_consumption INTEGER,
-                activity_pattern TEXT
-            )
-        ''')
-        
-        # Configuration changes table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS config_changes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp REAL,
-                config_key TEXT,
-                old_value TEXT,
-                new_value TEXT,
-                context_id INTEGER,
-                change_source TEXT,
-                FOREIGN KEY (context_id) REFERENCES user_contexts (id)
-            )
-        ''')
-        
-        # Preference profiles table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS preference_profiles (
-                profile_id TEXT PRIMARY KEY,
-                context_patterns TEXT,
-                preferred_configs TEXT,
-                usage_frequency REAL,
-                last_used REAL,
-                confidence_score REAL
-            )
-        ''')
-        
-        # Usage effectiveness table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS config_effectiveness (
-                config_combo_hash TEXT PRIMARY KEY,
-                effectiveness_score REAL,
-                usage_count INTEGER,
-                last_updated REAL
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-
     async def start_adaptive_learning(self):
         """Start the adaptive learning loop"""
         logger.info("Starting adaptive configuration learning")
         
+        # User edits are reported by the watcher as they happen; poll only without inotify
+        self._snapshot_config_files()
+        self.config_watcher.start()
+        
+        self.hypr_events.subscribe('openwindow', self._handle_window_open)
+        # Hyprland sends both workspace events; handle only one of them
+        if self._supports_workspacev2():
+            self.hypr_events.subscribe('workspacev2', self._handle_workspace_switch)
+        else:
+            self.hypr_events.subscribe('workspace', self._handle_workspace_switch_v1)
+        self.hypr_events.start()
+        
         while True:
             try:
+                iteration_start = time.perf_counter()
+                self.last_heartbeat = time.monotonic()
+                
                 # Update current context
                 context = await self._capture_user_context()
+                previous = self.current_context
                 self.current_context = context
+                if previous is None or previous.user_activity_pattern != context.user_activity_pattern:
+                    await self.events.publish(ContextChanged(
+                        context.user_activity_pattern,
+                        previous.user_activity_pattern if previous else None,
+                        asdict(context)
+                    ))
+                await self._update_workspace_profiles()
                 
                 # Check for configuration changes
-                await self._detect_config_changes()
+                if not self.config_watcher.active:
+                    await self._detect_config_changes()
                 
                 # Learn from recent changes
                 await self._update_learning_models()
+                self._autosave_profiles()
                 
                 # Apply adaptive optimizations
                 await self._apply_adaptive_optimizations()
+                if not self.throttle.shed_optional:
+                    await self._prepare_predicted_profiles()
                 
                 # Clean up old data
                 await self._cleanup_old_data()
+                LOOP_SECONDS.observe(time.perf_counter() - iteration_start, loop='adaptive_config')
                 
                 # Sleep before next iteration
-                await asyncio.sleep(60)  # Check every minute
+                await asyncio.sleep(self.throttle.interval(60))  # Check every minute
                 
             except Exception as e:
                 logger.error(f"Error in adaptive learning loop: {e}")
@@ -249,6 +259,7 @@ class AdaptiveConfigManager:
                 is_media_consumption=is_media,
                 user_activity_pattern=activity_pattern
             )
+            context.cluster_id = self.context_clusterer.assign(context)
             
             # Store in database
             self._store_context(context)
@@ -262,7 +273,7 @@ class AdaptiveConfigManager:
     async def _get_active_applications(self) -> List[str]:
         """Get list of currently active applications"""
         try:
-            result = subprocess.run(['hyprctl', 'clients'], capture_output=True, text=True)
+            result = timed_run(['hyprctl', 'clients'], capture_output=True, text=True)
             if result.returncode == 0:
                 apps = []
                 for line in result.stdout.split('\n'):
@@ -278,7 +289,7 @@ class AdaptiveConfigManager:
     async def _get_workspace_layout(self) -> str:
         """Get current workspace layout description"""
         try:
-            result = subprocess.run(['hyprctl', 'workspaces'], capture_output=True, text=True)
+            result = timed_run(['hyprctl', 'workspaces'], capture_output=True, text=True)
             if result.returncode == 0:
                 # Simplified layout description based on active workspaces
                 workspace_count = result.stdout.count('workspace ID')
@@ -290,7 +301,7 @@ class AdaptiveConfigManager:
     async def _get_window_count(self) -> int:
         """Get current number of windows"""
         try:
-            result = subprocess.run(['hyprctl', 'clients'], capture_output=True, text=True)
+            result = timed_run(['hyprctl', 'clients'], capture_output=True, text=True)
             if result.returncode == 0:
                 return result.stdout.count('Window ')
         except:
@@ -323,36 +334,22 @@ class AdaptiveConfigManager:
 
     async def _detect_gaming_activity(self, active_apps: List[str]) -> bool:
         """Detect if user is currently gaming"""
-        gaming_indicators = [
-            'steam', 'lutris', 'wine', 'proton', 'gamemode',
-            'minecraft', 'dota', 'csgo', 'valorant', 'league'
-        ]
-        return any(indicator.lower() in app.lower() for app in active_apps for indicator in gaming_indicators)
+        return 'gaming' in self.activity_classifier.classify(active_apps).matched
 
     async def _detect_coding_activity(self, active_apps: List[str]) -> bool:
         """Detect if user is currently coding"""
-        coding_indicators = [
-            'code', 'vim', 'neovim', 'emacs', 'intellij', 'pycharm',
-            'vscode', 'atom', 'sublime', 'terminal', 'kitty', 'alacritty'
-        ]
-        return any(indicator.lower() in app.lower() for app in active_apps for indicator in coding_indicators)
+        return 'development' in self.activity_classifier.classify(active_apps).matched
 
     async def _detect_media_activity(self, active_apps: List[str]) -> bool:
         """Detect if user is consuming media"""
-        media_indicators = [
-            'firefox', 'chrome', 'mpv', 'vlc', 'spotify', 'discord',
-            'youtube', 'netflix', 'plex', 'kodi'
-        ]
-        return any(indicator.lower() in app.lower() for app in active_apps for indicator in media_indicators)
+        return 'media' in self.activity_classifier.classify(active_apps).matched
 
     async def _classify_activity_pattern(self, active_apps: List[str], window_count: int, hour: int) -> str:
         """Classify the current activity pattern"""
-        if await self._detect_gaming_activity(active_apps):
-            return "gaming"
-        elif await self._detect_coding_activity(active_apps):
-            return "development"
-        elif await self._detect_media_activity(active_apps):
-            return "media"
+        # Memoized per application set, so the detectors above cost one lookup each
+        activity = self.activity_classifier.classify(active_apps)
+        if activity.category:
+            return activity.category
         elif window_count > 5:
             return "multitasking"
         elif 9 <= hour <= 17:
@@ -363,27 +360,8 @@ class AdaptiveConfigManager:
             return "general"
 
     def _store_context(self, context: UserContext):
-        """Store user context in database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO user_contexts (
-                timestamp, hour_of_day, day_of_week, active_applications,
-                workspace_layout, window_count, screen_brightness, system_load,
-                battery_level, is_gaming, is_coding, is_media_consumption,
-                activity_pattern
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            context.timestamp, context.hour_of_day, context.day_of_week,
-            json.dumps(context.active_applications), context.workspace_layout,
-            context.window_count, context.screen_brightness, context.system_load,
-            context.battery_level, context.is_gaming, context.is_coding,
-            context.is_media_consumption, context.user_activity_pattern
-        ))
-        
-        conn.commit()
-        conn.close()
+        """Store user context in database, keeping its row id for config changes"""
+        context.context_id = self.store.insert_context(context)
 
     async def _detect_config_changes(self):
         """Detect configuration changes made by user"""
@@ -405,8 +383,9 @@ class AdaptiveConfigManager:
                                 change_source='user'
                             )
                             
-                            self.config_history.append(change)
+                            self.config_history.append(change, persisted=True)
                             self._store_config_change(change)
+                            self._observe_workspace_option(key, value)
                             
                             logger.info(f"Detected user config change: {key} {old_value} -> {value}")
             
@@ -415,71 +394,99 @@ class AdaptiveConfigManager:
         except Exception as e:
             logger.error(f"Error detecting config changes: {e}")
 
+    def _snapshot_config_files(self):
+        """Record the options set in each config file as the baseline for diffs"""
+        try:
+            config = self.config_parser.parse(self.config_path / "hyprland.conf")
+            self._file_options = {
+                path: {key: self._convert_config_value(value)
+                       for key, value in config.options(file=path).items()}
+                for path in config.files
+            }
+        except Exception as e:
+            logger.error(f"Error reading config: {e}")
+
+    async def _handle_config_file_change(self, path: str, timestamp: float):
+        """Record user changes in one edited config file, tied to the context at edit time"""
+        config = self.config_parser.parse(self.config_path / "hyprland.conf")
+        new_options = {key: self._convert_config_value(value)
+                       for key, value in config.options(file=path).items()}
+        old_options = self._file_options.get(path, {})
+        self._file_options[path] = new_options
+        
+        # Hyprland reloads the edited config, dropping runtime keyword overrides
+        self.reconciler.invalidate()
+        
+        changed_keys = [key for key in old_options.keys() | new_options.keys()
+                        if old_options.get(key) != new_options.get(key)]
+        if not changed_keys:
+            return
+        
+        # Context right after the edit, rather than up to a minute stale
+        context = await self._capture_user_context()
+        self.current_context = context
+        
+        for key in sorted(changed_keys):
+            change = ConfigurationChange(
+                timestamp=timestamp,
+                config_key=key,
+                old_value=old_options.get(key),
+                new_value=new_options.get(key),
+                context=context,
+                change_source='user'
+            )
+            
+            self.config_history.append(change, persisted=True)
+            self._store_config_change(change)
+            self._observe_workspace_option(key, change.new_value)
+            
+            logger.info(f"Detected user config change in {Path(path).name}: "
+                        f"{key} {change.old_value} -> {change.new_value}")
+
     async def _read_current_config(self) -> Dict[str, Any]:
         """Read current Hyprland configuration"""
         config = {}
         try:
-            # Read main config file
+            # Fully qualified options (decoration:blur:enabled) across sourced files;
+            # unchanged files are served from the parser cache
             config_file = self.config_path / "hyprland.conf"
             if config_file.exists():
-                with open(config_file) as f:
-                    content = f.read()
-                
-                # Parse configuration (simplified)
-                for line in content.split('\n'):
-                    line = line.strip()
-                    if '=' in line and not line.startswith('#'):
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        # Try to convert to appropriate type
-                        if value.lower() in ('true', 'yes', '1'):
-                            value = True
-                        elif value.lower() in ('false', 'no', '0'):
-                            value = False
-                        else:
-                            try:
-                                value = float(value)
-                                if value.is_integer():
-                                    value = int(value)
-                            except ValueError:
-                                pass  # Keep as string
-                        
-                        config[key] = value
+                options = self.config_parser.parse(config_file).options()
+                config = {key: self._convert_config_value(value) for key, value in options.items()}
         except Exception as e:
             logger.error(f"Error reading config: {e}")
         
         return config
 
+    @staticmethod
+    def _convert_config_value(value: str) -> Any:
+        """Convert a config value string to an appropriate type"""
+        if value.lower() in ('true', 'yes', '1'):
+            return True
+        if value.lower() in ('false', 'no', '0'):
+            return False
+        try:
+            number = float(value)
+            return int(number) if number.is_integer() else number
+        except ValueError:
+            return value  # Keep as string
+
     def _store_config_change(self, change: ConfigurationChange):
         """Store configuration change in database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # First, get the context ID
-        cursor.execute(
-            'SELECT id FROM user_contexts WHERE timestamp = ?',
-            (change.context.timestamp,)
-        )
-        context_result = cursor.fetchone()
-        context_id = context_result[0] if context_result else None
-        
-        cursor.execute('''
-            INSERT INTO config_changes (
-                timestamp, config_key, old_value, new_value, context_id, change_source
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            change.timestamp, change.config_key,
-            json.dumps(change.old_value), json.dumps(change.new_value),
-            context_id, change.change_source
-        ))
-        
-        conn.commit()
-        conn.close()
+        self.store.insert_config_changes([(
+            change.timestamp, change.config_key, change.old_value, change.new_value,
+            change.context.context_id if change.context else None, change.change_source
+        )])
 
     async def _update_learning_models(self):
         """Update machine learning models with recent data"""
+        if self.throttle.skip_training:
+            return
+        
+        # Clusters key the profiles, so they learn from every captured context
+        await self._update_context_clustering()
+        self._update_forecaster()
+        
         if len(self.config_history) < self.min_samples_for_learning:
             return
         
@@ -490,9 +497,6 @@ class AdaptiveConfigManager:
             # Update preference profiles
             await self._update_preference_profiles()
             
-            # Train context clustering model
-            await self._update_context_clustering()
-            
             logger.info("Learning models updated successfully")
             
         except Exception as e:
@@ -502,21 +506,44 @@ class AdaptiveConfigManager:
         """Extract usage patterns from configuration history"""
         pattern_data = defaultdict(list)
         
-        for change in self.config_history[-100:]:  # Last 100 changes
+        for change in self.config_history.recent(100):  # Last 100 changes
             context = change.context
             
             # Create pattern key
-            pattern_key = f"{context.user_activity_pattern}_{context.hour_of_day // 4}"
+            pattern_key = self._pattern_key(context.user_activity_pattern, context.hour_of_day,
+                                            context.cluster_id)
             
             # Store config preference
             pattern_data[pattern_key].append({
                 'config_key': change.config_key,
                 'value': change.new_value,
-                'timestamp': change.timestamp
+                'timestamp': change.timestamp,
+                'embedding': self._embed_context(context)
             })
         
         self.usage_patterns.update(pattern_data)
 
+    @staticmethod
+    def _embed_context(context: UserContext) -> np.ndarray:
+        """Context vector used for profile matching"""
+        return embed_context(
+            context.hour_of_day, context.day_of_week, context.window_count,
+            context.screen_brightness, context.system_load, context.battery_level,
+            context.is_gaming, context.is_coding, context.is_media_consumption
+        )
+
+    @staticmethod
+    def _profile_prior(profile: PreferenceProfile) -> float:
+        """Score multiplier of a profile: confidence with a bounded usage bonus"""
+        return profile.confidence_score * (0.75 + 0.25 * usage_weight(profile.usage_frequency))
+
+    @staticmethod
+    def _pattern_key(activity_pattern: str, hour_of_day: int, cluster_id: Optional[int]) -> str:
+        """Profile lookup key: the context cluster, or activity and time of day before clustering"""
+        if cluster_id is not None:
+            return f"cluster_{cluster_id}"
+        return f"{activity_pattern}_{hour_of_day // 4}"
+
     async def _update_preference_profiles(self):
         """Update user preference profiles based on learned patterns"""
         for pattern_key, changes in self.usage_patterns.items():
@@ -546,52 +573,66 @@ class AdaptiveConfigManager:
                 profile.preferred_configs.update(preferred_configs)
                 profile.usage_frequency += 1
                 profile.last_used = time.time()
+                self._dirty_profiles.add(profile_id)
             else:
+                context_patterns = {'pattern_key': pattern_key}
+                if pattern_key.startswith('cluster_'):
+                    context_patterns['cluster_id'] = int(pattern_key[len('cluster_'):])
+                    self.cluster_profiles[context_patterns['cluster_id']] = profile_id
+                
                 profile = PreferenceProfile(
                     profile_id=profile_id,
-                    context_patterns={'pattern_key': pattern_key},
+                    context_patterns=context_patterns,
                     preferred_configs=preferred_configs,
                     usage_frequency=len(changes),
                     last_used=time.time(),
                     confidence_score=min(len(changes) / 10, 1.0)
                 )
                 self.preference_profiles[profile_id] = profile
+                self._dirty_profiles.add(profile_id)
+            
+            # Index the profile at the centroid of the contexts its changes were made in
+            embeddings = [change['embedding'] for change in changes if 'embedding' in change]
+            if embeddings:
+                centroid = np.mean(embeddings, axis=0)
+                profile.context_patterns['centroid'] = [round(float(x), 4) for x in centroid]
+                self.profile_index.upsert(profile_id, centroid, self._profile_prior(profile))
+            elif profile_id in self.profile_index:
+                self.profile_index.set_prior(profile_id, self._profile_prior(profile))
 
     async def _update_context_clustering(self):
-        """Update context clustering model"""
+        """Update context clustering with contexts captured since the last update"""
         try:
-            # Get recent contexts
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT hour_of_day, day_of_week, window_count, screen_brightness,
-                       system_load, battery_level, is_gaming, is_coding, is_media_consumption
-                FROM user_contexts
-                ORDER BY timestamp DESC
-                LIMIT 1000
-            ''')
-            
-            contexts = cursor.fetchall()
-            conn.close()
-            
-            if len(contexts) < 10:
-                return
-            
-            # Prepare data for clustering
-            X = np.array(contexts)
-            X = self.scaler.fit_transform(X)
-            
-            # Update clustering model
-            self.context_clusterer.fit(X)
+            learned = self.context_clusterer.update(self.store)
+            if learned:
+                stats = self.context_clusterer.get_stats()
+                logger.debug(f"Context clusters updated with {learned} contexts in "
+                             f"{stats['update_cpu_ms_last']:.1f} ms CPU "
+                             f"(full refit: {stats['full_refit_cpu_ms']} ms)")
             
         except Exception as e:
             logger.error(f"Error updating context clustering: {e}")
 
+    def _update_forecaster(self):
+        """Learn activity switches from contexts captured since the last update"""
+        try:
+            self.forecaster.update(self.store)
+        except Exception as e:
+            logger.error(f"Error updating context forecaster: {e}")
+
+    def subscribe_events(self, bus: EventBus) -> List[Subscription]:
+        """Publish to bus and follow healing on it"""
+        self.events = bus
+        return [self.conservative.subscribe(bus, 'adaptive_config')]
+
     async def _apply_adaptive_optimizations(self):
         """Apply adaptive optimizations based on current context"""
         if not self.current_context:
             return
+        if self.conservative.active:
+            # A profile could turn back on what self-healing just turned off
+            logger.debug("Self-healing in progress, adaptive profiles paused")
+            return
         
         try:
             # Find matching preference profile
@@ -599,29 +640,229 @@ class AdaptiveConfigManager:
             
             if best_profile and best_profile.confidence_score > self.confidence_threshold:
                 # Apply profile configurations
-                await self._apply_profile_config(best_profile)
-                self.active_profile = best_profile.profile_id
+                applied = await self._apply_profile_config(best_profile)
                 
-                logger.info(f"Applied adaptive profile: {best_profile.profile_id}")
+                if best_profile.profile_id != self.active_profile or applied:
+                    logger.info(f"Applied adaptive profile: {best_profile.profile_id} "
+                                f"({applied} options changed)")
+                if best_profile.profile_id != self.active_profile:
+                    self._record_switch('reactive', self.current_context.user_activity_pattern)
+                self.active_profile = best_profile.profile_id
+            
+            # A captured context of the new activity ends a pending switch either way
+            if self._switch_started and self._switch_started[0] == self.current_context.user_activity_pattern:
+                self._switch_started = None
             
         except Exception as e:
             logger.error(f"Error applying adaptive optimizations: {e}")
 
+    def _forecast_context(self, context: UserContext, activity: str) -> UserContext:
+        """The current context as it would look after switching to activity"""
+        forecast = replace(
+            context,
+            user_activity_pattern=activity,
+            is_gaming=activity == 'gaming',
+            is_coding=activity == 'development',
+            is_media_consumption=activity == 'media',
+            context_id=None
+        )
+        forecast.cluster_id = self.context_clusterer.assign(forecast)
+        return forecast
+
+    async def _prepare_predicted_profiles(self):
+        """Prepare profiles of likely next activities so a switch needs one compositor call"""
+        context = self.current_context
+        if not context:
+            return
+        if self.conservative.active:
+            self._prepared = {}  # Nothing is pre-switched while self-healing works
+            return
+        
+        try:
+            prepared = {}
+            for activity, probability in self.forecaster.predict(
+                    context.user_activity_pattern, context.hour_of_day, context.day_of_week):
+                # Only activities recognizable from a window class can be switched on open
+                if probability < self.prediction_threshold or activity not in self.activity_classifier.categories:
+                    continue
+                
+                profile = await self._find_best_profile(self._forecast_context(context, activity))
+                if (not profile or profile.confidence_score <= self.confidence_threshold
+                        or profile.profile_id == self.active_profile):
+                    continue
+                
+                await self.reconciler.prepare(profile.preferred_configs)
+                prepared[activity] = (profile.profile_id, probability)
+            
+            self.prediction_stats['prepared'] += len(prepared)
+            self._prepared = prepared
+            
+        except Exception as e:
+            logger.error(f"Error preparing predicted profiles: {e}")
+
+    async def _handle_window_open(self, data: str, received_at: float):
+        """Switch to a prepared profile on the first window of the predicted activity"""
+        parts = data.split(',', 3)  # address, workspace, class, title
+        if len(parts) < 3:
+            return
+        
+        activity = self.activity_classifier.classify([parts[2]]).category
+        current = self.current_context.user_activity_pattern if self.current_context else None
+        if activity is None or activity == current:
+            return
+        
+        if self._switch_started is None or self._switch_started[0] != activity:
+            self._switch_started = (activity, received_at)
+            if activity not in self._prepared:
+                # Not predicted; the next context capture switches reactively
+                self.prediction_stats['misses'] += 1
+        
+        prepared = self._prepared.pop(activity, None)
+        profile = self.preference_profiles.get(prepared[0]) if prepared else None
+        if profile is None or self.conservative.active:
+            return
+        
+        applied = await self._apply_profile_config(profile)
+        self.active_profile = profile.profile_id
+        self.prediction_stats['hits'] += 1
+        latency = self._record_switch('predicted', activity)
+        logger.info(f"Pre-switched to profile {profile.profile_id} for {activity} "
+                    f"(p={prepared[1]:.2f}, {applied} options changed"
+                    + (f", {latency:.1f} ms after window open)" if latency is not None else ")"))
+
+    def _hyprctl_json(self, request: str) -> Any:
+        """Parsed reply of `hyprctl -j <request>`, None on failure"""
+        try:
+            result = timed_run(['hyprctl', '-j', request], capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                return json.loads(result.stdout)
+        except Exception:
+            pass
+        return None
+
+    async def _update_workspace_profiles(self):
+        """Learn each workspace's activity from its applications and refresh the switch baseline"""
+        try:
+            active = self._hyprctl_json('activeworkspace')
+            if isinstance(active, dict) and 'id' in active:
+                self.active_workspace = (active['id'], active.get('name', str(active['id'])))
+            
+            classes = defaultdict(list)
+            for client in self._hyprctl_json('clients') or []:
+                workspace = client.get('workspace') or {}
+                if 'id' in workspace and client.get('class'):
+                    classes[(workspace['id'], workspace.get('name', str(workspace['id'])))].append(client['class'])
+            
+            # A workspace of an activity takes the options of that activity's profile
+            activity_configs: Dict[str, Dict[str, Any]] = {}
+            for workspace, window_classes in classes.items():
+                activity = self.activity_classifier.classify(window_classes).category
+                if activity is None:
+                    continue
+                if activity not in activity_configs:
+                    profile = None
+                    if self.current_context:
+                        profile = await self._find_best_profile(self._forecast_context(self.current_context, activity))
+                    activity_configs[activity] = (profile.preferred_configs if profile and
+                                                  profile.confidence_score > self.confidence_threshold else {})
+                self.workspace_profiles.observe_activity(workspace, activity, activity_configs[activity])
+            
+            # Workspaces that don't set an option get the config file value, or the active profile's
+            baseline = await self._read_current_config()
+            active_profile = self.preference_profiles.get(self.active_profile)
+            if active_profile:
+                baseline.update(active_profile.preferred_configs)
+            self.workspace_profiles.set_baseline({
+                key: baseline[key] for key in self.workspace_profiles.scoped_keys() if key in baseline
+            })
+            
+        except Exception as e:
+            logger.error(f"Error updating workspace profiles: {e}")
+
+    def _observe_workspace_option(self, key: str, value: Any):
+        """Attribute a user option change to the workspace it was made on"""
+        if self.active_workspace is not None and value is not None:
+            self.workspace_profiles.observe_option(self.active_workspace, key, value)
+
+    def _supports_workspacev2(self) -> bool:
+        """Whether the compositor sends workspacev2 events (Hyprland 0.34 and later)"""
+        version = self._hyprctl_json('version') or {}
+        match = re.match(r'v?(\d+)\.(\d+)', str(version.get('tag', '')))
+        # Unknown versions are assumed to be current
+        return match is None or (int(match.group(1)), int(match.group(2))) >= (0, 34)
+
+    async def _handle_workspace_switch(self, data: str, received_at: float):
+        """workspacev2>>ID,NAME"""
+        workspace_id, _, name = data.partition(',')
+        if workspace_id.lstrip('-').isdigit():
+            await self._switch_workspace(int(workspace_id), name, received_at)
+
+    async def _handle_workspace_switch_v1(self, data: str, received_at: float):
+        """workspace>>NAME, only used with compositors that don't send workspacev2"""
+        await self._switch_workspace(None, data, received_at)
+
+    async def _switch_workspace(self, workspace_id: Optional[int], name: str, received_at: float):
+        """Apply the precompiled option batch of the workspace switched to"""
+        profile = self.workspace_profiles.get(workspace_id, name)
+        if profile is not None:
+            self.active_workspace = profile.key
+        elif workspace_id is not None:
+            self.active_workspace = (workspace_id, name)
+        
+        # The batch holds the config file value of every scoped key, so it could
+        # undo what self-healing just changed
+        compiled = self.workspace_profiles.switch_batch(workspace_id, name)
+        if compiled is None or self.conservative.active:
+            return
+        
+        batch, options = compiled
+        desired = {**self._desired_options(self.preference_profiles.get(self.active_profile)), **options}
+        if await self.reconciler.apply_compiled(batch, options, desired):
+            latency = (time.monotonic() - received_at) * 1000
+            self.events.publish_nowait(ConfigApplied('adaptive_config', dict(options)))
+            self.workspace_switch_ms.append(latency)
+            logger.debug(f"Applied {len(options)} options for workspace {name} in {latency:.1f} ms")
+
+    def _record_switch(self, kind: str, activity: str) -> Optional[float]:
+        """Profile switch latency since the first window of activity opened"""
+        if not self._switch_started or self._switch_started[0] != activity:
+            return None
+        latency = (time.monotonic() - self._switch_started[1]) * 1000
+        self.switch_latencies_ms[kind].append(latency)
+        self._switch_started = None
+        return latency
+
     async def _find_best_profile(self, context: UserContext) -> Optional[PreferenceProfile]:
         """Find the best matching preference profile for current context"""
         if not self.preference_profiles:
             return None
         
+        # Direct lookup by context cluster
+        profile_id = self.cluster_profiles.get(context.cluster_id)
+        if profile_id in self.preference_profiles:
+            return self.preference_profiles[profile_id]
+        
         best_profile = None
         best_score = 0
         
-        for profile in self.preference_profiles.values():
-            # Calculate similarity score
-            score = self._calculate_context_similarity(context, profile)
-            
-            if score > best_score:
-                best_score = score
-                best_profile = profile
+        # Nearest indexed profile by cosine similarity
+        matches = self.profile_index.query(self._embed_context(context), k=1)
+        if matches:
+            best_profile = self.preference_profiles.get(matches[0][0])
+            best_score = matches[0][1]
+        
+        # Profiles learned before centroids were recorded
+        if len(self.profile_index) < len(self.preference_profiles):
+            for profile in self.preference_profiles.values():
+                if profile.profile_id in self.profile_index:
+                    continue
+                
+                # Calculate similarity score
+                score = self._calculate_context_similarity(context, profile)
+                
+                if score > best_score:
+                    best_score = score
+                    best_profile = profile
         
         return best_profile if best_score > 0.5 else None
 
@@ -631,10 +872,11 @@ class AdaptiveConfigManager:
         # In practice, you'd want more sophisticated similarity metrics
         
         pattern_key = profile.context_patterns.get('pattern_key', '')
-        expected_pattern = f"{context.user_activity_pattern}_{context.hour_of_day // 4}"
+        expected_pattern = self._pattern_key(context.user_activity_pattern, context.hour_of_day,
+                                             context.cluster_id)
         
         if pattern_key == expected_pattern:
-            return profile.confidence_score * profile.usage_frequency / 10
+            return self._profile_prior(profile)
         
         # Partial matches
         if context.user_activity_pattern in pattern_key:
@@ -642,65 +884,53 @@ class AdaptiveConfigManager:
         
         return 0.0
 
-    async def _apply_profile_config(self, profile: PreferenceProfile):
-        """Apply configuration from preference profile"""
+    def _desired_options(self, profile: Optional[PreferenceProfile]) -> Dict[str, Any]:
+        """Options to enforce under profile; those of the active workspace take precedence"""
+        return {
+            **(profile.preferred_configs if profile else {}),
+            **self.workspace_profiles.options_for(self.active_workspace)
+        }
+
+    async def _apply_profile_config(self, profile: PreferenceProfile) -> int:
+        """Reconcile the compositor with a preference profile; returns options changed"""
         try:
-            for config_key, value in profile.preferred_configs.items():
-                await self._apply_single_config(config_key, value)
-                
+            # Only drifted options are applied, in one batch; options of the previous
+            # profile that this one doesn't set are no longer enforced
+            self.reconciler.set_desired(self._desired_options(profile), replace=True)
+            transitions = await self.reconciler.reconcile()
+            
+            for config_key, old_value, new_value in transitions:
                 # Record this as an adaptive change
                 change = ConfigurationChange(
                     timestamp=time.time(),
                     config_key=config_key,
-                    old_value=None,  # Would need to track current values
-                    new_value=value,
+                    old_value=old_value,
+                    new_value=new_value,
                     context=self.current_context,
                     change_source='adaptive'
                 )
                 
                 self.config_history.append(change)
+            
+            if transitions:
+                await self.events.publish(ConfigApplied(
+                    'adaptive_config', {key: new_value for key, _, new_value in transitions}))
+            return len(transitions)
                 
         except Exception as e:
             logger.error(f"Error applying profile config: {e}")
-
-    async def _apply_single_config(self, config_key: str, value: Any):
-        """Apply a single configuration change"""
-        try:
-            # Convert value to string format for hyprctl
-            if isinstance(value, bool):
-                str_value = 'yes' if value else 'no'
-            else:
-                str_value = str(value)
-            
-            # Apply via hyprctl
-            cmd = ['hyprctl', 'keyword', config_key, str_value]
-            subprocess.run(cmd, check=True, capture_output=True)
-            
-        except subprocess.CalledProcessError as e:
-            logger.warning(f"Failed to apply config {config_key}={value}: {e}")
+            return 0
 
     async def _cleanup_old_data(self):
         """Clean up old learning data to prevent database bloat"""
         try:
             cutoff_time = time.time() - (30 * 24 * 3600)  # 30 days ago
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Clean old contexts
-            cursor.execute('DELETE FROM user_contexts WHERE timestamp < ?', (cutoff_time,))
-            
-            # Clean old config changes
-            cursor.execute('DELETE FROM config_changes WHERE timestamp < ?', (cutoff_time,))
-            
-            conn.commit()
-            conn.close()
+            # Clean old contexts and config changes
+            self.store.delete_before(cutoff_time)
             
             # Clean in-memory data
-            self.config_history = [
-                change for change in self.config_history
-                if change.timestamp > cutoff_time
-            ]
+            self.config_history.prune(cutoff_time)
             
         except Exception as e:
             logger.error(f"Error cleaning up old data: {e}")
@@ -708,13 +938,7 @@ class AdaptiveConfigManager:
     def _load_preference_profiles(self):
         """Load existing preference profiles from database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT * FROM preference_profiles')
-            rows = cursor.fetchall()
-            
-            for row in rows:
+            for row in self.store.load_profiles():
                 profile_id, context_patterns, preferred_configs, usage_frequency, last_used, confidence_score = row
                 
                 profile = PreferenceProfile(
@@ -727,76 +951,140 @@ class AdaptiveConfigManager:
                 )
                 
                 self.preference_profiles[profile_id] = profile
+                if 'cluster_id' in profile.context_patterns:
+                    self.cluster_profiles[profile.context_patterns['cluster_id']] = profile_id
+                if 'centroid' in profile.context_patterns:
+                    self.profile_index.upsert(
+                        profile_id, np.array(profile.context_patterns['centroid']), self._profile_prior(profile)
+                    )
             
-            conn.close()
             logger.info(f"Loaded {len(self.preference_profiles)} preference profiles")
             
         except Exception as e:
             logger.error(f"Error loading preference profiles: {e}")
 
+    def _load_workspace_profiles(self):
+        """Load workspace profiles from database"""
+        try:
+            for (workspace_id, workspace_name, activity, activity_configs, user_configs,
+                 samples, last_used) in self.store.load_workspace_profiles():
+                self.workspace_profiles.add(WorkspaceProfile(
+                    workspace_id=workspace_id,
+                    workspace_name=workspace_name,
+                    activity=activity,
+                    activity_configs=json.loads(activity_configs),
+                    user_configs=json.loads(user_configs),
+                    samples=samples,
+                    last_used=last_used
+                ))
+            
+        except Exception as e:
+            logger.error(f"Error loading workspace profiles: {e}")
+
     def _load_usage_patterns(self):
         """Load usage patterns from database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Load recent config changes to rebuild patterns
-            cursor.execute('''
-                SELECT cc.config_key, cc.new_value, cc.timestamp, uc.activity_pattern, uc.hour_of_day
+            rows = self.store.query('''
+                SELECT cc.config_key, cc.new_value, cc.timestamp, uc.activity_pattern, uc.hour_of_day,
+                       uc.cluster_id, uc.day_of_week, uc.window_count, uc.screen_brightness,
+                       uc.system_load, uc.battery_level, uc.is_gaming, uc.is_coding,
+                       uc.is_media_consumption
                 FROM config_changes cc
                 JOIN user_contexts uc ON cc.context_id = uc.id
-                WHERE cc.timestamp > ?
+                WHERE cc.timestamp > ? AND cc.change_source = 'user'
                 ORDER BY cc.timestamp DESC
                 LIMIT 500
             ''', (time.time() - 7 * 24 * 3600,))  # Last 7 days
             
-            rows = cursor.fetchall()
-            
-            for config_key, new_value, timestamp, activity_pattern, hour_of_day in rows:
-                pattern_key = f"{activity_pattern}_{hour_of_day // 4}"
+            for (config_key, new_value, timestamp, activity_pattern, hour_of_day, cluster_id,
+                 *features) in rows:
+                pattern_key = self._pattern_key(activity_pattern, hour_of_day, cluster_id)
                 self.usage_patterns[pattern_key].append({
                     'config_key': config_key,
                     'value': json.loads(new_value),
-                    'timestamp': timestamp
+                    'timestamp': timestamp,
+                    'embedding': embed_context(hour_of_day, *features)
                 })
             
-            conn.close()
-            
         except Exception as e:
             logger.error(f"Error loading usage patterns: {e}")
 
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """Warm-start state: usage patterns with their embeddings as one array, and the forecaster"""
+        entries = [(pattern_key, change) for pattern_key, changes in self.usage_patterns.items()
+                   for change in changes]
+        embeddings = np.array([change['embedding'] for _, change in entries], dtype=np.float64)
+        return {
+            'usage_patterns': [[pattern_key, change['config_key'], change['value'], change['timestamp']]
+                               for pattern_key, change in entries],
+            'usage_embeddings': embeddings,
+            'forecaster': self.forecaster.checkpoint_state()
+        }
+
+    def restore_checkpoint(self, state: Dict[str, Any]):
+        """Replace the usage patterns rebuilt from the database with the checkpointed ones"""
+        self.usage_patterns.clear()
+        embeddings = state['usage_embeddings'].copy()  # Writable, not a view of the snapshot
+        for (pattern_key, config_key, value, timestamp), embedding in zip(state['usage_patterns'], embeddings):
+            self.usage_patterns[pattern_key].append({
+                'config_key': config_key,
+                'value': value,
+                'timestamp': timestamp,
+                'embedding': embedding
+            })
+        self.forecaster.restore_checkpoint(state['forecaster'])
+        logger.info(f"Restored {len(self.usage_patterns)} usage patterns")
+
     def save_preference_profiles(self):
-        """Save current preference profiles to database"""
+        """Save preference and workspace profiles changed since the last save"""
+        if self.workspace_profiles.dirty:
+            workspaces = self.workspace_profiles.take_dirty()
+            try:
+                self.store.upsert_workspace_profiles(workspaces)
+            except Exception as e:
+                self.workspace_profiles.dirty.update(profile.key for profile in workspaces)
+                logger.error(f"Error saving workspace profiles: {e}")
+        
+        if not self._dirty_profiles:
+            return
+        
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Clear existing profiles
-            cursor.execute('DELETE FROM preference_profiles')
-            
-            # Insert current profiles
-            for profile in self.preference_profiles.values():
-                cursor.execute('''
-                    INSERT INTO preference_profiles 
-                    (profile_id, context_patterns, preferred_configs, usage_frequency, last_used, confidence_score)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    profile.profile_id,
-                    json.dumps(profile.context_patterns),
-                    json.dumps(profile.preferred_configs),
-                    profile.usage_frequency,
-                    profile.last_used,
-                    profile.confidence_score
-                ))
-            
-            conn.commit()
-            conn.close()
+            dirty = self._dirty_profiles
+            self._dirty_profiles = set()
+            self.store.upsert_profiles(
+                self.preference_profiles[profile_id] for profile_id in dirty
+                if profile_id in self.preference_profiles
+            )
+            self._last_autosave = time.time()
             
-            logger.info("Preference profiles saved successfully")
+            logger.info(f"Saved {len(dirty)} preference profiles")
             
         except Exception as e:
+            self._dirty_profiles |= dirty
             logger.error(f"Error saving preference profiles: {e}")
 
+    def _autosave_profiles(self):
+        """Periodically persist changed profiles so a crash loses little learning"""
+        if time.time() - self._last_autosave >= self.autosave_interval:
+            self.save_preference_profiles()
+            self._last_autosave = time.time()
+
+    def close(self):
+        """Save pending profiles and close the database"""
+        self.hypr_events.stop()
+        self.config_watcher.stop()
+        self.save_preference_profiles()
+        self.store.close()
+
+    @property
+    def status_summary(self) -> Dict[str, Any]:
+        """What the orchestrator's status needs, in constant time"""
+        return {
+            "config_changes": len(self.config_history),
+            "active_profile": self.active_profile
+        }
+
     async def get_adaptation_report(self) -> Dict[str, Any]:
         """Generate adaptive configuration report"""
         report = {
@@ -811,10 +1099,36 @@ class AdaptiveConfigManager:
             "current_context": asdict(self.current_context) if self.current_context else None,
             "top_patterns": list(self.usage_patterns.keys())[:5],
             "adaptation_stats": {
-                "adaptations_applied": len([c for c in self.config_history if c.change_source == 'adaptive']),
-                "user_overrides": len([c for c in self.config_history if c.change_source == 'user']),
+                "adaptations_applied": self.config_history.count('adaptive'),
+                "user_overrides": self.config_history.count('user'),
                 "confidence_threshold": self.confidence_threshold
-            }
+            },
+            "context_clustering": self.context_clusterer.get_stats(),
+            "indexed_profiles": len(self.profile_index),
+            "activity_classifier": self.activity_classifier.get_stats(),
+            "reconciler": self.reconciler.get_stats(),
+            "prediction": {
+                **self.prediction_stats,
+                "prepared_now": {activity: round(p, 3) for activity, (_, p) in self._prepared.items()},
+                "forecaster": self.forecaster.get_stats(),
+                "switch_latency_ms": {
+                    kind: {"count": len(values), "mean": round(sum(values) / len(values), 1),
+                           "max": round(max(values), 1)} if values else {"count": 0}
+                    for kind, values in self.switch_latencies_ms.items()
+                }
+            },
+            "compositor_events": self.hypr_events.get_stats(),
+            "workspace_profiles": {
+                **self.workspace_profiles.get_stats(),
+                "active_workspace": list(self.active_workspace) if self.active_workspace else None,
+                "switch_latency_ms": {
+                    "count": len(self.workspace_switch_ms),
+                    "mean": round(sum(self.workspace_switch_ms) / len(self.workspace_switch_ms), 2),
+                    "max": round(max(self.workspace_switch_ms), 2)
+                } if self.workspace_switch_ms else {"count": 0}
+            },
+            "history_store": self.config_history.get_stats(),
+            "persistence": {**self.store.get_stats(), "dirty_profiles": len(self._dirty_profiles)}
         }
         
         return report
@@ -822,17 +1136,13 @@ class AdaptiveConfigManager:
     async def _count_contexts(self) -> int:
         """Count total contexts captured"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM user_contexts')
-            count = cursor.fetchone()[0]
-            conn.close()
-            return count
+            return self.store.count_contexts()
         except:
             return 0
 
 async def main():
     """Main entry point for adaptive config manager"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     manager = AdaptiveConfigManager()
     
     # Start adaptive learning
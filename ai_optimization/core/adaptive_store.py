@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Adaptive Configuration Store
+Persistence for adaptive_config.db over one long-lived WAL connection: contexts
+return their row id for foreign keys, and preference profiles are upserted
+individually instead of rewriting the whole table
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .metrics_exporter import DB_WRITE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS user_contexts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL,
+        hour_of_day INTEGER,
+        day_of_week INTEGER,
+        active_applications TEXT,
+        workspace_layout TEXT,
+        window_count INTEGER,
+        screen_brightness REAL,
+        system_load REAL,
+        battery_level REAL,
+        is_gaming INTEGER,
+        is_coding INTEGER,
+        is_media_consumption INTEGER,
+        activity_pattern TEXT,
+        cluster_id INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS config_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL,
+        config_key TEXT,
+        old_value TEXT,
+        new_value TEXT,
+        context_id INTEGER,
+        change_source TEXT,
+        FOREIGN KEY (context_id) REFERENCES user_contexts (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS preference_profiles (
+        profile_id TEXT PRIMARY KEY,
+        context_patterns TEXT,
+        preferred_configs TEXT,
+        usage_frequency REAL,
+        last_used REAL,
+        confidence_score REAL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS workspace_profiles (
+        workspace_id INTEGER,
+        workspace_name TEXT,
+        activity TEXT,
+        activity_configs TEXT,
+        user_configs TEXT,
+        samples INTEGER,
+        last_used REAL,
+        PRIMARY KEY (workspace_id, workspace_name)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS config_effectiveness (
+        config_combo_hash TEXT PRIMARY KEY,
+        effectiveness_score REAL,
+        usage_count INTEGER,
+        last_updated REAL
+    )
+    '''
+)
+
+# Columns added after the first release: (table, column, type)
+MIGRATIONS = (
+    ('user_contexts', 'cluster_id', 'INTEGER'),
+)
+
+INDEXES = (
+    # Usage pattern loading: recent user changes, newest first
+    'CREATE INDEX IF NOT EXISTS idx_config_changes_source_time ON config_changes (change_source, timestamp)',
+    # Retention cleanup
+    'CREATE INDEX IF NOT EXISTS idx_config_changes_time ON config_changes (timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_user_contexts_time ON user_contexts (timestamp)'
+)
+
+class AdaptiveStore:
+    """Single-connection SQLite store for contexts, config changes and profiles"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        # The connection is shared by the learning loop and shutdown; writes are serialized
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.stats = {'contexts_written': 0, 'changes_written': 0, 'profiles_written': 0,
+                      'workspace_profiles_written': 0, 'commits': 0}
+
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock:
+            cursor = self.conn.cursor()
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            for table, column, column_type in MIGRATIONS:
+                cursor.execute(f'PRAGMA table_info({table})')
+                if column not in {row[1] for row in cursor.fetchall()}:
+                    cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+            for statement in INDEXES:
+                cursor.execute(statement)
+            self.conn.commit()
+
+    def _write(self, sql: str, params: Sequence[Any] = ()) -> int:
+        with self._lock, DB_WRITE_SECONDS.time(store='adaptive'):
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+            self.stats['commits'] += 1
+            return cursor.lastrowid
+
+    def _write_many(self, sql: str, rows: List[Sequence[Any]]):
+        if not rows:
+            return
+        with self._lock, DB_WRITE_SECONDS.time(store='adaptive'):
+            self.conn.executemany(sql, rows)
+            self.conn.commit()
+            self.stats['commits'] += 1
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def insert_context(self, context) -> int:
+        """Store a UserContext and return its row id"""
+        context_id = self._write('''
+            INSERT INTO user_contexts (
+                timestamp, hour_of_day, day_of_week, active_applications,
+                workspace_layout, window_count, screen_brightness, system_load,
+                battery_level, is_gaming, is_coding, is_media_consumption,
+                activity_pattern, cluster_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            context.timestamp, context.hour_of_day, context.day_of_week,
+            json.dumps(context.active_applications), context.workspace_layout,
+            context.window_count, context.screen_brightness, context.system_load,
+            context.battery_level, context.is_gaming, context.is_coding,
+            context.is_media_consumption, context.user_activity_pattern, context.cluster_id
+        ))
+        self.stats['contexts_written'] += 1
+        return context_id
+
+    def insert_config_changes(self, rows: List[Tuple[float, str, Any, Any, Optional[int], str]]):
+        """Store (timestamp, key, old, new, context_id, source) rows in one transaction"""
+        self._write_many('''
+            INSERT INTO config_changes (
+                timestamp, config_key, old_value, new_value, context_id, change_source
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(timestamp, key, json.dumps(old), json.dumps(new), context_id, source)
+              for timestamp, key, old, new, context_id, source in rows])
+        self.stats['changes_written'] += len(rows)
+
+    def load_profiles(self) -> List[Tuple]:
+        return self.query('''
+            SELECT profile_id, context_patterns, preferred_configs, usage_frequency,
+                   last_used, confidence_score
+            FROM preference_profiles
+        ''')
+
+    def upsert_profiles(self, profiles: Iterable):
+        """Insert or update the given PreferenceProfiles, leaving all others untouched"""
+        rows = [(
+            profile.profile_id,
+            json.dumps(profile.context_patterns),
+            json.dumps(profile.preferred_configs),
+            profile.usage_frequency,
+            profile.last_used,
+            profile.confidence_score
+        ) for profile in profiles]
+        self._write_many('''
+            INSERT INTO preference_profiles
+            (profile_id, context_patterns, preferred_configs, usage_frequency, last_used, confidence_score)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (profile_id) DO UPDATE SET
+                context_patterns = excluded.context_patterns,
+                preferred_configs = excluded.preferred_configs,
+                usage_frequency = excluded.usage_frequency,
+                last_used = excluded.last_used,
+                confidence_score = excluded.confidence_score
+        ''', rows)
+        self.stats['profiles_written'] += len(rows)
+
+    def load_workspace_profiles(self) -> List[Tuple]:
+        return self.query('''
+            SELECT workspace_id, workspace_name, activity, activity_configs, user_configs,
+                   samples, last_used
+            FROM workspace_profiles
+        ''')
+
+    def upsert_workspace_profiles(self, profiles: Iterable):
+        """Insert or update the given WorkspaceProfiles"""
+        rows = [(
+            profile.workspace_id,
+            profile.workspace_name,
+            profile.activity,
+            json.dumps(profile.activity_configs),
+            json.dumps(profile.user_configs),
+            profile.samples,
+            profile.last_used
+        ) for profile in profiles]
+        self._write_many('''
+            INSERT OR REPLACE INTO workspace_profiles
+            (workspace_id, workspace_name, activity, activity_configs, user_configs, samples, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.stats['workspace_profiles_written'] += len(rows)
+
+    def delete_profiles(self, profile_ids: Iterable[str]):
+        self._write_many('DELETE FROM preference_profiles WHERE profile_id = ?',
+                         [(profile_id,) for profile_id in profile_ids])
+
+    def delete_before(self, cutoff: float):
+        """Drop contexts and config changes older than cutoff"""
+        with self._lock, DB_WRITE_SECONDS.time(store='adaptive'):
+            self.conn.execute('DELETE FROM user_contexts WHERE timestamp < ?', (cutoff,))
+            self.conn.execute('DELETE FROM config_changes WHERE timestamp < ?', (cutoff,))
+            self.conn.commit()
+            self.stats['commits'] += 1
+
+    def count_contexts(self) -> int:
+        return self.query('SELECT COUNT(*) FROM user_contexts')[0][0]
+
+    def close(self):
+        """Checkpoint the WAL and close the connection"""
+        with self._lock:
+            try:
+                self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            except sqlite3.Error as e:
+                logger.warning(f"WAL checkpoint failed: {e}")
+            self.conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
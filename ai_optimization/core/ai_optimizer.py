@@ -11,7 +11,7 @@ import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any
 import psutil
@@ -24,10 +24,14 @@ from sklearn.ensemble import IsolationForest
 import threading
 from collections import deque
 import warnings
+
+from .config_reconciler import normalize_value
+from .event_bus import ConfigApplied, ConservativeMode, ContextChanged, EventBus, Subscription
+from .metrics_exporter import LOOP_SECONDS, MODEL_LOSS, OPTIMIZATIONS, OPTIONS_APPLIED, timed_run
+from .resource_budget import Throttle
+from .status_aggregates import WindowedMeans
 warnings.filterwarnings('ignore')
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -85,6 +89,7 @@ class AIOptimizer:
         self.config_path = Path(config_path)
         self.model_path = Path("/home/sasha/hyprland-project/ai_optimization/models")
         self.model_path.mkdir(parents=True, exist_ok=True)
+        self.checkpoint_path = self.model_path / 'warm_start.ckpt'  # Metrics history across restarts
         
         # Initialize components
         self.predictor = PerformancePredictor()
@@ -94,6 +99,10 @@ class AIOptimizer:
         
         # Data storage
         self.metrics_history = deque(maxlen=10000)
+        # Means over the last samples, kept as they arrive; the report and the trigger read these
+        self.recent_means = WindowedMeans(
+            ('cpu_usage', 'memory_usage', 'gpu_usage', 'temperature', 'battery_level'), 20)
+        self.trigger_means = WindowedMeans(('cpu_usage', 'memory_usage'), 10)
         self.optimization_history = []
         self.current_config = {}
         
@@ -101,6 +110,18 @@ class AIOptimizer:
         self.performance_baseline = None
         self.last_optimization = None
         self.learning_rate = 0.001
+
+        # Cycle in flight; scheduled and on-demand requests arriving meanwhile share its result
+        self._cycle: Optional[asyncio.Task] = None
+        self.cycle_stats = {'scheduled': 0, 'on_demand': 0, 'context': 0, 'coalesced': 0}
+        self.last_heartbeat: Optional[float] = None  # time.monotonic() of the last loop iteration
+        self.shared_metrics = None  # MetricsRing of the collector process in multi-process mode
+        self.throttle = Throttle()  # Set by the orchestrator to keep the daemon within its resource budget
+        
+        # Coordination with the other engines; the orchestrator's bus replaces this private one
+        self.events = EventBus()
+        self.conservative = ConservativeMode()  # Only lighter settings while self-healing works on an issue
+        self.user_activity: Optional[str] = None
         
         # Load existing models
         self._load_models()
@@ -128,9 +149,12 @@ class AIOptimizer:
         
         while True:
             try:
+                iteration_start = time.perf_counter()
+                self.last_heartbeat = time.monotonic()
+                
                 # Collect metrics
                 metrics = await self._collect_metrics()
-                self.metrics_history.append(metrics)
+                self._record_metrics(metrics)
                 
                 # Check if optimization is needed
                 if await self._should_optimize():
@@ -138,9 +162,10 @@ class AIOptimizer:
                 
                 # Learn from current performance
                 await self._update_model()
+                LOOP_SECONDS.observe(time.perf_counter() - iteration_start, loop='ai_optimizer')
                 
                 # Sleep before next iteration
-                await asyncio.sleep(30)  # Optimize every 30 seconds
+                await asyncio.sleep(self.throttle.interval(30))  # Optimize every 30 seconds
                 
             except Exception as e:
                 logger.error(f"Error in optimization loop: {e}")
@@ -149,26 +174,35 @@ class AIOptimizer:
     async def _collect_metrics(self) -> SystemMetrics:
         """Collect comprehensive system metrics"""
         try:
-            # System metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            
-            # GPU metrics (if available)
-            gpu_usage, gpu_memory = await self._get_gpu_metrics()
-            
-            # IO metrics
-            io_counters = psutil.disk_io_counters()
-            io_read = io_counters.read_bytes if io_counters else 0
-            io_write = io_counters.write_bytes if io_counters else 0
-            
-            # Network metrics
-            net_counters = psutil.net_io_counters()
-            network_sent = net_counters.bytes_sent if net_counters else 0
-            network_recv = net_counters.bytes_recv if net_counters else 0
+            shared = self.shared_metrics.latest(max_age=10) if self.shared_metrics else None
+            if shared:
+                # Sampled by the collector process, no blocking sample or nvidia-smi here
+                cpu_percent = shared['cpu_usage']
+                memory_percent = shared['memory_usage']
+                gpu_usage, gpu_memory = shared['gpu_usage'] or 0.0, shared['gpu_memory'] or 0.0
+                io_read, io_write = shared['io_read'], shared['io_write']
+                network_sent, network_recv = shared['network_sent'], shared['network_recv']
+            else:
+                # System metrics
+                cpu_percent = psutil.cpu_percent(interval=1)
+                memory_percent = psutil.virtual_memory().percent
+                
+                # GPU metrics (if available); nvidia-smi is shed when over budget
+                gpu_usage, gpu_memory = (0.0, 0.0) if self.throttle.shed_optional else await self._get_gpu_metrics()
+                
+                # IO metrics
+                io_counters = psutil.disk_io_counters()
+                io_read = io_counters.read_bytes if io_counters else 0
+                io_write = io_counters.write_bytes if io_counters else 0
+                
+                # Network metrics
+                net_counters = psutil.net_io_counters()
+                network_sent = net_counters.bytes_sent if net_counters else 0
+                network_recv = net_counters.bytes_recv if net_counters else 0
             
             # Hyprland-specific metrics
             active_windows = await self._get_active_windows_count()
-            workspace_switches = await self._get_workspace_switches()
+            workspace_switches = 0 if self.throttle.shed_optional else await self._get_workspace_switches()
             animation_fps = await self._get_animation_fps()
             
             # Power and thermal metrics
@@ -182,7 +216,7 @@ class AIOptimizer:
             return SystemMetrics(
                 timestamp=time.time(),
                 cpu_usage=cpu_percent,
-                memory_usage=memory.percent,
+                memory_usage=memory_percent,
                 gpu_usage=gpu_usage,
                 gpu_memory=gpu_memory,
                 io_read=io_read,
@@ -218,7 +252,7 @@ class AIOptimizer:
         except:
             try:
                 # Fallback to nvidia-smi
-                result = subprocess.run([
+                result = timed_run([
                     'nvidia-smi', '--query-gpu=utilization.gpu,memory.used,memory.total',
                     '--format=csv,noheader,nounits'
                 ], capture_output=True, text=True)
@@ -238,7 +272,7 @@ class AIOptimizer:
     async def _get_active_windows_count(self) -> int:
         """Get number of active windows"""
         try:
-            result = subprocess.run(['hyprctl', 'clients'], capture_output=True, text=True)
+            result = timed_run(['hyprctl', 'clients'], capture_output=True, text=True)
             if result.returncode == 0:
                 return result.stdout.count('class:')
         except:
@@ -250,7 +284,7 @@ class AIOptimizer:
         # This would ideally track actual workspace switches over time
         # For now, return current workspace as a proxy
         try:
-            result = subprocess.run(['hyprctl', 'activeworkspace'], capture_output=True, text=True)
+            result = timed_run(['hyprctl', 'activeworkspace'], capture_output=True, text=True)
             if result.returncode == 0:
                 return 1  # Simplified
         except:
@@ -306,15 +340,48 @@ class AIOptimizer:
         # Simplified implementation
         return 50.0
 
+    def subscribe_events(self, bus: EventBus) -> List[Subscription]:
+        """Publish to bus and follow healing, context and other engines' config changes on it"""
+        self.events = bus
+        return [
+            self.conservative.subscribe(bus, 'ai_optimizer'),
+            bus.subscribe(ConfigApplied, self._on_config_applied, 'ai_optimizer:config'),
+            bus.subscribe(ContextChanged, self._on_context_changed, 'ai_optimizer:context')
+        ]
+
+    def _on_config_applied(self, event: ConfigApplied):
+        # Keeps the diff against the running config accurate when others change options
+        if event.source != 'ai_optimizer':
+            self.current_config.update({key: normalize_value(value) for key, value in event.changes.items()})
+
+    async def _on_context_changed(self, event: ContextChanged):
+        self.user_activity = event.activity
+        if event.previous_activity is not None and len(self.metrics_history) >= 10:
+            await self._run_coalesced('context')
+
+    def _is_lighter(self, key: str, value: Any) -> bool:
+        """Whether setting key to value lowers the cost of an effect"""
+        current = self.current_config.get(key)
+        if current is None:
+            return False
+        # Higher is lighter for these; for every other option a lower value disables or shrinks an effect
+        if key in ('misc:vfr', 'render:direct_scanout'):
+            return value > current
+        return value < current
+
+    def _record_metrics(self, metrics: SystemMetrics):
+        self.metrics_history.append(metrics)
+        self.recent_means.add(metrics)
+        self.trigger_means.add(metrics)
+
     async def _should_optimize(self) -> bool:
         """Determine if optimization should be performed"""
         if len(self.metrics_history) < 10:
             return False
         
         # Check if performance has degraded
-        recent_metrics = list(self.metrics_history)[-10:]
-        avg_cpu = sum(m.cpu_usage for m in recent_metrics) / len(recent_metrics)
-        avg_memory = sum(m.memory_usage for m in recent_metrics) / len(recent_metrics)
+        avg_cpu = self.trigger_means.mean('cpu_usage')
+        avg_memory = self.trigger_means.mean('memory_usage')
         
         # Optimize if high resource usage or every 5 minutes
         if avg_cpu > 80 or avg_memory > 85:
@@ -328,32 +395,92 @@ class AIOptimizer:
     async def _perform_optimization(self):
         """Perform AI-driven optimization"""
         logger.info("Performing AI optimization")
-        
+        await self._run_coalesced('scheduled', self.metrics_history[-1])
+
+    async def optimize_now(self) -> Dict[str, Any]:
+        """Run one full cycle immediately and return its config, predicted score and stage timings"""
+        return await self._run_coalesced('on_demand')
+
+    async def _run_coalesced(self, trigger: str, metrics: Optional[SystemMetrics] = None) -> Dict[str, Any]:
+        if self._cycle is not None and not self._cycle.done():
+            self.cycle_stats['coalesced'] += 1
+            # Shielded so a cancelled caller does not cancel the cycle for the others
+            result = await asyncio.shield(self._cycle)
+            return {**result, "coalesced": True}
+
+        self.cycle_stats[trigger] += 1
+        self._cycle = asyncio.get_event_loop().create_task(self._optimization_cycle(trigger, metrics))
+        return await asyncio.shield(self._cycle)
+
+    async def _optimization_cycle(self, trigger: str, metrics: Optional[SystemMetrics] = None) -> Dict[str, Any]:
+        """Collect, predict, diff against the running config and apply the changed options"""
+        timings = {}
+        start = stage_start = time.perf_counter()
+
+        def lap(stage: str):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[stage] = round((now - stage_start) * 1000, 2)
+            stage_start = now
+
         try:
-            # Get current metrics
-            current_metrics = self.metrics_history[-1]
-            
-            # Predict optimal configuration
-            optimal_config = await self._predict_optimal_config(current_metrics)
-            
-            # Apply configuration
-            await self._apply_configuration(optimal_config)
-            
+            if metrics is None:
+                metrics = await self._collect_metrics()
+                self._record_metrics(metrics)
+            lap('collect')
+
+            optimal_config, predicted_score = await self._predict_best_config(metrics)
+            lap('predict')
+            if not optimal_config:
+                return {"error": "Prediction failed", "trigger": trigger, "timings_ms": timings}
+
+            changed = {key: value for key, value in optimal_config.items()
+                       if self.current_config.get(key) != value}
+            conservative = self.conservative.active
+            if conservative:
+                # Healing is in progress: never undo what it turned down
+                changed = {key: value for key, value in changed.items() if self._is_lighter(key, value)}
+            lap('diff')
+
+            applied = await self._apply_configuration(changed) if changed else True
+            lap('apply')
+            OPTIMIZATIONS.inc(trigger=trigger)
+            if changed and applied:
+                OPTIONS_APPLIED.inc(len(changed), source='ai_optimizer')
+                await self.events.publish(ConfigApplied('ai_optimizer', changed))
+
             # Update tracking
             self.last_optimization = time.time()
             self.optimization_history.append({
                 'timestamp': time.time(),
-                'metrics': asdict(current_metrics),
+                'metrics': asdict(metrics),
                 'config': optimal_config
             })
-            
-            logger.info("Optimization completed successfully")
-            
+            timings['total'] = round((time.perf_counter() - start) * 1000, 2)
+
+            logger.info(f"Optimization completed ({trigger}): {len(changed)} options changed in {timings['total']}ms")
+            return {
+                "trigger": trigger,
+                "config": optimal_config,
+                "changed": changed,
+                "applied": applied,
+                "predicted_score": predicted_score,
+                "conservative": conservative,
+                "timings_ms": timings,
+                "coalesced": False
+            }
+
         except Exception as e:
             logger.error(f"Error during optimization: {e}")
+            return {"error": str(e), "trigger": trigger, "timings_ms": timings}
 
     async def _predict_optimal_config(self, metrics: SystemMetrics) -> Dict[str, Any]:
         """Use AI to predict optimal configuration"""
+        config, _ = await self._predict_best_config(metrics)
+        return config
+
+    async def _predict_best_config(self, metrics: SystemMetrics) -> Tuple[Dict[str, Any], Optional[float]]:
+        """Best scoring candidate configuration and its predicted score"""
         try:
             # Prepare input data
             input_data = self._metrics_to_tensor(metrics)
@@ -373,13 +500,14 @@ class AIOptimizer:
                 candidates.append((candidate, score.item()))
             
             # Select best candidate
-            best_config = max(candidates, key=lambda x: x[1])[0]
+            best_config, best_score = max(candidates, key=lambda x: x[1])
             
-            return best_config
+            return {key: value.item() if hasattr(value, 'item') else value
+                    for key, value in best_config.items()}, best_score
             
         except Exception as e:
             logger.error(f"Error predicting optimal config: {e}")
-            return {}
+            return {}, None
 
     def _metrics_to_tensor(self, metrics: SystemMetrics) -> torch.Tensor:
         """Convert metrics to tensor for neural network"""
@@ -443,7 +571,7 @@ class AIOptimizer:
         
         return total_score
 
-    async def _apply_configuration(self, config: Dict[str, Any]):
+    async def _apply_configuration(self, config: Dict[str, Any]) -> bool:
         """Apply configuration to Hyprland"""
         try:
             # Generate hyprland config
@@ -473,20 +601,21 @@ class AIOptimizer:
                     param = key.replace('render:', '')
                     config_lines.append(f"render:{param} = {'yes' if value else 'no'}")
             
-            # Apply via hyprctl
-            for line in config_lines:
-                cmd = ['hyprctl', 'keyword'] + line.split(' = ')
-                subprocess.run(cmd, check=True, capture_output=True)
+            # Apply via hyprctl, all keywords in one request
+            batch = ' ; '.join('keyword ' + line.replace(' = ', ' ', 1) for line in config_lines)
+            timed_run(['hyprctl', '--batch', batch], check=True, capture_output=True)
             
-            self.current_config = config
+            self.current_config.update(config)
             logger.info(f"Applied configuration: {config}")
+            return True
             
         except Exception as e:
             logger.error(f"Error applying configuration: {e}")
+            return False
 
     async def _update_model(self):
         """Update the neural network model with new data"""
-        if len(self.metrics_history) < 50:  # Need enough data
+        if len(self.metrics_history) < 50 or self.throttle.skip_training:  # Need enough data and budget
             return
         
         try:
@@ -528,6 +657,7 @@ class AIOptimizer:
             self.optimizer.step()
             
             logger.info(f"Model updated - Loss: {loss.item():.4f}")
+            MODEL_LOSS.set(loss.item(), model='performance_predictor')
             
             # Save model periodically
             if len(self.optimization_history) % 10 == 0:
@@ -604,43 +734,79 @@ class AIOptimizer:
         except Exception as e:
             logger.error(f"Error loading models: {e}")
 
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """Warm-start state: the metrics history as one row per sample"""
+        names = [f.name for f in fields(SystemMetrics)]
+        history = np.array([tuple(m.__dict__.values()) for m in self.metrics_history], dtype=np.float64)
+        return {'metrics_fields': names, 'metrics_history': history.reshape(-1, len(names))}
+
+    def restore_checkpoint(self, state: Dict[str, Any]):
+        """Refill the metrics history and the windowed means from a checkpoint"""
+        metric_fields = fields(SystemMetrics)
+        if state['metrics_fields'] != [f.name for f in metric_fields]:
+            raise ValueError("metrics fields changed since the checkpoint")
+        history = state['metrics_history'][-self.metrics_history.maxlen:]
+        columns = [(history[:, i].astype(np.int64) if f.type in (int, 'int') else history[:, i]).tolist()
+                   for i, f in enumerate(metric_fields)]
+        restored = list(map(SystemMetrics, *columns))
+        self.metrics_history.extend(restored)
+        for means in (self.recent_means, self.trigger_means):
+            for metrics in restored[-means.size:]:
+                means.add(metrics)
+        logger.info(f"Restored {len(restored)} metrics samples")
+
     async def get_optimization_report(self) -> Dict[str, Any]:
         """Generate comprehensive optimization report"""
         if not self.metrics_history:
             return {"error": "No metrics available"}
         
-        recent_metrics = list(self.metrics_history)[-20:]  # Last 20 samples
+        means = self.recent_means  # Last 20 samples
         
         report = {
             "timestamp": datetime.now().isoformat(),
             "system_health": {
-                "avg_cpu": sum(m.cpu_usage for m in recent_metrics) / len(recent_metrics),
-                "avg_memory": sum(m.memory_usage for m in recent_metrics) / len(recent_metrics),
-                "avg_gpu": sum(m.gpu_usage for m in recent_metrics) / len(recent_metrics),
-                "avg_temperature": sum(m.temperature for m in recent_metrics) / len(recent_metrics),
-                "battery_level": recent_metrics[-1].battery_level
+                "avg_cpu": means.mean('cpu_usage'),
+                "avg_memory": means.mean('memory_usage'),
+                "avg_gpu": means.mean('gpu_usage'),
+                "avg_temperature": means.mean('temperature'),
+                "battery_level": means.last('battery_level')
             },
             "optimization_stats": {
                 "total_optimizations": len(self.optimization_history),
                 "last_optimization": self.last_optimization,
-                "current_config": self.current_config
+                "current_config": self.current_config,
+                "cycles": dict(self.cycle_stats)
+            },
+            "coordination": {
+                "conservative_mode": self.conservative.get_stats(),
+                "user_activity": self.user_activity
             },
             "ai_model_status": {
                 "training_samples": len(self.metrics_history),
                 "model_loaded": True
             },
-            "recommendations": self._generate_recommendations(recent_metrics)
+            "recommendations": self._generate_recommendations()
         }
         
         return report
 
-    def _generate_recommendations(self, metrics: List[SystemMetrics]) -> List[str]:
+    @property
+    def status_summary(self) -> Dict[str, Any]:
+        """What the orchestrator's status needs, in constant time"""
+        return {
+            "samples": len(self.metrics_history),
+            "avg_cpu": self.recent_means.mean('cpu_usage'),
+            "avg_memory": self.recent_means.mean('memory_usage'),
+            "total_optimizations": len(self.optimization_history)
+        }
+
+    def _generate_recommendations(self) -> List[str]:
         """Generate optimization recommendations"""
         recommendations = []
         
-        avg_cpu = sum(m.cpu_usage for m in metrics) / len(metrics)
-        avg_memory = sum(m.memory_usage for m in metrics) / len(metrics)
-        avg_battery = sum(m.battery_level for m in metrics) / len(metrics)
+        avg_cpu = self.recent_means.mean('cpu_usage')
+        avg_memory = self.recent_means.mean('memory_usage')
+        avg_battery = self.recent_means.mean('battery_level')
         
         if avg_cpu > 80:
             recommendations.append("High CPU usage detected - consider disabling animations")
@@ -655,6 +821,7 @@ class AIOptimizer:
 
 async def main():
     """Main entry point for the AI optimizer"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     optimizer = AIOptimizer()
     
     # Start optimization loop
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Engine Checkpoints
+Warm-start snapshots of engine state: histories are written as raw numpy
+arrays behind a small JSON header, so restoring is a read and a few
+frombuffer calls. Files are replaced atomically and checked with CRC32.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'HYCK'
+VERSION = 1
+HEADER = struct.Struct('<4sHII')  # magic, version, crc32 of the rest, metadata length
+
+class CheckpointError(Exception):
+    """Snapshot is missing, corrupt or from another format version"""
+
+def encode_snapshot(state: Dict[str, Any]) -> bytes:
+    """Pack state: ndarray values as raw bytes, everything else as JSON"""
+    arrays, values, chunks, offset = {}, {}, [], 0
+    for key, value in state.items():
+        if isinstance(value, np.ndarray):
+            data = np.ascontiguousarray(value)
+            arrays[key] = {'dtype': data.dtype.str, 'shape': list(data.shape), 'offset': offset}
+            chunks.append(data.tobytes())
+            offset += data.nbytes
+        else:
+            values[key] = value
+    metadata = json.dumps({'saved_at': time.time(), 'values': values, 'arrays': arrays}).encode()
+    body = metadata + b''.join(chunks)
+    return HEADER.pack(MAGIC, VERSION, zlib.crc32(body), len(metadata)) + body
+
+def decode_snapshot(blob: bytes) -> Dict[str, Any]:
+    """Inverse of encode_snapshot; arrays are read-only views of blob"""
+    if len(blob) < HEADER.size:
+        raise CheckpointError("truncated header")
+    magic, version, crc, metadata_length = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise CheckpointError(f"unsupported format {magic!r} v{version}")
+    body = memoryview(blob)[HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise CheckpointError("checksum mismatch")
+    metadata = json.loads(bytes(body[:metadata_length]))
+    state = dict(metadata['values'])
+    data = body[metadata_length:]
+    for key, spec in metadata['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape']))
+        state[key] = np.frombuffer(data, dtype, count, spec['offset']).reshape(spec['shape'])
+    state['saved_at'] = metadata['saved_at']
+    return state
+
+def write_snapshot(path: Path, state: Dict[str, Any]) -> int:
+    """Write state to path atomically (temp file, fsync, rename); returns the size in bytes"""
+    blob = encode_snapshot(state)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return len(blob)
+
+def read_snapshot(path: Path) -> Dict[str, Any]:
+    try:
+        blob = path.read_bytes()
+    except FileNotFoundError:
+        raise CheckpointError("no snapshot")
+    return decode_snapshot(blob)
+
+class Checkpointer:
+    """Restores an engine on start, then snapshots it periodically and when it stops
+
+    The engine provides checkpoint_state() -> dict of ndarrays and JSON values,
+    restore_checkpoint(state) and a checkpoint_path.
+    """
+
+    def __init__(self, name: str, engine: Any, interval: float = 300.0, max_age: float = 7 * 24 * 3600):
+        self.name = name
+        self.engine = engine
+        self.path = Path(engine.checkpoint_path)
+        self.interval = interval
+        self.max_age = max_age  # Older snapshots describe a different system; start cold instead
+        self._lock = threading.Lock()  # Periodic writes run in an executor thread
+        self._taken = 0  # Sequence of the last state taken, so an older state never replaces a newer one
+        self._written = 0
+        self.stats = {'saves': 0, 'failed_saves': 0, 'bytes': 0, 'save_ms': 0.0,
+                      'restored': False, 'restore_ms': None, 'restored_age_s': None}
+
+    def restore(self) -> bool:
+        start = time.perf_counter()
+        try:
+            state = read_snapshot(self.path)
+            age = time.time() - state['saved_at']
+            if age > self.max_age:
+                logger.info(f"{self.name}: checkpoint is {age / 3600:.0f}h old, starting cold")
+                return False
+            self.engine.restore_checkpoint(state)
+        except CheckpointError as e:
+            logger.info(f"{self.name}: no warm start ({e})")
+            return False
+        except Exception as e:
+            logger.error(f"{self.name}: error restoring checkpoint: {e}")
+            return False
+        self.stats.update(restored=True, restore_ms=round((time.perf_counter() - start) * 1000, 2),
+                          restored_age_s=round(age))
+        logger.info(f"{self.name}: restored checkpoint in {self.stats['restore_ms']}ms")
+        return True
+
+    def _take(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        try:
+            state = self.engine.checkpoint_state()
+        except Exception as e:
+            self.stats['failed_saves'] += 1
+            logger.error(f"{self.name}: error collecting checkpoint state: {e}")
+            return None
+        self._taken += 1
+        return self._taken, state
+
+    def _write(self, taken: Tuple[int, Dict[str, Any]]) -> bool:
+        sequence, state = taken
+        with self._lock:
+            if sequence < self._written:
+                return False
+            start = time.perf_counter()
+            try:
+                self.stats['bytes'] = write_snapshot(self.path, state)
+            except Exception as e:
+                self.stats['failed_saves'] += 1
+                logger.error(f"{self.name}: error writing checkpoint: {e}")
+                return False
+            self._written = sequence
+        self.stats['saves'] += 1
+        self.stats['save_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return True
+
+    def save(self) -> bool:
+        """Snapshot now, blocking; used on shutdown"""
+        taken = self._take()
+        return taken is not None and self._write(taken)
+
+    async def run(self):
+        """Periodic snapshots; state is taken on the loop, encoding and I/O off it"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            taken = self._take()
+            if taken is not None:
+                await loop.run_in_executor(None, self._write, taken)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'path': str(self.path), **self.stats}
+
+async def run_with_checkpoints(name: str, engine: Any, run: Any,
+                               checkpointer: Optional[Checkpointer] = None):
+    """Warm-start engine, run its loop coroutine function, and snapshot it until and when the loop ends"""
+    checkpointer = checkpointer or Checkpointer(name, engine)
+    checkpointer.restore()
+    periodic = asyncio.get_event_loop().create_task(checkpointer.run(), name=f"checkpoint:{name}")
+    try:
+        await run()
+    finally:
+        periodic.cancel()
+        checkpointer.save()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Hyprland Configuration Parser
+Parses hyprland.conf into fully qualified keys (decoration:blur:enabled) with
+source locations, following `source =` includes and expanding $variables.
+Parsed files are cached by (inode, mtime, size) so only changed files are reparsed.
+"""
+
+import glob
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+# Keywords that may repeat and are not options (last component of the key)
+KEYWORDS = {
+    'monitor', 'workspace', 'exec', 'exec-once', 'execr', 'execr-once', 'exec-shutdown',
+    'env', 'envd', 'source', 'animation', 'bezier', 'submap', 'plugin', 'unbind',
+    'windowrule', 'windowrulev2', 'layerrule', 'gesture', 'permission', 'device'
+}
+
+VARIABLE_PATTERN = re.compile(r'\$([A-Za-z_][A-Za-z0-9_]*)')
+MAX_INCLUDE_DEPTH = 16
+
+FileSignature = Tuple[int, int, int]  # (inode, mtime_ns, size)
+
+@dataclass
+class ConfigEntry:
+    """A single `key = value` assignment"""
+    key: str  # Fully qualified, e.g. decoration:blur:enabled
+    value: str  # Variables expanded
+    raw_value: str
+    file: str
+    line: int
+
+@dataclass
+class ParsedFile:
+    """Statements of one file, before includes and variables are resolved"""
+    path: str
+    signature: FileSignature
+    # (kind, name, value, line) with kind in 'assign', 'variable', 'source'
+    statements: List[Tuple[str, str, str, int]] = field(default_factory=list)
+    # Variables referenced by assignments; files without variable/source statements
+    # reuse their expanded entries while these variables keep their values
+    references: Tuple[str, ...] = ()
+    leaf: bool = True
+    expanded: Optional[Tuple[Tuple[Optional[str], ...], List['ConfigEntry']]] = None
+
+@dataclass
+class HyprlandConfig:
+    """Fully resolved configuration"""
+    entries: List[ConfigEntry] = field(default_factory=list)
+    variables: Dict[str, str] = field(default_factory=dict)
+    files: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)  # Sourced files that do not exist yet
+    globs: List[str] = field(default_factory=list)  # Absolute source glob patterns
+    _last: Dict[str, ConfigEntry] = field(default_factory=dict, repr=False)
+
+    def add(self, entry: ConfigEntry):
+        self.entries.append(entry)
+        self._last[entry.key] = entry
+
+    def extend(self, entries: List[ConfigEntry]):
+        self.entries.extend(entries)
+        self._last.update((entry.key, entry) for entry in entries)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Effective (last assigned) value of a key"""
+        entry = self._last.get(key)
+        return entry.value if entry else default
+
+    def get_all(self, key: str) -> List[str]:
+        """All values of a repeatable key such as bind or exec-once"""
+        return [entry.value for entry in self.entries if entry.key == key]
+
+    def location(self, key: str) -> Optional[Tuple[str, int]]:
+        """(file, line) of the effective assignment of a key"""
+        entry = self._last.get(key)
+        return (entry.file, entry.line) if entry else None
+
+    def options(self, file: Optional[str] = None) -> Dict[str, str]:
+        """Effective value of every option (optionally only those set in one file),
+        excluding repeatable keywords"""
+        return {
+            key: entry.value for key, entry in self._last.items()
+            if not is_keyword(key) and (file is None or entry.file == file)
+        }
+
+def is_keyword(key: str) -> bool:
+    """Whether a key is a repeatable keyword (bind, exec-once, ...) rather than an option"""
+    name = key.rsplit(':', 1)[-1]
+    return name in KEYWORDS or name.startswith('bind')
+
+def strip_comment(line: str) -> str:
+    """Remove a trailing comment; `##` is an escaped literal `#`"""
+    if '#' not in line:
+        return line
+    result = []
+    i = 0
+    while i < len(line):
+        if line[i] == '#':
+            if line.startswith('##', i):
+                result.append('#')
+                i += 2
+                continue
+            break
+        result.append(line[i])
+        i += 1
+    return ''.join(result)
+
+def comment_start(line: str) -> int:
+    """Index of the `#` starting a trailing comment, or len(line) when there is none"""
+    i = line.find('#')
+    while line.startswith('##', i):
+        i = line.find('#', i + 2)
+    return i if i != -1 else len(line)
+
+def value_span(line: str) -> Tuple[int, int]:
+    """Start and end of the value in an assignment line, without surrounding
+    whitespace, a trailing comment or the braces closing a one-line section"""
+    start = line.index('=') + 1
+    while start < len(line) and line[start] in ' \t':
+        start += 1
+    text = line[:comment_start(line)].rstrip()
+    while text.endswith('}'):
+        text = text[:-1].rstrip()
+    return start, max(start, len(text))
+
+def file_signature(path: str) -> Optional[FileSignature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def parse_text(text: str) -> List[Tuple[str, str, str, int]]:
+    """Parse one file's text into statements with section-qualified keys"""
+    statements = []
+    sections: List[str] = []
+
+    for line_number, raw_line in enumerate(text.splitlines(), 1):
+        line = strip_comment(raw_line).strip()
+        if not line:
+            continue
+
+        # Section close, possibly several on one line
+        while line.startswith('}'):
+            if sections:
+                sections.pop()
+            line = line[1:].strip()
+        if not line:
+            continue
+
+        # Section open: `name {` (a `name[device] {` suffix is dropped from the key),
+        # possibly followed by statements as in `blur { enabled = true }`
+        brace = line.find('{')
+        if brace != -1 and ('=' not in line or brace < line.index('=')):
+            name = line[:brace].strip()
+            sections.append(name.split('[', 1)[0].strip())
+            line = line[brace + 1:].strip()
+            if not line:
+                continue
+
+        if '=' not in line:
+            continue
+
+        name, value = line.split('=', 1)
+        name = name.strip()
+        value = value.strip()
+
+        # One-line sections: `key = value }`
+        closes = 0
+        while value.endswith('}') and sections:
+            value = value[:-1].rstrip()
+            closes += 1
+
+        if name.startswith('$'):
+            statements.append(('variable', name[1:], value, line_number))
+        elif name == 'source' and not sections:
+            statements.append(('source', name, value, line_number))
+        else:
+            key = ':'.join(sections + [name]) if sections else name
+            statements.append(('assign', key, value, line_number))
+
+        for _ in range(closes):
+            sections.pop()
+
+    return statements
+
+def expand_variables(value: str, variables: Dict[str, str]) -> str:
+    """Expand $variables; unknown names are left as-is"""
+    if '$' not in value:
+        return value
+    return VARIABLE_PATTERN.sub(lambda m: variables.get(m.group(1), m.group(0)), value)
+
+class HyprlandConfigParser:
+    """Parser with a per-file cache keyed by (inode, mtime, size)"""
+
+    def __init__(self):
+        self._files: Dict[str, ParsedFile] = {}
+        # Main file, signatures of every file sourced (None while missing), the matches of
+        # every source glob, and the result
+        self._resolved: Optional[Tuple[str, Dict[str, Optional[FileSignature]], Dict[str, List[str]],
+                                       HyprlandConfig]] = None
+        self.stats = {'parses': 0, 'file_parses': 0, 'cache_hits': 0, 'last_parse_ms': 0.0}
+
+    def parse(self, path: Path) -> HyprlandConfig:
+        """Parse a config file and everything it sources"""
+        start = time.perf_counter()
+        self.stats['parses'] += 1
+        main = os.path.abspath(os.path.expanduser(str(path)))
+
+        # Whole result is reusable when no involved file changed, no missing source
+        # appeared and no source glob matches a different set of files
+        if self._resolved and self._resolved[0] == main:
+            _, signatures, globs, config = self._resolved
+            if (all(file_signature(p) == sig for p, sig in signatures.items())
+                    and all(sorted(glob.glob(pattern)) == matches for pattern, matches in globs.items())):
+                self.stats['cache_hits'] += 1
+                self.stats['last_parse_ms'] = (time.perf_counter() - start) * 1000
+                return config
+
+        config = HyprlandConfig()
+        signatures: Dict[str, Optional[FileSignature]] = {}
+        globs: Dict[str, List[str]] = {}
+        self._resolve(main, config, signatures, globs, [])
+        config.globs = list(globs)
+
+        self._resolved = (main, signatures, globs, config)
+        self.stats['last_parse_ms'] = (time.perf_counter() - start) * 1000
+        return config
+
+    def _load(self, path: str) -> Optional[ParsedFile]:
+        """Parsed statements for a file, reparsing only when its signature changed"""
+        signature = file_signature(path)
+        if signature is None:
+            self._files.pop(path, None)
+            return None
+
+        cached = self._files.get(path)
+        if cached and cached.signature == signature:
+            return cached
+
+        try:
+            with open(path, errors='replace') as f:
+                text = f.read()
+        except OSError as e:
+            logger.warning(f"Cannot read config file {path}: {e}")
+            return None
+
+        statements = parse_text(text)
+        parsed = ParsedFile(
+            path=path,
+            signature=signature,
+            statements=statements,
+            references=tuple(sorted({
+                name for kind, _, value, _ in statements if kind == 'assign'
+                for name in VARIABLE_PATTERN.findall(value)
+            })),
+            leaf=all(kind == 'assign' for kind, _, _, _ in statements)
+        )
+        self._files[path] = parsed
+        self.stats['file_parses'] += 1
+        return parsed
+
+    def _resolve(self, path: str, config: HyprlandConfig, signatures: Dict[str, Optional[FileSignature]],
+                 globs: Dict[str, List[str]], stack: List[str]):
+        """Apply a file's statements in order, descending into sourced files"""
+        if path in stack or len(stack) >= MAX_INCLUDE_DEPTH:
+            logger.warning(f"Skipping recursive or too deep source: {path}")
+            return
+
+        parsed = self._load(path)
+        if parsed is None:
+            signatures[path] = file_signature(path)  # Checked so the file is picked up when created
+            if path not in config.missing:
+                config.missing.append(path)
+            return
+        signatures[path] = parsed.signature
+        if path not in config.files:
+            config.files.append(path)
+
+        if parsed.leaf:
+            scope = tuple(config.variables.get(name) for name in parsed.references)
+            if parsed.expanded is None or parsed.expanded[0] != scope:
+                parsed.expanded = (scope, [
+                    ConfigEntry(key=name, value=expand_variables(value, config.variables),
+                                raw_value=value, file=path, line=line)
+                    for _, name, value, line in parsed.statements
+                ])
+            config.extend(parsed.expanded[1])
+            return
+
+        stack.append(path)
+        for kind, name, value, line in parsed.statements:
+            if kind == 'variable':
+                config.variables[name] = expand_variables(value, config.variables)
+            elif kind == 'source':
+                for include in self._expand_source(expand_variables(value, config.variables), path, globs):
+                    self._resolve(include, config, signatures, globs, stack)
+            else:
+                config.add(ConfigEntry(
+                    key=name,
+                    value=expand_variables(value, config.variables),
+                    raw_value=value,
+                    file=path,
+                    line=line
+                ))
+        stack.pop()
+
+    @staticmethod
+    def _expand_source(pattern: str, including_file: str,
+                       globs: Optional[Dict[str, List[str]]] = None) -> List[str]:
+        """Resolve a source path (~, relative to the including file, globs); globs records the matches"""
+        pattern = os.path.expanduser(pattern)
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(os.path.dirname(including_file), pattern)
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if globs is not None:
+                globs[pattern] = matches
+            return matches
+        return [os.path.normpath(pattern)]
+
+    def invalidate(self, path: Optional[Path] = None):
+        """Drop cached results for one file or for everything"""
+        if path is None:
+            self._files.clear()
+        else:
+            self._files.pop(os.path.abspath(os.path.expanduser(str(path))), None)
+        self._resolved = None
+
+def benchmark(files: int = 50, lines_per_file: int = 400, rounds: int = 20) -> Dict[str, Any]:
+    """Parse time of a generated multi-file config: cold, unchanged and one file touched"""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        main_lines = ['$mod = SUPER', '$term = kitty']
+        for i in range(files):
+            part = root / f"part{i}.conf"
+            body = []
+            for j in range(lines_per_file // 10):
+                body.append(f"section{j} {{")
+                body.extend(f"    option{k} = {k}" for k in range(4))
+                body.append("    nested {")
+                body.append(f"        enabled = {'true' if j % 2 else 'false'}  # comment")
+                body.append("    }")
+                body.append("}")
+                body.append(f"bind = $mod, {j}, exec, $term")
+            part.write_text('\n'.join(body) + '\n')
+            main_lines.append(f"source = ./part{i}.conf")
+        main = root / "hyprland.conf"
+        main.write_text('\n'.join(main_lines) + '\n')
+
+        parser = HyprlandConfigParser()
+
+        start = time.perf_counter()
+        config = parser.parse(main)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            parser.parse(main)
+        unchanged = (time.perf_counter() - start) / rounds
+
+        touched = root / "part0.conf"
+        start = time.perf_counter()
+        for i in range(rounds):
+            with open(touched, 'a') as f:
+                f.write(f"extra{i} = {i}\n")
+            parser.parse(main)
+        incremental = (time.perf_counter() - start) / rounds
+
+        return {
+            "files": files + 1,
+            "entries": len(config.entries),
+            "cold_ms": round(cold * 1000, 3),
+            "unchanged_ms": round(unchanged * 1000, 3),
+            "one_file_changed_ms": round(incremental * 1000, 3),
+            "file_parses": parser.stats['file_parses']
+        }
+
+def main():
+    """Print the resolved options of a config, or benchmark the parser"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Hyprland config parser")
+    parser.add_argument("config", nargs="?", default="~/.config/hypr/hyprland.conf")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark on a generated multi-file config")
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=400)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(json.dumps(benchmark(args.files, args.lines), indent=2))
+        return
+
+    config = HyprlandConfigParser().parse(Path(args.config))
+    print(json.dumps({
+        key: {"value": value, "location": "%s:%d" % config.location(key)}
+        for key, value in config.options().items()
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
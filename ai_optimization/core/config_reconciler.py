@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Compositor Option Reconciler
+Keeps desired and observed Hyprland option values, reads the observed state with
+`hyprctl getoption` and applies only drifted options in a single batch. Requests
+go straight to the compositor's command socket, or through hyprctl without one.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Any
+
+from .hypr_events import command_socket_path
+from .metrics_exporter import IPC_SECONDS, OPTIONS_APPLIED
+
+logger = logging.getLogger(__name__)
+
+def format_value(value: Any) -> str:
+    """Value as passed to `hyprctl keyword`"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+def normalize_value(value: Any) -> Any:
+    """Comparable form of a desired or observed value"""
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return round(float(value), 4)
+    text = str(value).strip()
+    lowered = text.lower()
+    if lowered in ('true', 'yes', 'on'):
+        return 1.0
+    if lowered in ('false', 'no', 'off'):
+        return 0.0
+    try:
+        return round(float(text), 4)
+    except ValueError:
+        return text
+
+def parse_getoption(reply: Dict[str, Any]) -> Any:
+    """Observed value from a `hyprctl -j getoption` reply"""
+    for field in ('int', 'float', 'str', 'custom'):
+        if field in reply:
+            return reply[field]
+    return None
+
+class ConfigReconciler:
+    """Desired-state reconciliation of compositor options"""
+
+    def __init__(self, observe_interval: float = 900.0, timeout: float = 5.0,
+                 socket_path: Optional[Path] = None):
+        self.desired: Dict[str, Any] = {}
+        self.observed: Dict[str, Tuple[Any, float]] = {}  # key -> (value, observed at)
+        self.rejected: Set[str] = set()  # Not applicable; skipped until desired value changes
+
+        # Observed values are trusted this long unless invalidated (e.g. config reload)
+        self.observe_interval = observe_interval
+        self.timeout = timeout
+        self.socket_path = socket_path if socket_path is not None else command_socket_path()
+
+        self.stats = {'reconciles': 0, 'compositor_calls': 0, 'keys_applied': 0, 'drifted_keys': 0}
+        self._call_times = deque(maxlen=10000)
+
+    def set_desired(self, options: Dict[str, Any], replace: bool = False):
+        """Replace the desired values of the given options; with replace, options are the
+        whole desired state and options not in it are no longer enforced"""
+        if replace:
+            for key in set(self.desired) - set(options):
+                del self.desired[key]
+                self.rejected.discard(key)
+        for key, value in options.items():
+            if key in self.desired and normalize_value(self.desired[key]) != normalize_value(value):
+                self.rejected.discard(key)
+            self.desired[key] = value
+
+    def invalidate(self, keys: Optional[List[str]] = None):
+        """Forget observations, e.g. after the config file was reloaded"""
+        if keys is None:
+            self.observed.clear()
+            self.rejected.clear()
+        else:
+            for key in keys:
+                self.observed.pop(key, None)
+
+    def drift(self) -> Dict[str, Tuple[Any, Any]]:
+        """Options whose observed value differs from the desired one: key -> (observed, desired)"""
+        drifted = {}
+        for key, desired in self.desired.items():
+            if key in self.rejected:
+                continue
+            observed = self.observed.get(key, (None, 0.0))[0]
+            if normalize_value(observed) != normalize_value(desired):
+                drifted[key] = (observed, desired)
+        return drifted
+
+    async def reconcile(self) -> List[Tuple[str, Any, Any]]:
+        """Bring the compositor to the desired state; returns (key, old, new) transitions"""
+        self.stats['reconciles'] += 1
+        now = time.time()
+
+        stale = [key for key in self.desired
+                 if key not in self.rejected and now - self.observed.get(key, (None, 0.0))[1] > self.observe_interval]
+        if stale:
+            await self.observe(stale)
+
+        drifted = self.drift()
+        if not drifted:
+            return []
+
+        self.stats['drifted_keys'] += len(drifted)
+        commands = [f"keyword {key} {format_value(desired)}" for key, (_, desired) in drifted.items()]
+        reply = await self._hyprctl(['--batch', ' ; '.join(commands)])
+        if reply is None:
+            return []
+
+        # Each successful keyword replies "ok"; otherwise read back what actually applied
+        results = [line.strip() for line in reply.splitlines() if line.strip()]
+        if results and all(result == 'ok' for result in results):
+            now = time.time()
+            for key, (_, desired) in drifted.items():
+                self.observed[key] = (desired, now)
+        else:
+            logger.warning(f"Some options were not applied: {'; '.join(r for r in results if r != 'ok')}")
+            await self.observe(list(drifted))
+        
+        transitions = []
+        for key, (observed, desired) in drifted.items():
+            if key in self.observed and normalize_value(self.observed[key][0]) == normalize_value(desired):
+                transitions.append((key, observed, desired))
+            else:
+                self.rejected.add(key)
+
+        self.stats['keys_applied'] += len(transitions)
+        OPTIONS_APPLIED.inc(len(transitions), source='adaptive_config')
+        return transitions
+
+    async def prepare(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Refresh observations ahead of a likely switch to options; returns what it would change
+
+        A following set_desired(options) + reconcile() then needs only the apply batch.
+        """
+        now = time.time()
+        stale = [key for key in options
+                 if now - self.observed.get(key, (None, 0.0))[1] > self.observe_interval / 2]
+        if stale:
+            await self.observe(stale)
+        return {key: value for key, value in options.items()
+                if normalize_value(self.observed.get(key, (None, 0.0))[0]) != normalize_value(value)}
+
+    async def apply_compiled(self, batch: str, options: Dict[str, Any], desired: Dict[str, Any]) -> bool:
+        """Send a precompiled keyword batch for options without diffing against observed state;
+        desired is the whole desired state afterwards, including options"""
+        self.set_desired(desired, replace=True)
+        reply = await self._hyprctl(['--batch', batch])
+        if reply is None:
+            return False
+
+        results = [line.strip() for line in reply.splitlines() if line.strip()]
+        now = time.time()
+        if results and all(result == 'ok' for result in results):
+            for key, value in options.items():
+                self.observed[key] = (value, now)
+            self.stats['keys_applied'] += len(options)
+            OPTIONS_APPLIED.inc(len(options), source='adaptive_config')
+            return True
+
+        # Mixed results: re-observe on the next reconcile
+        self.invalidate(list(options))
+        return False
+
+    async def observe(self, keys: List[str]):
+        """Read current values of options in one batch"""
+        reply = await self._hyprctl(['--batch', ' ; '.join(f"j/getoption {key}" for key in keys)])
+        if reply is None:
+            return
+
+        now = time.time()
+        decoder = json.JSONDecoder()
+        replies: Dict[str, Any] = {}
+        position = 0
+        while position < len(reply):
+            start = reply.find('{', position)
+            if start < 0:
+                break
+            try:
+                obj, position = decoder.raw_decode(reply, start)
+            except ValueError:
+                position = start + 1
+                continue
+            if isinstance(obj, dict) and 'option' in obj:
+                replies[obj['option']] = parse_getoption(obj)
+
+        for key in keys:
+            # Unknown options are observed as None and so count as drifted
+            self.observed[key] = (replies.get(key), now)
+
+    async def _hyprctl(self, args: List[str]) -> Optional[str]:
+        self.stats['compositor_calls'] += 1
+        self._call_times.append(time.time())
+        if self.socket_path is not None:
+            with IPC_SECONDS.time(transport='socket'):
+                reply = await self._socket_request(args)
+            if reply is not None:
+                return reply
+        try:
+            with IPC_SECONDS.time(transport='hyprctl'):
+                process = await asyncio.create_subprocess_exec(
+                    'hyprctl', *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+                )
+                stdout, _ = await asyncio.wait_for(process.communicate(), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.warning(f"hyprctl {args[0]} failed: {e}")
+            return None
+        if process.returncode != 0:
+            logger.warning(f"hyprctl {args[0]} exited with {process.returncode}")
+            return None
+        return stdout.decode(errors='replace')
+
+    async def _socket_request(self, args: List[str]) -> Optional[str]:
+        """Request over the command socket, as hyprctl would send it; saves a process spawn"""
+        if args[0] == '--batch':
+            request = '[[BATCH]]' + ';'.join(command.strip() for command in args[1].split(';'))
+        elif args[0] == '-j':
+            request = 'j/' + ' '.join(args[1:])
+        else:
+            request = ' '.join(args)
+
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(str(self.socket_path)), self.timeout
+            )
+            try:
+                writer.write(request.encode())
+                await writer.drain()
+                reply = await asyncio.wait_for(reader.read(), self.timeout)  # Closed after the reply
+            finally:
+                writer.close()
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.warning(f"Hyprland command socket failed ({e}), falling back to hyprctl")
+            self.socket_path = None
+            return None
+        return reply.decode(errors='replace')
+
+    def get_stats(self) -> Dict[str, Any]:
+        hour_ago = time.time() - 3600
+        return {
+            **self.stats,
+            "compositor_calls_last_hour": sum(1 for t in self._call_times if t >= hour_ago),
+            "transport": "socket" if self.socket_path is not None else "hyprctl",
+            "desired_options": len(self.desired),
+            "drifted_options": len(self.drift()),
+            "rejected_options": sorted(self.rejected)
+        }
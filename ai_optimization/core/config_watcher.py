@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Hyprland Configuration Watcher
+Watches the directories of hyprland.conf and every sourced file with inotify,
+debounces editor save patterns and reports which file changed and when
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import fnmatch
+import glob
+import logging
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from .config_parser import HyprlandConfigParser
+
+logger = logging.getLogger(__name__)
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+class Inotify:
+    """Minimal non-blocking inotify binding via libc"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Yield (wd, mask, name) for all pending events"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+            offset += length
+            yield wd, mask, name
+
+    def close(self):
+        os.close(self.fd)
+
+class ConfigWatcher:
+    """Debounced per-file change notifications for a Hyprland config tree"""
+
+    def __init__(self, config_file: Path, parser: HyprlandConfigParser,
+                 on_change: Callable[[str, float], Awaitable[None]],
+                 debounce: float = 0.3):
+        self.config_file = os.path.abspath(os.path.expanduser(str(config_file)))
+        self.parser = parser
+        self.on_change = on_change
+        self.debounce = debounce
+        self.max_missing_retries = 5  # File briefly absent during rename-based saves
+
+        self._inotify: Optional[Inotify] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dir_watches: Dict[int, str] = {}  # wd -> directory
+        self._files: Set[str] = set()
+        self._globs: List[str] = []  # Source patterns; a new match is a change too
+
+        # path -> timestamp of the first event of the current burst
+        self._pending: Dict[str, float] = {}
+        self._missing_retries: Dict[str, int] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        self.stats = {'events': 0, 'changes': 0, 'overflows': 0}
+
+    @property
+    def active(self) -> bool:
+        return self._inotify is not None
+
+    def start(self) -> bool:
+        """Start watching; returns False when inotify is unavailable"""
+        try:
+            self._inotify = Inotify()
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}), config changes will be polled")
+            return False
+
+        self._loop = asyncio.get_event_loop()
+        self.refresh_watches()
+        self._loop.add_reader(self._inotify.fd, self._read_events)
+        logger.info(f"Watching {len(self._files)} config files in {len(self._dir_watches)} directories")
+        return True
+
+    def stop(self):
+        """Stop watching"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._inotify is not None:
+            self._loop.remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+        self._dir_watches.clear()
+
+    def refresh_watches(self):
+        """Watch the directories of the main config and every file it sources"""
+        if self._inotify is None:
+            return
+
+        try:
+            config = self.parser.parse(Path(self.config_file))
+            # Missing sources too, so creating one is reported like an edit
+            files, self._globs = set(config.files) | set(config.missing), list(config.globs)
+        except Exception as e:
+            logger.error(f"Error parsing config for watching: {e}")
+            files, self._globs = set(), []
+        files.add(self.config_file)
+        self._files = files
+
+        # Directories rather than files, so rename-over saves are still seen; for a
+        # glob, its deepest directory without wildcards
+        wanted = {os.path.dirname(path) for path in files}
+        for pattern in self._globs:
+            directory = os.path.dirname(pattern)
+            while glob.has_magic(directory):
+                directory = os.path.dirname(directory)
+            wanted.add(directory)
+        # A missing source may be in a directory that does not exist yet either
+        wanted = {directory for directory in wanted if os.path.isdir(directory)}
+        watched = set(self._dir_watches.values())
+        for directory in wanted - watched:
+            try:
+                wd = self._inotify.add_watch(directory, WATCH_MASK)
+                self._dir_watches[wd] = directory
+            except OSError as e:
+                logger.warning(f"Cannot watch {directory}: {e}")
+        for wd, directory in list(self._dir_watches.items()):
+            if directory not in wanted:
+                self._inotify.rm_watch(wd)
+                del self._dir_watches[wd]
+
+    def _read_events(self):
+        """Collect events for watched files and (re)arm the debounce timer"""
+        now = time.time()
+        touched = False
+
+        for wd, mask, name in self._inotify.read_events():
+            self.stats['events'] += 1
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: treat every file as touched
+                self.stats['overflows'] += 1
+                for path in self._files:
+                    self._pending.setdefault(path, now)
+                touched = True
+                continue
+            if mask & IN_IGNORED:
+                self._dir_watches.pop(wd, None)
+                continue
+
+            directory = self._dir_watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if path in self._files or any(fnmatch.fnmatchcase(path, pattern) for pattern in self._globs):
+                self._pending.setdefault(path, now)
+                touched = True
+
+        if touched:
+            if self._flush_handle:
+                self._flush_handle.cancel()
+            self._flush_handle = self._loop.call_later(self.debounce, self._flush)
+
+    def _flush(self):
+        """Report each settled file once per burst"""
+        self._flush_handle = None
+        pending, self._pending = self._pending, {}
+
+        for path, timestamp in pending.items():
+            if not os.path.exists(path):
+                # Mid rename-based save; look again shortly, give up if it stays gone
+                retries = self._missing_retries.get(path, 0)
+                if retries < self.max_missing_retries:
+                    self._missing_retries[path] = retries + 1
+                    self._pending[path] = timestamp
+                else:
+                    self._missing_retries.pop(path, None)
+                    logger.info(f"Config file removed: {path}")
+                continue
+
+            self._missing_retries.pop(path, None)
+            self.stats['changes'] += 1
+            self._loop.create_task(self._notify(path, timestamp))
+
+        if self._pending:
+            self._flush_handle = self._loop.call_later(self.debounce, self._flush)
+
+    async def _notify(self, path: str, timestamp: float):
+        try:
+            await self.on_change(path, timestamp)
+        except Exception as e:
+            logger.error(f"Error handling config change in {path}: {e}")
+
+        # Includes may have been added or removed
+        self.refresh_watches()
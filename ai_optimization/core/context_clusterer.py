@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Incremental Context Clustering
+Clusters user contexts with MiniBatchKMeans, updated with partial_fit on newly
+captured contexts only, and assigns new contexts to a cluster in O(k·d)
+"""
+
+import logging
+import pickle
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+# user_contexts columns used as clustering features, in order
+FEATURE_COLUMNS = (
+    'hour_of_day', 'day_of_week', 'window_count', 'screen_brightness',
+    'system_load', 'battery_level', 'is_gaming', 'is_coding', 'is_media_consumption'
+)
+
+class IncrementalContextClusterer:
+    """MiniBatchKMeans over user contexts with persisted centroids and scaler state"""
+
+    def __init__(self, state_path: Path, n_clusters: int = 5, batch_limit: int = 5000,
+                 scaler_warmup: int = 1000):
+        self.state_path = state_path
+        self.n_clusters = n_clusters
+        self.batch_limit = batch_limit  # Rows consumed per update at most
+        # The scaler is frozen after this many contexts so the centroids' space stays fixed
+        self.scaler_warmup = scaler_warmup
+
+        self.scaler = StandardScaler()
+        self.clusterer = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3)
+        self.last_context_id = 0  # Highest user_contexts.id already learned
+        self.samples_seen = 0
+
+        # Cached for O(k·d) assignment without sklearn input validation
+        self._centers: Optional[np.ndarray] = None
+        self._mean: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None
+
+        # CPU time per update, and of one full refit for comparison
+        self.update_cpu_ms: List[float] = []
+        self.full_refit_cpu_ms: Optional[float] = None
+
+        self._load_state()
+
+    @property
+    def fitted(self) -> bool:
+        return self._centers is not None
+
+    @staticmethod
+    def features(context) -> np.ndarray:
+        """Feature vector of a UserContext"""
+        return np.array([
+            context.hour_of_day, context.day_of_week, context.window_count,
+            context.screen_brightness, context.system_load, context.battery_level,
+            float(context.is_gaming), float(context.is_coding), float(context.is_media_consumption)
+        ], dtype=float)
+
+    def _load_state(self):
+        """Restore scaler, centroids and the learned-rows cursor"""
+        try:
+            if self.state_path.exists():
+                with open(self.state_path, 'rb') as f:
+                    state = pickle.load(f)
+                self.scaler = state['scaler']
+                self.clusterer = state['clusterer']
+                self.last_context_id = state['last_context_id']
+                self.samples_seen = state['samples_seen']
+                self._refresh_cache()
+                logger.info(f"Loaded context clusters ({self.samples_seen} contexts learned)")
+        except Exception as e:
+            logger.error(f"Error loading context clusters: {e}")
+
+    def save_state(self):
+        """Persist scaler, centroids and the learned-rows cursor"""
+        try:
+            tmp_path = self.state_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({
+                    'scaler': self.scaler,
+                    'clusterer': self.clusterer,
+                    'last_context_id': self.last_context_id,
+                    'samples_seen': self.samples_seen
+                }, f)
+            tmp_path.replace(self.state_path)
+        except Exception as e:
+            logger.error(f"Error saving context clusters: {e}")
+
+    def _refresh_cache(self):
+        if hasattr(self.clusterer, 'cluster_centers_'):
+            self._centers = self.clusterer.cluster_centers_.copy()
+            self._mean = self.scaler.mean_.copy()
+            self._scale = self.scaler.scale_.copy()
+
+    def update(self, store) -> int:
+        """Learn from contexts captured since the last update; returns rows consumed"""
+        rows = store.query(f'''
+            SELECT id, {', '.join(FEATURE_COLUMNS)}
+            FROM user_contexts
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (self.last_context_id, self.batch_limit))
+
+        # The first batch must seed every centroid
+        if not rows or (not self.fitted and len(rows) < max(self.n_clusters, 10)):
+            return 0
+
+        start = time.process_time()
+        X = np.array([row[1:] for row in rows], dtype=float)
+        X = np.nan_to_num(X)
+
+        if self.samples_seen < self.scaler_warmup:
+            previous = (self.scaler.mean_.copy(), self.scaler.scale_.copy()) if self.fitted else None
+            self.scaler.partial_fit(X)
+            if previous is not None:
+                # Move the learned centroids into the updated scaling, so they keep
+                # describing the same contexts
+                mean, scale = previous
+                centers = self.clusterer.cluster_centers_ * scale + mean
+                self.clusterer.cluster_centers_ = (centers - self.scaler.mean_) / self.scaler.scale_
+        self.clusterer.partial_fit(self.scaler.transform(X))
+        self._refresh_cache()
+
+        self.last_context_id = rows[-1][0]
+        self.samples_seen += len(rows)
+        self.update_cpu_ms.append((time.process_time() - start) * 1000)
+        self.update_cpu_ms = self.update_cpu_ms[-100:]
+
+        if self.full_refit_cpu_ms is None:
+            self.full_refit_cpu_ms = self.measure_full_refit(store)
+
+        self.save_state()
+        return len(rows)
+
+    def assign(self, context) -> Optional[int]:
+        """Nearest cluster of a context, None before the first fit"""
+        if self._centers is None:
+            return None
+        x = (self.features(context) - self._mean) / self._scale
+        return int(np.argmin(((self._centers - x) ** 2).sum(axis=1)))
+
+    @staticmethod
+    def measure_full_refit(store, limit: int = 1000) -> Optional[float]:
+        """CPU time of the previous per-cycle full StandardScaler + KMeans refit"""
+        rows = store.query(f'''
+            SELECT {', '.join(FEATURE_COLUMNS)}
+            FROM user_contexts
+            ORDER BY timestamp DESC
+            LIMIT ?
+        ''', (limit,))
+
+        if len(rows) < 10:
+            return None
+
+        start = time.process_time()
+        X = StandardScaler().fit_transform(np.nan_to_num(np.array(rows, dtype=float)))
+        KMeans(n_clusters=5, random_state=42, n_init=10).fit(X)
+        return (time.process_time() - start) * 1000
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Clustering state and CPU cost per learning cycle"""
+        return {
+            "fitted": self.fitted,
+            "clusters": self.n_clusters,
+            "contexts_learned": self.samples_seen,
+            "scaler_frozen": self.samples_seen >= self.scaler_warmup,
+            "update_cpu_ms_last": self.update_cpu_ms[-1] if self.update_cpu_ms else None,
+            "update_cpu_ms_mean": (sum(self.update_cpu_ms) / len(self.update_cpu_ms)
+                                   if self.update_cpu_ms else None),
+            "full_refit_cpu_ms": self.full_refit_cpu_ms
+        }
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Context Forecaster
+First-order Markov model of activity pattern switches, conditioned on hour and
+weekday/weekend with back-off to coarser contexts, learned incrementally from
+user_contexts
+"""
+
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+class ContextForecaster:
+    """Predicts the next activity pattern the user switches to"""
+
+    def __init__(self, min_support: int = 3, max_gap: float = 600.0, batch_limit: int = 50000):
+        self.min_support = min_support  # Observations a context level needs to be used
+        self.max_gap = max_gap  # Seconds without contexts that end a session
+        self.batch_limit = batch_limit
+
+        # Switch counts per context level, most specific first:
+        # (pattern, hour, weekend), (pattern, 4-hour block), (pattern,)
+        self._levels: List[Dict[tuple, Counter]] = [defaultdict(Counter) for _ in range(3)]
+        self.last_context_id = 0
+        self._last: Optional[Tuple[str, float]] = None  # Pattern and timestamp of the last context
+        self.switches_learned = 0
+
+        self.stats = {'predictions': 0, 'backoffs': 0}
+
+    @staticmethod
+    def _keys(pattern: str, hour: int, day_of_week: int) -> Tuple[tuple, tuple, tuple]:
+        return (pattern, hour, day_of_week >= 5), (pattern, hour // 4), (pattern,)
+
+    def observe_switch(self, previous: str, pattern: str, hour: int, day_of_week: int):
+        """Count a switch from previous to pattern at the given time"""
+        for level, key in zip(self._levels, self._keys(previous, hour, day_of_week)):
+            level[key][pattern] += 1
+        self.switches_learned += 1
+
+    def update(self, store) -> int:
+        """Learn from contexts captured since the last update; returns rows consumed"""
+        rows = store.query('''
+            SELECT id, timestamp, hour_of_day, day_of_week, activity_pattern
+            FROM user_contexts
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (self.last_context_id, self.batch_limit))
+
+        for context_id, timestamp, hour, day_of_week, pattern in rows:
+            if self._last is not None:
+                previous, previous_time = self._last
+                if pattern != previous and timestamp - previous_time <= self.max_gap:
+                    self.observe_switch(previous, pattern, hour, day_of_week)
+            self._last = (pattern, timestamp)
+            self.last_context_id = context_id
+
+        return len(rows)
+
+    def predict(self, pattern: str, hour: int, day_of_week: int) -> List[Tuple[str, float]]:
+        """Next activity patterns after the current one with their probabilities"""
+        self.stats['predictions'] += 1
+        for depth, (level, key) in enumerate(zip(self._levels, self._keys(pattern, hour, day_of_week))):
+            counts = level.get(key)
+            if counts and sum(counts.values()) >= self.min_support:
+                if depth:
+                    self.stats['backoffs'] += 1
+                total = sum(counts.values())
+                return [(target, count / total) for target, count in counts.most_common()]
+        return []
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """Switch counts and read position, JSON-able"""
+        return {
+            'counts': [[depth, list(key), target, count]
+                       for depth, level in enumerate(self._levels)
+                       for key, counts in level.items() for target, count in counts.items()],
+            'last_context_id': self.last_context_id,
+            'last': list(self._last) if self._last else None,
+            'switches_learned': self.switches_learned
+        }
+
+    def restore_checkpoint(self, state: Dict[str, Any]):
+        """Continue from a checkpoint instead of replaying every context"""
+        for depth, key, target, count in state['counts']:
+            self._levels[depth][tuple(key)][target] = count
+        self.last_context_id = state['last_context_id']
+        self._last = tuple(state['last']) if state['last'] else None
+        self.switches_learned = state['switches_learned']
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "switches_learned": self.switches_learned,
+            "contexts_seen_up_to": self.last_context_id,
+            **self.stats
+        }
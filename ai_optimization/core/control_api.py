@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Orchestrator Control API
+Local Unix socket speaking JSON lines. Each request line
+{"id": ..., "command": ..., "args": {...}} gets one reply line
+{"id": ..., "ok": ..., "result": ...}; a `subscribe` request keeps the
+connection open and receives {"event": topic, "data": ...} lines.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CommandHandler = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+def default_socket_path() -> Path:
+    """Per-user control socket path"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return Path(runtime_dir) / "hyprland-ai" / "control.sock"
+    return Path("/home/sasha/hyprland-project/ai_optimization/control.sock")
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, default=str).encode() + b'\n'
+
+class ControlServer:
+    """JSON-lines request server dispatching to the orchestrator's execute_command"""
+
+    def __init__(self, handler: CommandHandler, socket_path: Optional[Path] = None):
+        self.handler = handler
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subscribers: Dict[asyncio.StreamWriter, Set[str]] = {}
+
+        # Snapshot results are returned as the same object until refreshed, so their
+        # JSON is encoded once per refresh instead of once per request
+        self._encoded: Dict[str, tuple] = {}  # command -> (result, encoded JSON)
+
+        self.stats = {'connections': 0, 'requests': 0, 'errors': 0, 'events_published': 0}
+        self._request_us = deque(maxlen=1000)
+
+    async def start(self):
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            # Left behind by a process that did not shut down cleanly
+            self.socket_path.unlink()
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Control API listening on {self.socket_path}")
+
+    async def stop(self):
+        if self._server is not None:
+            # Not waiting for open connections: stop may be requested over one of them
+            self._server.close()
+            self._server = None
+        for writer in list(self._subscribers):
+            writer.close()
+        self._subscribers.clear()
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def publish(self, topic: str, data: Any):
+        """Push an event to every connection subscribed to topic"""
+        if not self._subscribers:
+            return
+        line = _encode({"event": topic, "data": data})
+        for writer, topics in list(self._subscribers.items()):
+            if topic not in topics:
+                continue
+            if writer.is_closing():
+                self._subscribers.pop(writer, None)
+                continue
+            # Slow subscribers are dropped rather than buffered without bound
+            if writer.transport.get_write_buffer_size() > 1024 * 1024:
+                logger.warning("Dropping control API subscriber that is not reading")
+                self._subscribers.pop(writer, None)
+                writer.close()
+                continue
+            writer.write(line)
+            self.stats['events_published'] += 1
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats['connections'] += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(await self._handle_line(line, writer))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._subscribers.pop(writer, None)
+            writer.close()
+
+    async def _handle_line(self, line: bytes, writer: asyncio.StreamWriter) -> bytes:
+        start = time.perf_counter()
+        self.stats['requests'] += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            command = request['command']
+            args = request.get('args') or {}
+
+            result = await self.handler(command, args)
+            if command == 'subscribe' and isinstance(result, dict) and 'topics' in result:
+                self._subscribers[writer] = set(result['topics'])
+
+            cached = self._encoded.get(command)
+            if cached is not None and cached[0] is result:
+                encoded = cached[1]
+            else:
+                encoded = json.dumps(result, default=str)
+                self._encoded[command] = (result, encoded)
+
+            ok = not (isinstance(result, dict) and 'error' in result)
+            reply = f'{{"id": {json.dumps(request_id)}, "ok": {json.dumps(ok)}, "result": {encoded}}}\n'.encode()
+        except Exception as e:
+            self.stats['errors'] += 1
+            reply = _encode({"id": request_id, "ok": False, "result": {"error": str(e)}})
+
+        self._request_us.append((time.perf_counter() - start) * 1e6)
+        return reply
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._request_us)
+        return {
+            **self.stats,
+            "socket": str(self.socket_path),
+            "subscribers": len(self._subscribers),
+            "request_us_p50": round(latencies[len(latencies) // 2], 1) if latencies else None,
+            "request_us_max": round(latencies[-1], 1) if latencies else None
+        }
+
+class ControlClient:
+    """Blocking client for the control socket, used by the CLI"""
+
+    def __init__(self, socket_path: Optional[Path] = None, timeout: float = 5.0):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.timeout = timeout
+        self._next_id = 0
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def is_running(self) -> bool:
+        """Whether an orchestrator is serving the socket"""
+        try:
+            self._connect().close()
+            return True
+        except OSError:
+            return False
+
+    def request(self, command: str, args: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send one command and return its reply; raises OSError when not running"""
+        self._next_id += 1
+        with self._connect() as sock:
+            if timeout is not None:
+                sock.settimeout(timeout)
+            sock.sendall(_encode({"id": self._next_id, "command": command, "args": args or {}}))
+            with sock.makefile('rb') as stream:
+                line = stream.readline()
+        if not line:
+            raise ConnectionError("Orchestrator closed the connection")
+        return json.loads(line)
+
+    def subscribe(self, topics: List[str]) -> Iterator[Dict[str, Any]]:
+        """Yield the subscribe reply, then every event pushed for topics"""
+        sock = self._connect()
+        sock.settimeout(None)
+        try:
+            sock.sendall(_encode({"id": 0, "command": "subscribe", "args": {"topics": topics}}))
+            with sock.makefile('rb') as stream:
+                for line in stream:
+                    yield json.loads(line)
+        finally:
+            sock.close()
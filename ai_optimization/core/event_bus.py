@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Event Bus
+Typed publish/subscribe between the engines. Every subscription has its own
+bounded queue and consumer task, so a slow subscriber delays only itself:
+publishers wait briefly for queue space and then drop the oldest event.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from .metrics_exporter import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+EVENT_DISPATCH_SECONDS = REGISTRY.histogram(
+    'hyprland_ai_event_dispatch_seconds', 'Time from publishing an event to its handler starting', ['event'])
+EVENT_QUEUE_DEPTH = REGISTRY.gauge(
+    'hyprland_ai_event_queue_depth', 'Events waiting in a subscriber queue', ['subscriber'])
+EVENTS_DROPPED = REGISTRY.counter(
+    'hyprland_ai_events_dropped', 'Events dropped because a subscriber queue stayed full', ['subscriber'])
+
+# Events
+
+@dataclass(frozen=True)
+class Event:
+    """Base of all bus events"""
+
+@dataclass(frozen=True)
+class ContextChanged(Event):
+    """The user's activity context changed"""
+    activity: str
+    previous_activity: Optional[str]
+    context: Dict[str, Any]
+
+@dataclass(frozen=True)
+class IssueRaised(Event):
+    issue_id: str
+    category: str
+    severity: int  # IssueSeverity value, 4 is critical
+    title: str
+
+@dataclass(frozen=True)
+class IssueResolved(Event):
+    issue_id: str
+    category: str
+
+@dataclass(frozen=True)
+class OpenIssues(Event):
+    """Every issue self-healing has open, each monitoring cycle; followers that
+    missed an IssueRaised or IssueResolved (dropped under backpressure) catch up"""
+    issues: Dict[str, Tuple[int, str]]  # issue id -> (severity, title)
+
+@dataclass(frozen=True)
+class ActionApplied(Event):
+    """A healing action ran"""
+    issue_id: str
+    action_type: str
+    success: bool
+    config_changes: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass(frozen=True)
+class ConfigApplied(Event):
+    """Compositor options changed by an engine"""
+    source: str
+    changes: Dict[str, Any]
+
+Handler = Callable[[Event], Union[None, Awaitable[None]]]
+
+class Subscription:
+    """One subscriber's queue and the task feeding its handler"""
+
+    def __init__(self, bus: 'EventBus', name: str, event_types: Tuple[Type[Event], ...], handler: Handler,
+                 maxsize: int, skip_origin: Optional[str]):
+        self.bus = bus
+        self.name = name
+        self.event_types = event_types
+        self.handler = handler
+        self.skip_origin = skip_origin  # Events from this origin are not delivered (no echo to a worker)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {'delivered': 0, 'dropped': 0, 'errors': 0, 'max_depth': 0}
+
+    def accepts(self, event: Event, origin: Optional[str]) -> bool:
+        return isinstance(event, self.event_types) and (origin is None or origin != self.skip_origin)
+
+    def _enqueued(self):
+        depth = self.queue.qsize()
+        self.stats['max_depth'] = max(self.stats['max_depth'], depth)
+        EVENT_QUEUE_DEPTH.set(depth, subscriber=self.name)
+
+    def offer(self, item: Tuple[float, Event]):
+        """Enqueue without waiting, dropping the oldest event when full"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.stats['dropped'] += 1
+            EVENTS_DROPPED.inc(subscriber=self.name)
+        self.queue.put_nowait(item)
+        self._enqueued()
+
+    async def put(self, item: Tuple[float, Event], timeout: float):
+        """Enqueue, waiting up to timeout for space before dropping the oldest event"""
+        try:
+            await asyncio.wait_for(self.queue.put(item), timeout)
+            self._enqueued()
+        except asyncio.TimeoutError:
+            self.offer(item)
+
+    async def consume(self):
+        while True:
+            published_at, event = await self.queue.get()
+            EVENT_QUEUE_DEPTH.set(self.queue.qsize(), subscriber=self.name)
+            EVENT_DISPATCH_SECONDS.observe(time.monotonic() - published_at, event=type(event).__name__)
+            try:
+                result = self.handler(event)
+                if inspect.isawaitable(result):
+                    await result
+                self.stats['delivered'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Error in {self.name} handling {type(event).__name__}: {e}")
+
+class EventBus:
+    """In-process pub/sub with a bounded queue per subscription"""
+
+    def __init__(self, queue_size: int = 100, publish_timeout: float = 0.5):
+        self.queue_size = queue_size
+        self.publish_timeout = publish_timeout  # Longest a publisher waits on a full queue
+        self.subscriptions: List[Subscription] = []
+        self.sinks: List[Callable[[Event], None]] = []  # See add_sink
+        self.published: Dict[str, int] = {}
+
+    def subscribe(self, event_types: Union[Type[Event], Iterable[Type[Event]]], handler: Handler,
+                  name: str, maxsize: Optional[int] = None, skip_origin: Optional[str] = None) -> Subscription:
+        """Deliver events of the given types (and their subclasses) to handler, in order"""
+        types = (event_types,) if isinstance(event_types, type) else tuple(event_types)
+        subscription = Subscription(self, name, types, handler, maxsize or self.queue_size, skip_origin)
+        subscription.task = asyncio.get_event_loop().create_task(subscription.consume(), name=f"events:{name}")
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscriptions: Union[Subscription, Iterable[Subscription]]):
+        for subscription in [subscriptions] if isinstance(subscriptions, Subscription) else list(subscriptions):
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+                subscription.task.cancel()
+                EVENT_QUEUE_DEPTH.set(0, subscriber=subscription.name)
+
+    def add_sink(self, sink: Callable[[Event], None]):
+        """Also pass events published here (not ones received with an origin) to sink, e.g. another process"""
+        self.sinks.append(sink)
+
+    def _route(self, event: Event, origin: Optional[str]) -> List[Subscription]:
+        name = type(event).__name__
+        self.published[name] = self.published.get(name, 0) + 1
+        if origin is None:
+            for sink in self.sinks:
+                try:
+                    sink(event)
+                except Exception as e:
+                    logger.error(f"Error forwarding {name}: {e}")
+        return [s for s in self.subscriptions if s.accepts(event, origin)]
+
+    async def publish(self, event: Event, origin: Optional[str] = None):
+        """Publish, waiting briefly on full subscriber queues (backpressure)"""
+        item = (time.monotonic(), event)
+        for subscription in self._route(event, origin):
+            await subscription.put(item, self.publish_timeout)
+
+    def publish_nowait(self, event: Event, origin: Optional[str] = None):
+        """Publish from synchronous code; full queues drop their oldest event"""
+        item = (time.monotonic(), event)
+        for subscription in self._route(event, origin):
+            subscription.offer(item)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "published": dict(self.published),
+            "subscribers": {
+                s.name: {**s.stats, "depth": s.queue.qsize(), "events": [t.__name__ for t in s.event_types]}
+                for s in self.subscriptions
+            }
+        }
+
+class ConservativeMode:
+    """Follows healing on the bus; engines keep their changes conservative while it is active
+
+    Active while an issue of at least min_severity is open and for hold seconds
+    after a healing action, so its effect is not undone before it is verified.
+    """
+
+    def __init__(self, min_severity: int = 3, hold: float = 300.0):
+        self.min_severity = min_severity
+        self.hold = hold
+        self.issues: Dict[str, str] = {}  # Open issue id -> title
+        self.last_action: Optional[float] = None
+        self.activations = 0
+
+    @property
+    def active(self) -> bool:
+        return bool(self.issues) or (
+            self.last_action is not None and time.monotonic() - self.last_action < self.hold)
+
+    def _on_event(self, event: Event):
+        was_active = self.active
+        if isinstance(event, IssueRaised) and event.severity >= self.min_severity:
+            self.issues[event.issue_id] = event.title
+        elif isinstance(event, IssueResolved):
+            self.issues.pop(event.issue_id, None)
+        elif isinstance(event, OpenIssues):
+            self.issues = {issue_id: title for issue_id, (severity, title) in event.issues.items()
+                           if severity >= self.min_severity}
+        elif isinstance(event, ActionApplied):
+            self.last_action = time.monotonic()
+        if self.active and not was_active:
+            self.activations += 1
+
+    def subscribe(self, bus: EventBus, name: str) -> Subscription:
+        return bus.subscribe((IssueRaised, IssueResolved, OpenIssues, ActionApplied), self._on_event,
+                             f"{name}:conservative")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"active": self.active, "open_issues": list(self.issues.values()), "activations": self.activations}
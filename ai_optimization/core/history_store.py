@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Configuration History Store
+Compact in-memory history of configuration changes: interned keys, values and
+application names, column arrays per field, and a row cap above which the oldest
+rows are spilled to SQLite
+"""
+
+import json
+import logging
+import sys
+from array import array
+from collections import Counter, namedtuple
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ('user', 'ai', 'adaptive')
+
+# Context as stored once per capture and shared by all changes made in it
+CompactContext = namedtuple('CompactContext', [
+    'timestamp', 'hour_of_day', 'day_of_week', 'active_applications', 'workspace_layout',
+    'window_count', 'screen_brightness', 'system_load', 'battery_level', 'is_gaming',
+    'is_coding', 'is_media_consumption', 'user_activity_pattern', 'cluster_id', 'context_id'
+])
+
+HistoryRecord = namedtuple('HistoryRecord', [
+    'timestamp', 'config_key', 'old_value', 'new_value', 'change_source', 'context'
+])
+
+class _Interner:
+    """Bidirectional value <-> small int table"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self.ids: Dict[Any, int] = {}
+
+    def intern(self, value: Any, key: Any = None) -> int:
+        key = value if key is None else key
+        index = self.ids.get(key)
+        if index is None:
+            index = len(self.values)
+            self.values.append(value)
+            self.ids[key] = index
+        return index
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def size_bytes(self) -> int:
+        return (sys.getsizeof(self.values) + sys.getsizeof(self.ids)
+                + sum(sys.getsizeof(value) for value in self.values))
+
+class ConfigHistoryStore:
+    """Bounded columnar history of ConfigurationChange records"""
+
+    def __init__(self, store, max_rows: int = 5000):
+        self.store = store  # AdaptiveStore that spilled rows are written to
+        self.max_rows = max_rows  # Rows kept in memory; older rows are spilled
+
+        # Interned tables
+        self._keys = _Interner()
+        self._values = _Interner()  # keyed by (type, value) so True, 1 and 1.0 stay distinct
+        self._apps = _Interner()
+        self._strings = _Interner()  # activity patterns and workspace layouts
+
+        # Change columns
+        self._timestamps = array('d')
+        self._key_ids = array('I')
+        self._old_ids = array('I')
+        self._new_ids = array('I')
+        self._sources = array('B')
+        self._context_ids = array('I')
+        self._persisted = array('B')  # Already in config_changes
+
+        # Contexts: interned by capture timestamp, reference counted by rows; each keeps
+        # its user_contexts row id for spilled rows
+        self._contexts: Dict[int, tuple] = {}
+        self._context_by_timestamp: Dict[float, int] = {}
+        self._context_refs: Counter = Counter()
+        self._next_context_id = 0
+
+        # Counts per source: in memory, and spilled rows bucketed by (day, source)
+        # so pruning can age them out without keeping per-row data
+        self._memory_by_source: Counter = Counter()
+        self._spilled_buckets: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._timestamps) + self.spilled_rows
+
+    @property
+    def spilled_rows(self) -> int:
+        return sum(self._spilled_buckets.values())
+
+    @property
+    def memory_rows(self) -> int:
+        return len(self._timestamps)
+
+    def _intern_value(self, value: Any) -> int:
+        try:
+            return self._values.intern(value, (type(value).__name__, value))
+        except TypeError:  # Unhashable (list/dict): intern by JSON text
+            return self._values.intern(value, ('json', json.dumps(value, sort_keys=True, default=str)))
+
+    def _intern_context(self, context) -> int:
+        if context is None:
+            return 0xFFFFFFFF
+        context_id = self._context_by_timestamp.get(context.timestamp)
+        if context_id is None:
+            context_id = self._next_context_id
+            self._next_context_id += 1
+            self._context_by_timestamp[context.timestamp] = context_id
+            self._contexts[context_id] = (
+                context.timestamp, context.hour_of_day, context.day_of_week,
+                tuple(self._apps.intern(app) for app in context.active_applications),
+                self._strings.intern(context.workspace_layout), context.window_count,
+                context.screen_brightness, context.system_load, context.battery_level,
+                context.is_gaming, context.is_coding, context.is_media_consumption,
+                self._strings.intern(context.user_activity_pattern), context.cluster_id,
+                getattr(context, 'context_id', None)
+            )
+        self._context_refs[context_id] += 1
+        return context_id
+
+    def append(self, change, persisted: bool = False):
+        """Add a ConfigurationChange; persisted marks changes already in config_changes"""
+        self._timestamps.append(change.timestamp)
+        self._key_ids.append(self._keys.intern(change.config_key))
+        self._old_ids.append(self._intern_value(change.old_value))
+        self._new_ids.append(self._intern_value(change.new_value))
+        self._sources.append(SOURCES.index(change.change_source) if change.change_source in SOURCES else 0)
+        self._context_ids.append(self._intern_context(change.context))
+        self._persisted.append(1 if persisted else 0)
+        self._memory_by_source[self._sources[-1]] += 1
+
+        if len(self._timestamps) > self.max_rows:
+            self._spill(len(self._timestamps) - self.max_rows // 2)
+
+    def _context(self, context_id: int) -> Optional[CompactContext]:
+        row = self._contexts.get(context_id)
+        if row is None:
+            return None
+        (timestamp, hour, day, app_ids, layout_id, windows, brightness, load, battery,
+         gaming, coding, media, pattern_id, cluster_id, row_id) = row
+        return CompactContext(
+            timestamp, hour, day, [self._apps.values[i] for i in app_ids],
+            self._strings.values[layout_id], windows, brightness, load, battery,
+            gaming, coding, media, self._strings.values[pattern_id], cluster_id, row_id
+        )
+
+    def _record(self, i: int) -> HistoryRecord:
+        return HistoryRecord(
+            timestamp=self._timestamps[i],
+            config_key=self._keys.values[self._key_ids[i]],
+            old_value=self._values.values[self._old_ids[i]],
+            new_value=self._values.values[self._new_ids[i]],
+            change_source=SOURCES[self._sources[i]],
+            context=self._context(self._context_ids[i])
+        )
+
+    def recent(self, limit: int, source: Optional[str] = None) -> List[HistoryRecord]:
+        """Most recent in-memory changes (oldest first), optionally of one source"""
+        source_id = SOURCES.index(source) if source is not None else None
+        indices = []
+        for i in range(len(self._timestamps) - 1, -1, -1):
+            if source_id is None or self._sources[i] == source_id:
+                indices.append(i)
+                if len(indices) >= limit:
+                    break
+        return [self._record(i) for i in reversed(indices)]
+
+    def __iter__(self) -> Iterator[HistoryRecord]:
+        return (self._record(i) for i in range(len(self._timestamps)))
+
+    def count(self, source: Optional[str] = None) -> int:
+        """Number of changes, including spilled ones"""
+        if source is None:
+            return len(self)
+        source_id = SOURCES.index(source)
+        return self._memory_by_source[source_id] + sum(
+            count for (_, bucket_source), count in self._spilled_buckets.items() if bucket_source == source_id
+        )
+
+    def _drop_front(self, count: int):
+        for context_id in self._context_ids[:count]:
+            self._context_refs[context_id] -= 1
+            if self._context_refs[context_id] <= 0:
+                del self._context_refs[context_id]
+                row = self._contexts.pop(context_id, None)
+                if row is not None:
+                    self._context_by_timestamp.pop(row[0], None)
+        for source_id in self._sources[:count]:
+            self._memory_by_source[source_id] -= 1
+        for column in (self._timestamps, self._key_ids, self._old_ids, self._new_ids,
+                       self._sources, self._context_ids, self._persisted):
+            del column[:count]
+
+    def _spill(self, count: int):
+        """Write the oldest unpersisted rows to config_changes and drop them from memory"""
+        rows = []
+        for i in range(count):
+            if self._persisted[i]:
+                continue
+            record = self._record(i)
+            rows.append((
+                record.timestamp, record.config_key, record.old_value, record.new_value,
+                record.context.context_id if record.context else None, record.change_source
+            ))
+
+        try:
+            self.store.insert_config_changes(rows)
+        except Exception as e:
+            logger.error(f"Error spilling configuration history: {e}")
+
+        for i in range(count):
+            self._spilled_buckets[(int(self._timestamps[i] // 86400), self._sources[i])] += 1
+        self._drop_front(count)
+        logger.debug(f"Spilled {count} configuration history rows ({len(rows)} written)")
+
+    def prune(self, cutoff: float):
+        """Forget in-memory changes older than cutoff (the database is pruned separately)"""
+        count = 0
+        while count < len(self._timestamps) and self._timestamps[count] < cutoff:
+            count += 1
+        if count:
+            self._drop_front(count)
+        
+        cutoff_day = int(cutoff // 86400)
+        for bucket in [bucket for bucket in self._spilled_buckets if bucket[0] < cutoff_day]:
+            del self._spilled_buckets[bucket]
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the store"""
+        columns = sum(column.buffer_info()[1] * column.itemsize for column in (
+            self._timestamps, self._key_ids, self._old_ids, self._new_ids,
+            self._sources, self._context_ids, self._persisted
+        ))
+        contexts = sum(sys.getsizeof(row) + sys.getsizeof(row[3]) for row in self._contexts.values())
+        interned = sum(table.size_bytes() for table in (self._keys, self._values, self._apps, self._strings))
+        return columns + contexts + interned
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rows_in_memory": len(self._timestamps),
+            "rows_spilled": self.spilled_rows,
+            "max_rows": self.max_rows,
+            "contexts": len(self._contexts),
+            "interned_keys": len(self._keys),
+            "interned_values": len(self._values),
+            "interned_apps": len(self._apps),
+            "memory_bytes": self.memory_bytes()
+        }
+
+def benchmark(changes: int = 43200, max_rows: int = 5000) -> Dict[str, Any]:
+    """Steady-state memory of a month of per-minute adaptive changes: list vs store"""
+    import random
+    import tempfile
+    import tracemalloc
+
+    from .adaptive_config import ConfigurationChange, UserContext
+    from .adaptive_store import AdaptiveStore
+
+    rng = random.Random(42)
+    apps = ['kitty', 'firefox', 'code', 'discord', 'spotify', 'thunar', 'mpv', 'steam']
+    keys = ['decoration:blur:enabled', 'animations:enabled', 'general:gaps_in',
+            'decoration:rounding', 'misc:vfr']
+
+    def generate():
+        context = None
+        for i in range(changes):
+            if i % 3 == 0:
+                context = UserContext(
+                    timestamp=1e9 + i * 60, hour_of_day=(i // 60) % 24, day_of_week=(i // 1440) % 7,
+                    active_applications=rng.sample(apps, 4), workspace_layout='workspaces_3',
+                    window_count=rng.randint(1, 10), screen_brightness=rng.random(),
+                    system_load=rng.random() * 4, battery_level=rng.random() * 100,
+                    is_gaming=False, is_coding=True, is_media_consumption=False,
+                    user_activity_pattern='development', cluster_id=rng.randint(0, 4)
+                )
+            yield ConfigurationChange(
+                timestamp=1e9 + i * 60, config_key=rng.choice(keys),
+                old_value=rng.choice([True, False, 5, 10]), new_value=rng.choice([True, False, 5, 10]),
+                context=context, change_source='adaptive'
+            )
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    history = list(generate())
+    list_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    del history
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = AdaptiveStore(Path(tmp_dir) / "history.db")
+
+        baseline = tracemalloc.get_traced_memory()[0]
+        store = ConfigHistoryStore(db, max_rows=max_rows)
+        for change in generate():
+            store.append(change)
+        store_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        db.close()
+
+        return {
+            "changes": changes,
+            "list_bytes": list_bytes,
+            "store_bytes": store_bytes,
+            "store_estimate_bytes": store.memory_bytes(),
+            **store.get_stats()
+        }
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Hyprland Event Listener
+Reads the compositor event stream (socket2) and dispatches `EVENT>>DATA` lines
+to subscribed coroutines as they arrive
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Handlers receive the event data and the monotonic time the line was read
+EventHandler = Callable[[str, float], Awaitable[None]]
+
+def instance_socket_path(name: str) -> Optional[Path]:
+    """Path of a socket of the running instance, None outside a Hyprland session"""
+    signature = os.environ.get('HYPRLAND_INSTANCE_SIGNATURE')
+    if not signature:
+        return None
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR', f"/run/user/{os.getuid()}")
+    for base in (Path(runtime_dir) / "hypr", Path("/tmp/hypr")):  # /tmp before Hyprland 0.40
+        path = base / signature / name
+        if path.exists():
+            return path
+    return None
+
+def event_socket_path() -> Optional[Path]:
+    """Event stream socket (socket2)"""
+    return instance_socket_path(".socket2.sock")
+
+def command_socket_path() -> Optional[Path]:
+    """Request socket that hyprctl talks to"""
+    return instance_socket_path(".socket.sock")
+
+class HyprlandEventListener:
+    """Subscription-based reader of the Hyprland event socket with reconnects"""
+
+    def __init__(self, socket_path: Optional[Path] = None, reconnect_delay: float = 2.0,
+                 max_reconnect_delay: float = 60.0):
+        self.socket_path = socket_path
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+
+        self.stats = {'events': 0, 'dispatched': 0, 'handler_errors': 0, 'reconnects': 0}
+
+    @property
+    def active(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self, event: str, handler: EventHandler):
+        """Call handler(data, received_at) for every `event>>data` line"""
+        self._handlers[event].append(handler)
+
+    def start(self) -> bool:
+        """Start listening; returns False outside a Hyprland session"""
+        if self.socket_path is None:
+            self.socket_path = event_socket_path()
+        if self.socket_path is None:
+            logger.warning("Hyprland event socket not found, compositor events disabled")
+            return False
+
+        self._task = asyncio.get_event_loop().create_task(self._run())
+        logger.info(f"Listening for Hyprland events on {self.socket_path}")
+        return True
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.connected = False
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(str(self.socket_path))
+            except OSError as e:
+                logger.warning(f"Cannot connect to Hyprland event socket: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+                continue
+
+            self.connected = True
+            delay = self.reconnect_delay
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self._dispatch(line.decode(errors='replace').rstrip('\n'), time.monotonic())
+            except (OSError, asyncio.IncompleteReadError) as e:
+                logger.warning(f"Hyprland event socket error: {e}")
+            finally:
+                self.connected = False
+                writer.close()
+
+            # Compositor restarted or socket closed
+            self.stats['reconnects'] += 1
+            await asyncio.sleep(delay)
+
+    def _dispatch(self, line: str, received_at: float):
+        event, separator, data = line.partition('>>')
+        if not separator:
+            return
+        self.stats['events'] += 1
+        for handler in self._handlers.get(event, ()):
+            self.stats['dispatched'] += 1
+            asyncio.get_event_loop().create_task(self._call(handler, event, data, received_at))
+
+    async def _call(self, handler: EventHandler, event: str, data: str, received_at: float):
+        try:
+            await handler(data, received_at)
+        except Exception as e:
+            self.stats['handler_errors'] += 1
+            logger.error(f"Error handling Hyprland event {event}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "connected": self.connected,
+            "subscriptions": {event: len(handlers) for event, handlers in self._handlers.items()}
+        }
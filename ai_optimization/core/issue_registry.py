@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Issue Registry for the Self-Healing System
+Indexes active issues by (category, fingerprint) and damps issues that flap
+around their thresholds so they cannot trigger repeated healing actions
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RegistryEntry:
+    """State of one issue fingerprint"""
+    category: str
+    fingerprint: str
+    issue_id: Optional[str] = None  # Active issue, None while clear
+    raised_at: Optional[float] = None
+    cleared_at: Optional[float] = None
+    penalty: float = 0.0
+    penalty_updated: float = 0.0
+    suppressed: bool = False
+    raise_count: int = 0
+    suppressed_repeats: int = 0
+
+class IssueRegistry:
+    """O(1) issue index with minimum hold times and exponential flap damping"""
+
+    def __init__(self,
+                 min_active_hold: float = 120.0,
+                 min_clear_hold: float = 300.0,
+                 flap_penalty: float = 1000.0,
+                 suppress_limit: float = 2000.0,
+                 reuse_limit: float = 750.0,
+                 half_life: float = 900.0):
+        self.entries: Dict[Tuple[str, str], RegistryEntry] = {}
+
+        # Hold times: an issue stays raised, and a cleared issue stays quiet, at least this long
+        self.min_active_hold = min_active_hold
+        self.min_clear_hold = min_clear_hold
+
+        # Flap damping: every raise adds a penalty that decays with the half-life.
+        # Above suppress_limit new raises are suppressed until it decays below reuse_limit.
+        self.flap_penalty = flap_penalty
+        self.suppress_limit = suppress_limit
+        self.reuse_limit = reuse_limit
+        self.decay_rate = math.log(2) / half_life
+
+    def _entry(self, category: str, fingerprint: str) -> RegistryEntry:
+        key = (category, fingerprint)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = RegistryEntry(category=category, fingerprint=fingerprint)
+            self.entries[key] = entry
+        return entry
+
+    def _decay(self, entry: RegistryEntry, now: float):
+        """Apply exponential decay to the flap penalty"""
+        if entry.penalty:
+            entry.penalty *= math.exp(-self.decay_rate * (now - entry.penalty_updated))
+        entry.penalty_updated = now
+
+        if entry.suppressed and entry.penalty < self.reuse_limit:
+            entry.suppressed = False
+            logger.info(f"Issue {entry.category}/{entry.fingerprint} no longer suppressed")
+
+    def get_active(self, category: str, fingerprint: str) -> Optional[str]:
+        """Active issue id for a fingerprint, if any"""
+        entry = self.entries.get((category, fingerprint))
+        return entry.issue_id if entry else None
+
+    def should_raise(self, category: str, fingerprint: str, now: Optional[float] = None) -> bool:
+        """Whether a newly detected issue should be raised, counting suppressed repeats"""
+        now = now if now is not None else time.time()
+        entry = self._entry(category, fingerprint)
+
+        # Already active: an ongoing issue, not a repeat
+        if entry.issue_id is not None:
+            return False
+
+        self._decay(entry, now)
+        quiet_too_short = entry.cleared_at is not None and now - entry.cleared_at < self.min_clear_hold
+        if entry.suppressed or quiet_too_short:
+            entry.suppressed_repeats += 1
+            return False
+
+        return True
+
+    def register(self, category: str, fingerprint: str, issue_id: str, now: Optional[float] = None):
+        """Record a raised issue and charge its flap penalty"""
+        now = now if now is not None else time.time()
+        entry = self._entry(category, fingerprint)
+
+        self._decay(entry, now)
+        entry.issue_id = issue_id
+        entry.raised_at = now
+        entry.raise_count += 1
+        entry.penalty += self.flap_penalty
+
+        if not entry.suppressed and entry.penalty >= self.suppress_limit:
+            entry.suppressed = True
+            logger.warning(f"Issue {category}/{fingerprint} is flapping, suppressing repeats "
+                           f"(penalty {entry.penalty:.0f})")
+
+    def can_clear(self, category: str, fingerprint: str, now: Optional[float] = None) -> bool:
+        """Whether an active issue has been held long enough to clear"""
+        now = now if now is not None else time.time()
+        entry = self.entries.get((category, fingerprint))
+        if entry is None or entry.raised_at is None:
+            return True
+        return now - entry.raised_at >= self.min_active_hold
+
+    def clear(self, category: str, fingerprint: str, now: Optional[float] = None):
+        """Mark a fingerprint as clear"""
+        now = now if now is not None else time.time()
+        entry = self._entry(category, fingerprint)
+        entry.issue_id = None
+        entry.cleared_at = now
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Raise and suppression counts per fingerprint"""
+        now = time.time()
+        for entry in self.entries.values():
+            self._decay(entry, now)
+
+        return {
+            "tracked_fingerprints": len(self.entries),
+            "suppressed_repeats": sum(entry.suppressed_repeats for entry in self.entries.values()),
+            "fingerprints": {
+                f"{entry.category}/{entry.fingerprint}": {
+                    "active": entry.issue_id is not None,
+                    "raises": entry.raise_count,
+                    "suppressed_repeats": entry.suppressed_repeats,
+                    "suppressed": entry.suppressed,
+                    "penalty": round(entry.penalty, 1)
+                }
+                for entry in self.entries.values()
+            }
+        }
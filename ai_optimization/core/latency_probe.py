@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Network Latency Probes
+Measures round-trip times to a configurable set of targets with non-blocking
+TCP-connect and UDP probes, independently of the healing loop cadence
+"""
+
+import asyncio
+import json
+import logging
+import socket
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the RTT histogram buckets in milliseconds (last bucket is +Inf)
+RTT_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Minimal DNS query for the root NS records, answered by any resolver
+DNS_PROBE_PAYLOAD = struct.pack('>HHHHHH', 0x4859, 0x0100, 1, 0, 0, 0) + b'\x00' + struct.pack('>HH', 2, 1)
+
+@dataclass
+class ProbeTarget:
+    """A host to probe"""
+    name: str
+    host: str
+    port: int
+    protocol: str = 'tcp'  # 'tcp' connect or 'udp' request/response
+    payload: bytes = DNS_PROBE_PAYLOAD  # UDP only
+
+@dataclass
+class TargetStats:
+    """RTT histogram and loss accounting for one target"""
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * (len(RTT_BUCKETS_MS) + 1))
+    sent: int = 0
+    received: int = 0
+    recent: deque = field(default_factory=lambda: deque(maxlen=30))  # RTT in ms or None when lost
+    last_error: Optional[str] = None
+
+    def record(self, rtt_ms: Optional[float]):
+        self.sent += 1
+        self.recent.append(rtt_ms)
+        if rtt_ms is None:
+            return
+
+        self.received += 1
+        for i, bound in enumerate(RTT_BUCKETS_MS):
+            if rtt_ms <= bound:
+                self.bucket_counts[i] += 1
+                return
+        self.bucket_counts[-1] += 1
+
+    @property
+    def loss_rate(self) -> Optional[float]:
+        """Loss rate over the recent window"""
+        if not self.recent:
+            return None
+        return sum(1 for rtt in self.recent if rtt is None) / len(self.recent)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """RTT percentile over the recent successful probes"""
+        rtts = sorted(rtt for rtt in self.recent if rtt is not None)
+        if not rtts:
+            return None
+        return rtts[min(int(q * len(rtts)), len(rtts) - 1)]
+
+class _UDPProbeProtocol(asyncio.DatagramProtocol):
+    """Resolves a future on the first datagram received"""
+
+    def __init__(self, response: asyncio.Future):
+        self.response = response
+
+    def datagram_received(self, data, addr):
+        if not self.response.done():
+            self.response.set_result(time.perf_counter())
+
+    def error_received(self, exc):
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+class LatencyProbe:
+    """Concurrent RTT probes with per-target histograms and loss rates"""
+
+    def __init__(self, targets: Optional[List[ProbeTarget]] = None,
+                 interval: float = 10.0, timeout: float = 1.0):
+        self.targets = targets if targets is not None else self.default_targets()
+        self.interval = interval
+        self.timeout = timeout
+        self.stats: Dict[str, TargetStats] = {target.name: TargetStats() for target in self.targets}
+        self.running = False
+        self.paused = False  # Skips probing while the daemon is over its resource budget
+        self.last_probe: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, entries: Optional[List[Dict[str, Any]]], **kwargs) -> 'LatencyProbe':
+        """Build a probe from a list of {'name', 'host', 'port', 'protocol'} dicts"""
+        if not entries:
+            return cls(**kwargs)
+        return cls(targets=[
+            ProbeTarget(
+                name=entry.get('name', f"{entry['host']}:{entry['port']}"),
+                host=entry['host'],
+                port=int(entry['port']),
+                protocol=entry.get('protocol', 'tcp')
+            )
+            for entry in entries
+        ], **kwargs)
+
+    @staticmethod
+    def default_targets() -> List[ProbeTarget]:
+        """Default gateway and the first configured DNS resolver"""
+        targets = []
+
+        gateway = LatencyProbe._read_default_gateway()
+        if gateway:
+            targets.append(ProbeTarget(name='gateway', host=gateway, port=53, protocol='tcp'))
+
+        resolver = LatencyProbe._read_resolver()
+        if resolver:
+            targets.append(ProbeTarget(name='dns', host=resolver, port=53, protocol='udp'))
+
+        return targets
+
+    @staticmethod
+    def _read_default_gateway() -> Optional[str]:
+        """Default IPv4 gateway from /proc/net/route"""
+        try:
+            with open('/proc/net/route') as f:
+                for line in f.readlines()[1:]:
+                    fields = line.split()
+                    if len(fields) > 2 and fields[1] == '00000000':
+                        return socket.inet_ntoa(struct.pack('<L', int(fields[2], 16)))
+        except Exception:
+            pass
+        return None
+
+    @staticmethod
+    def _read_resolver() -> Optional[str]:
+        """First nameserver from /etc/resolv.conf"""
+        try:
+            with open('/etc/resolv.conf') as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 2 and fields[0] == 'nameserver':
+                        return fields[1]
+        except Exception:
+            pass
+        return None
+
+    async def start(self):
+        """Probe all targets every interval until stopped"""
+        self.running = True
+        if not self.targets:
+            logger.warning("No latency probe targets configured")
+            return
+
+        while self.running:
+            try:
+                if not self.paused:
+                    await self.probe_all()
+            except Exception as e:
+                logger.error(f"Error probing latency: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stop(self):
+        """Stop probing"""
+        self.running = False
+
+    async def probe_all(self) -> Dict[str, Optional[float]]:
+        """Probe every target concurrently and record the results"""
+        results = await asyncio.gather(*(self.probe(target) for target in self.targets))
+        self.last_probe = time.time()
+        return {target.name: rtt for target, rtt in zip(self.targets, results)}
+
+    async def probe(self, target: ProbeTarget) -> Optional[float]:
+        """Probe a single target; returns the RTT in ms or None when lost"""
+        stats = self.stats.setdefault(target.name, TargetStats())
+        try:
+            if target.protocol == 'udp':
+                rtt = await self._probe_udp(target)
+            else:
+                rtt = await self._probe_tcp(target)
+            stats.last_error = None
+        except (asyncio.TimeoutError, OSError) as e:
+            rtt = None
+            stats.last_error = type(e).__name__
+
+        stats.record(rtt)
+        return rtt
+
+    async def _probe_tcp(self, target: ProbeTarget) -> float:
+        """Time a TCP handshake; a refused connection still proves the host answered"""
+        start = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(target.host, target.port), self.timeout
+            )
+        except ConnectionRefusedError:
+            return (time.perf_counter() - start) * 1000
+
+        rtt = (time.perf_counter() - start) * 1000
+        writer.close()
+        return rtt
+
+    async def _probe_udp(self, target: ProbeTarget) -> float:
+        """Time a UDP request until the first response datagram"""
+        loop = asyncio.get_running_loop()
+        response = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UDPProbeProtocol(response), remote_addr=(target.host, target.port)
+        )
+        try:
+            start = time.perf_counter()
+            transport.sendto(target.payload)
+            received = await asyncio.wait_for(response, self.timeout)
+            return (received - start) * 1000
+        finally:
+            transport.close()
+
+    def get_latency(self) -> Optional[float]:
+        """Median recent RTT of the first reachable target, None when offline"""
+        for target in self.targets:
+            median = self.stats[target.name].percentile(0.5)
+            if median is not None:
+                return median
+        return None
+
+    def get_loss_rate(self) -> Optional[float]:
+        """Recent loss rate across all targets, None before the first probe"""
+        rates = [stats.loss_rate for stats in self.stats.values() if stats.loss_rate is not None]
+        return sum(rates) / len(rates) if rates else None
+
+    def get_report(self) -> Dict[str, Any]:
+        """Per-target RTT histograms and loss rates"""
+        return {
+            "last_probe": self.last_probe,
+            "targets": {
+                target.name: {
+                    "address": f"{target.host}:{target.port}/{target.protocol}",
+                    "sent": self.stats[target.name].sent,
+                    "received": self.stats[target.name].received,
+                    "loss_rate": self.stats[target.name].loss_rate,
+                    "p50_ms": self.stats[target.name].percentile(0.5),
+                    "p95_ms": self.stats[target.name].percentile(0.95),
+                    "histogram_ms": dict(zip(
+                        [str(bound) for bound in RTT_BUCKETS_MS] + ['+Inf'],
+                        self.stats[target.name].bucket_counts
+                    )),
+                    "last_error": self.stats[target.name].last_error
+                }
+                for target in self.targets
+            }
+        }
+
+class _UDPEchoProtocol(asyncio.DatagramProtocol):
+    """Echoes every datagram back to its sender"""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(data, addr)
+
+class EchoServer:
+    """Local TCP/UDP echo service standing in for real targets in tests"""
+
+    def __init__(self, host: str = '127.0.0.1'):
+        self.host = host
+        self.port: Optional[int] = None
+        self._tcp_server: Optional[asyncio.AbstractServer] = None
+        self._udp_transport: Optional[asyncio.DatagramTransport] = None
+
+    async def start(self) -> int:
+        """Start TCP and UDP echo on the same ephemeral port"""
+        loop = asyncio.get_running_loop()
+        self._udp_transport, _ = await loop.create_datagram_endpoint(
+            _UDPEchoProtocol, local_addr=(self.host, 0)
+        )
+        self.port = self._udp_transport.get_extra_info('sockname')[1]
+        self._tcp_server = await asyncio.start_server(self._handle_tcp, self.host, self.port)
+        return self.port
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while data := await reader.read(1024):
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    def targets(self) -> List[ProbeTarget]:
+        """Probe targets pointing at this server"""
+        return [
+            ProbeTarget(name='echo_tcp', host=self.host, port=self.port, protocol='tcp'),
+            ProbeTarget(name='echo_udp', host=self.host, port=self.port, protocol='udp', payload=b'ping')
+        ]
+
+    async def stop(self):
+        if self._udp_transport:
+            self._udp_transport.close()
+        if self._tcp_server:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+
+async def main():
+    """Probe the configured targets (or a local echo server) once and print the report"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Network latency probes")
+    parser.add_argument("--targets", help="JSON file with a list of {name, host, port, protocol}")
+    parser.add_argument("--echo", action="store_true", help="Probe a local echo server instead")
+    parser.add_argument("--count", type=int, default=5, help="Probe rounds")
+    args = parser.parse_args()
+
+    echo = None
+    if args.echo:
+        echo = EchoServer()
+        await echo.start()
+        probe = LatencyProbe(targets=echo.targets())
+    elif args.targets:
+        with open(Path(args.targets)) as f:
+            probe = LatencyProbe.from_config(json.load(f))
+    else:
+        probe = LatencyProbe()
+
+    for _ in range(args.count):
+        await probe.probe_all()
+
+    print(json.dumps(probe.get_report(), indent=2))
+
+    if echo:
+        await echo.stop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Streaming Log Ingestion for the Self-Healing System
+Follows the kernel ring buffer and the user journal incrementally and counts
+GPU resets, display errors, compositor crashes and audio xruns in sliding windows
+"""
+
+import asyncio
+import errno
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+# Sub-pattern name -> (category, regex). Order is precedence when a line matches several.
+LOG_PATTERNS: List[Tuple[str, str, str]] = [
+    ('nvidia_xid', 'gpu_hang', r'NVRM: Xid \(|NVRM: GPU at \S+ has fallen off the bus'),
+    ('amdgpu_reset', 'gpu_hang',
+     r'amdgpu \S+: .*(?:ring \S+ timeout|GPU reset(?: begin| succeeded)?|GPU recovery|GPU hang)'),
+    ('i915_hang', 'gpu_hang', r'i915 \S+: .*(?:GPU HANG|Resetting (?:chip|rcs0|bcs0|vcs0|vecs0))'),
+    ('drm_flip_timeout', 'display_corruption',
+     r'\[drm[^*]*\*ERROR\* .*(?:flip_done timed out|pageflip|[Uu]nderrun)'),
+    ('hyprland_coredump', 'frequent_crashes',
+     r'Process \d+ \((?:Hyprland|\.Hyprland-wrapp)\) of user \d+ (?:dumped core|terminated abnormally)'),
+    ('hyprland_segfault', 'frequent_crashes', r'\b(?:Hyprland|\.Hyprland-wrapp)\[\d+\]: segfault at'),
+    ('pipewire_xrun', 'audio_glitches', r'(?:pipewire|wireplumber|spa\.alsa|pw\.node)\S*.*\b[Xx][Rr]un'),
+    ('fs_error', 'fs_errors', r'(?:EXT4-fs error|BTRFS (?:error|critical)|XFS \(\S+\): .*error|I/O error, dev)'),
+]
+
+CATEGORIES = sorted({category for _, category, _ in LOG_PATTERNS})
+
+class SlidingWindowCounter:
+    """Event timestamps for one category, bounded to the longest window of interest"""
+
+    def __init__(self, max_window: float, max_events: int = 10000):
+        self.max_window = max_window
+        self.events = deque(maxlen=max_events)
+        self.total = 0
+
+    def add(self, timestamp: float):
+        self.events.append(timestamp)
+        self.total += 1
+        self._expire(timestamp)
+
+    def count(self, window: float, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        self._expire(now)
+        cutoff = now - window
+        count = 0
+        for timestamp in reversed(self.events):
+            if timestamp < cutoff:
+                break
+            count += 1
+        return count
+
+    def _expire(self, now: float):
+        cutoff = now - self.max_window
+        while self.events and self.events[0] < cutoff:
+            self.events.popleft()
+
+class LogIngestor:
+    """Incremental kernel/journal log follower with per-category sliding window counters"""
+
+    KMSG_PATH = '/dev/kmsg'
+    BOOT_ID_PATH = '/proc/sys/kernel/random/boot_id'
+    STAT_PATH = '/proc/stat'
+
+    def __init__(self, state_path: Path, max_window: float = 3600.0):
+        self.state_path = state_path
+        self.counters_path = state_path.with_name('log_counters.json')
+
+        # One alternation with a named group per sub-pattern, matched once per line
+        self.pattern = re.compile('|'.join(f'(?P<{name}>{regex})' for name, _, regex in LOG_PATTERNS))
+        self.pattern_categories = {name: category for name, category, _ in LOG_PATTERNS}
+
+        self.counters = {category: SlidingWindowCounter(max_window) for category in CATEGORIES}
+        self.pattern_hits = {name: 0 for name, _, _ in LOG_PATTERNS}
+        self.lines_processed = 0
+
+        # Cursors so a restart never re-reads history; kmsg sequence numbers restart on
+        # every boot, so the kmsg cursor is only valid for the boot it was taken in
+        self.boot_id = self._read_boot_id()
+        self.boot_time = self._read_boot_time()
+        self.cursors: Dict[str, Any] = {'kmsg_seq': None, 'kmsg_boot_id': None, 'journal': None}
+        self.state_flush_interval = 10.0  # seconds
+        self._last_flush = 0.0
+        self._load_state()
+
+        self.running = False
+        self._journal_process: Optional[asyncio.subprocess.Process] = None
+        self._kmsg_fd: Optional[int] = None
+
+    def _read_boot_id(self) -> Optional[str]:
+        try:
+            with open(self.BOOT_ID_PATH) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _read_boot_time(self) -> Optional[float]:
+        """Wall-clock time of boot, to date kmsg records from their monotonic timestamp"""
+        try:
+            with open(self.STAT_PATH) as f:
+                for line in f:
+                    if line.startswith('btime '):
+                        return float(line.split()[1])
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    def _load_state(self):
+        """Load persisted cursors"""
+        try:
+            if self.state_path.exists():
+                with open(self.state_path) as f:
+                    self.cursors.update(json.load(f))
+        except Exception as e:
+            logger.error(f"Error loading log cursors: {e}")
+
+        # A cursor from another boot would drop every record until the new sequence caught up
+        if self.cursors.get('kmsg_boot_id') != self.boot_id:
+            self.cursors['kmsg_seq'] = None
+            self.cursors['kmsg_boot_id'] = self.boot_id
+
+    def flush_state(self, force: bool = False):
+        """Persist cursors and a counter snapshot, at most once per flush interval"""
+        now = time.time()
+        if not force and now - self._last_flush < self.state_flush_interval:
+            return
+        self._last_flush = now
+
+        try:
+            tmp_path = self.state_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(self.cursors, f)
+            os.replace(tmp_path, self.state_path)
+
+            tmp_path = self.counters_path.with_suffix('.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump({'timestamp': now, 'counts_1h': self.get_counters(3600, now)}, f)
+            os.replace(tmp_path, self.counters_path)
+        except Exception as e:
+            logger.error(f"Error saving log cursors: {e}")
+
+    def ingest_line(self, message: str, timestamp: Optional[float] = None) -> Optional[str]:
+        """Match a single log message and count it; returns the matched category"""
+        self.lines_processed += 1
+
+        match = self.pattern.search(message)
+        if match is None:
+            return None
+
+        name = match.lastgroup
+        category = self.pattern_categories[name]
+        self.pattern_hits[name] += 1
+        self.counters[category].add(timestamp if timestamp is not None else time.time())
+        return category
+
+    def ingest_kmsg_record(self, record: str, timestamp: Optional[float] = None) -> Optional[str]:
+        """Parse a /dev/kmsg record ('prio,seq,usec,flags;message') and ingest it"""
+        header, _, message = record.partition(';')
+        fields = header.split(',')
+        if len(fields) >= 2 and fields[1].isdigit():
+            seq = int(fields[1])
+            last_seq = self.cursors.get('kmsg_seq')
+            if last_seq is not None and seq <= last_seq:
+                return None
+            self.cursors['kmsg_seq'] = seq
+            # Date the record by when the kernel logged it, so records read late (after a
+            # restart in the same boot) are not counted as happening now. The monotonic
+            # clock stops during suspend, which only makes such records look older.
+            if timestamp is None and self.boot_time is not None and len(fields) >= 3 and fields[2].isdigit():
+                timestamp = self.boot_time + int(fields[2]) / 1e6
+        else:
+            message = record
+
+        # Continuation lines start with a space and belong to the previous record
+        return self.ingest_line(message.split('\n', 1)[0], timestamp)
+
+    def replay_file(self, path: Path, timestamp: Optional[float] = None) -> int:
+        """Replay a captured log file (kmsg records or plain journal lines)"""
+        processed = 0
+        with open(path, errors='replace') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                if ';' in line and line.split(';', 1)[0].count(',') >= 2:
+                    self.ingest_kmsg_record(line, timestamp)
+                else:
+                    self.ingest_line(line, timestamp)
+                processed += 1
+        return processed
+
+    def count(self, category: str, window: float, now: Optional[float] = None) -> int:
+        """Number of events of a category within the window"""
+        counter = self.counters.get(category)
+        return counter.count(window, now) if counter else 0
+
+    def get_counters(self, window: float, now: Optional[float] = None) -> Dict[str, int]:
+        """Counts of every category within the window"""
+        return {category: self.count(category, window, now) for category in CATEGORIES}
+
+    async def start(self):
+        """Follow the kernel log and the user journal until stopped"""
+        self.running = True
+        await asyncio.gather(self._follow_kmsg(), self._follow_journal(), return_exceptions=True)
+
+    def stop(self):
+        """Stop following and persist cursors"""
+        self.running = False
+
+        if self._kmsg_fd is not None:
+            try:
+                asyncio.get_event_loop().remove_reader(self._kmsg_fd)
+            except Exception:
+                pass
+            os.close(self._kmsg_fd)
+            self._kmsg_fd = None
+
+        if self._journal_process and self._journal_process.returncode is None:
+            self._journal_process.terminate()
+
+        self.flush_state(force=True)
+
+    async def _follow_kmsg(self):
+        """Read /dev/kmsg records as they arrive, without polling"""
+        try:
+            fd = os.open(self.KMSG_PATH, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as e:
+            logger.warning(f"Kernel log not readable ({e}), kernel events will not be detected")
+            return
+
+        # First run: start at the end of the ring buffer instead of replaying boot history
+        if self.cursors.get('kmsg_seq') is None:
+            os.lseek(fd, 0, os.SEEK_END)
+
+        self._kmsg_fd = fd
+        loop = asyncio.get_event_loop()
+        loop.add_reader(fd, self._read_kmsg_records)
+
+        while self.running and self._kmsg_fd is not None:
+            await asyncio.sleep(self.state_flush_interval)
+            self.flush_state()
+
+    def _read_kmsg_records(self):
+        """Drain all pending kmsg records (one record per read)"""
+        while self._kmsg_fd is not None:
+            try:
+                data = os.read(self._kmsg_fd, 8192)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if e.errno == errno.EPIPE:
+                    continue  # Records were overwritten before we read them
+                logger.error(f"Error reading kernel log: {e}")
+                return
+            if not data:
+                return
+            self.ingest_kmsg_record(data.decode('utf-8', errors='replace'))
+
+    async def _follow_journal(self):
+        """Follow the user journal from the saved cursor"""
+        args = ['journalctl', '--user', '--follow', '--output=json',
+                '--output-fields=MESSAGE,__CURSOR,__REALTIME_TIMESTAMP']
+        if self.cursors.get('journal'):
+            args.append(f"--after-cursor={self.cursors['journal']}")
+        else:
+            args.append('--lines=0')
+
+        try:
+            self._journal_process = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+        except (FileNotFoundError, PermissionError) as e:
+            logger.warning(f"journalctl not available ({e}), journal events will not be detected")
+            return
+
+        while self.running:
+            line = await self._journal_process.stdout.readline()
+            if not line:
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+
+            message = entry.get('MESSAGE')
+            if isinstance(message, str):
+                timestamp = int(entry.get('__REALTIME_TIMESTAMP', 0)) / 1e6 or None
+                self.ingest_line(message, timestamp)
+            self.cursors['journal'] = entry.get('__CURSOR', self.cursors['journal'])
+            self.flush_state()
+
+def main():
+    """Replay log files and report counters and throughput"""
+    import argparse
+    import sys
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Replay captured logs through the log ingestor")
+    parser.add_argument("files", nargs="+", help="kmsg or journal text captures")
+    parser.add_argument("--expect", help="JSON file with the expected lines and counts; exit 1 on a mismatch")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ingestor = LogIngestor(Path(tmp_dir) / "log_cursor.json")
+
+        start = time.perf_counter()
+        lines = sum(ingestor.replay_file(Path(path)) for path in args.files)
+        elapsed = time.perf_counter() - start
+
+        # Totals rather than windowed counts: kmsg records are dated relative to this boot
+        counts = {category: counter.total for category, counter in ingestor.counters.items()}
+        print(json.dumps({
+            "lines": lines,
+            "seconds": round(elapsed, 4),
+            "lines_per_second": round(lines / elapsed) if elapsed > 0 else None,
+            "counts": counts,
+            "pattern_hits": ingestor.pattern_hits
+        }, indent=2))
+
+    if args.expect:
+        with open(args.expect) as f:
+            expected = json.load(f)
+        actual = {"lines": lines, "counts": counts}
+        mismatches = [f"{key}: expected {value}, got {actual[key]}" for key, value in expected.items()
+                      if key in actual and actual[key] != value]
+        for mismatch in mismatches:
+            print(f"MISMATCH {mismatch}", file=sys.stderr)
+        sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Log Pipeline
+Records from every thread are put on a queue and handled by one background
+listener: size-capped, rotating JSON-lines files, the console, and a ring
+of recent records for the control API. Logging call sites never touch disk.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONSOLE_FORMAT = '%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2, 'G': 1024 ** 3, 'GB': 1024 ** 3}
+
+def parse_size(value: Any) -> int:
+    """Bytes from a size such as 100MB, 512K or a plain number"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+@dataclass
+class LogSettings:
+    """Logging settings, from the "system" section of settings.json"""
+    log_level: str = 'INFO'
+    max_log_size: int = 100 * 1024 ** 2  # Bytes for a log file and its backups together
+    log_backups: int = 3
+    log_ring_size: int = 1000  # Recent records kept for the control API
+    log_queue_size: int = 10000  # Records waiting for the listener; more are dropped, never waited on
+
+    @classmethod
+    def from_settings(cls, path: Path) -> 'LogSettings':
+        """The "system" section of settings.json; defaults for anything missing"""
+        try:
+            with open(path) as f:
+                section = json.load(f).get('system', {})
+            settings = cls(**{f.name: section[f.name] for f in fields(cls) if f.name in section})
+            settings.max_log_size = parse_size(settings.max_log_size)
+            settings.log_backups, settings.log_ring_size, settings.log_queue_size = (
+                int(settings.log_backups), int(settings.log_ring_size), int(settings.log_queue_size))
+            if not isinstance(logging.getLevelName(settings.log_level.upper()), int):
+                raise ValueError(f"unknown log level {settings.log_level}")
+            return settings
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logger.warning(f"Invalid log settings in {path}, using defaults: {e}")
+            return cls()
+
+def record_to_dict(record: logging.LogRecord) -> Dict[str, Any]:
+    entry = {
+        'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+        'level': record.levelname,
+        'logger': record.name,
+        'process': record.processName,
+        'message': record.getMessage()
+    }
+    if record.exc_text:
+        entry['exception'] = record.exc_text
+    return entry
+
+def format_log_entry(entry: Dict[str, Any]) -> str:
+    """A record dict as console text"""
+    text = f"{entry['time']} - {entry['process']} - {entry['logger']} - {entry['level']} - {entry['message']}"
+    return text + ('\n' + entry['exception'] if 'exception' in entry else '')
+
+def format_log_line(line: str) -> str:
+    """A JSON log line as console text; other lines are returned unchanged"""
+    try:
+        return format_log_entry(json.loads(line))
+    except (ValueError, KeyError, TypeError):
+        return line.rstrip('\n')
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record_to_dict(record), default=str)
+
+class RecordRing(logging.Handler):
+    """The last records as dicts, for the control API"""
+
+    def __init__(self, size: int):
+        super().__init__()
+        self.records = deque(maxlen=size)
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record_to_dict(record))
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records for the listener; drops them when the queue is full instead of blocking"""
+
+    def __init__(self, log_queue: queue.SimpleQueue, limit: int):
+        super().__init__(log_queue)
+        self.limit = limit
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback here, where args and exc_info are still valid,
+        # but leave the formatting of the line to the listener's handlers
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        # SimpleQueue is unbounded but much cheaper to put to than Queue; bound it here
+        if self.queue.qsize() >= self.limit:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+class LogPipeline:
+    """Queue, background listener and handlers installed on the root logger"""
+
+    def __init__(self, log_file: Optional[Path], settings: LogSettings, console: bool = True):
+        self.log_file = Path(log_file) if log_file else None
+        self.settings = settings
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = DroppingQueueHandler(self.queue, settings.log_queue_size)
+        self.ring = RecordRing(settings.log_ring_size)
+
+        handlers: List[logging.Handler] = [self.ring]
+        if self.log_file:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                self.log_file, maxBytes=max(settings.max_log_size // (settings.log_backups + 1), 1024),
+                backupCount=settings.log_backups, encoding='utf-8'
+            )
+            file_handler.setFormatter(JsonLinesFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+            handlers.append(console_handler)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers)
+        self._lock = threading.Lock()
+        self.running = False
+
+    def start(self):
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.settings.log_level.upper())
+        self.listener.start()
+        self.running = True
+
+    def stop(self):
+        """Write out queued records and detach; safe to call more than once"""
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+            logging.getLogger().removeHandler(self.queue_handler)
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+
+    def recent(self, limit: int = 100, level: Optional[str] = None,
+               name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Newest records last, optionally at or above level and from loggers under name"""
+        records = list(self.ring.records)
+        if level:
+            minimum = logging.getLevelName(level.upper())
+            if not isinstance(minimum, int):
+                raise ValueError(f"Unknown log level: {level}")
+            records = [r for r in records if logging.getLevelName(r['level']) >= minimum]
+        if name:
+            records = [r for r in records if r['logger'] == name or r['logger'].startswith(name + '.')]
+        return records[-limit:]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "file": str(self.log_file) if self.log_file else None,
+            "level": self.settings.log_level,
+            "max_bytes": self.settings.max_log_size,
+            "backups": self.settings.log_backups,
+            "queued": self.queue.qsize(),
+            "dropped": self.queue_handler.dropped,
+            "recent": len(self.ring.records)
+        }
+
+def setup_logging(log_file: Optional[Path], settings: Optional[LogSettings] = None,
+                  console: bool = True) -> LogPipeline:
+    """Route all logging in this process through a LogPipeline; it is stopped at exit"""
+    pipeline = LogPipeline(log_file, settings or LogSettings(), console)
+    pipeline.start()
+    atexit.register(pipeline.stop)
+    return pipeline
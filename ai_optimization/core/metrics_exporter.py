@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Metrics Exporter
+In-process counters, gauges and histograms for the orchestrator and its engines,
+served as OpenMetrics text on a localhost HTTP port for Prometheus to scrape
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Upper bounds in seconds; wide enough for sub-millisecond IPC and minute-long loop iterations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, str, float]  # Name with suffix, rendered labels, value
+# Family name -> (type, documentation, samples), as sent by worker processes
+Snapshot = Dict[str, Tuple[str, str, List[Sample]]]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _with_label(labels: str, pair: str) -> str:
+    """Rendered labels with one more name="value" pair"""
+    return f"{labels[:-1]},{pair}}}" if labels else f"{{{pair}}}"
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    """Metric family with one child per label value combination"""
+    type = 'unknown'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Sample]:
+        """(name with suffix, rendered labels, value) of every sample"""
+        raise NotImplementedError
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def totals(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def set_total(self, value: float, **labels):
+        """For totals maintained elsewhere, e.g. CPU time accounted by the kernel"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}_total", _format_labels(self.labelnames, key), value
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per child: non-cumulative bucket counts (last is +Inf), count, sum
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            child = self._values.get(key)
+            if child is None:
+                child = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+            child[0][index] += 1
+            child[1] += 1
+            child[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(child[0]), child[1], child[2]) for key, child in self._values.items()]
+        for key, bucket_counts, count, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"'), cumulative)
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), count
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+
+class MetricsRegistry:
+    """Metric families plus collectors that refresh gauges right before a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._remote: Dict[str, Snapshot] = {}  # Engine worker -> its registry's last snapshot
+
+    def __len__(self) -> int:
+        return len(self._metrics)
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} already registered differently")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def _collect(self):
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.error(f"Error in metrics collector: {e}")
+
+    def snapshot(self) -> Snapshot:
+        """Samples of every family, for merging into the orchestrator's registry"""
+        self._collect()
+        return {name: (metric.type, metric.documentation, list(metric.samples()))
+                for name, metric in self._metrics.items()}
+
+    def set_remote(self, source: str, snapshot: Snapshot):
+        """Render the samples of another process's registry too, labelled engine=source"""
+        self._remote[source] = snapshot
+
+    def render(self) -> str:
+        self._collect()
+        families: Dict[str, Tuple[str, str, List[Sample]]] = {
+            name: (metric.type, metric.documentation, list(metric.samples()))
+            for name, metric in self._metrics.items()
+        }
+        if self._remote:
+            # One family per name across processes; this process is the orchestrator
+            families = {name: (kind, documentation, [(sample, _with_label(labels, 'engine="orchestrator"'), value)
+                                                     for sample, labels, value in samples])
+                        for name, (kind, documentation, samples) in families.items()}
+            for source, snapshot in self._remote.items():
+                pair = f'engine="{_escape(source)}"'
+                for name, (kind, documentation, samples) in snapshot.items():
+                    family = families.setdefault(name, (kind, documentation, []))
+                    family[2].extend((sample, _with_label(labels, pair), value) for sample, labels, value in samples)
+
+        lines = []
+        for name, (kind, documentation, samples) in families.items():
+            lines.extend([f"# TYPE {name} {kind}", f"# HELP {name} {_escape(documentation)}"])
+            lines.extend(f"{sample}{labels} {_format_value(value)}" for sample, labels, value in samples)
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+# Shared by all engines in the process
+REGISTRY = MetricsRegistry()
+
+LOOP_SECONDS = REGISTRY.histogram(
+    'hyprland_ai_loop_iteration_seconds', 'Duration of one iteration of an engine loop, excluding its sleep', ['loop'])
+SUBPROCESS_SECONDS = REGISTRY.histogram(
+    'hyprland_ai_subprocess_seconds', 'Duration of external commands run by the engines', ['command'])
+IPC_SECONDS = REGISTRY.histogram(
+    'hyprland_ai_ipc_seconds', 'Duration of compositor requests', ['transport'])
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    'hyprland_ai_db_write_seconds', 'Duration of SQLite write transactions', ['store'])
+MODEL_LOSS = REGISTRY.gauge(
+    'hyprland_ai_model_loss', 'Training loss of the last model update', ['model'])
+OPTIMIZATIONS = REGISTRY.counter(
+    'hyprland_ai_optimizations', 'Optimization cycles completed', ['trigger'])
+OPTIONS_APPLIED = REGISTRY.counter(
+    'hyprland_ai_options_applied', 'Compositor options changed', ['source'])
+HEALING_ACTIONS = REGISTRY.counter(
+    'hyprland_ai_healing_actions', 'Healing actions by strategy and outcome', ['strategy', 'outcome'])
+SYSTEM_METRIC = REGISTRY.gauge(
+    'hyprland_ai_system_metric', 'Latest collected system metric', ['metric'])
+SUBPROCESS_SPAWNS = REGISTRY.counter(
+    'hyprland_ai_subprocess_spawns', 'External commands started, by engine', ['engine'])
+
+# Engine whose task is running; set by the supervisor and inherited by tasks the engine starts
+CURRENT_ENGINE = contextvars.ContextVar('current_engine', default='orchestrator')
+
+def _command_label(cmd: Sequence[str]) -> str:
+    """Program plus its first plain argument ('hyprctl clients'), keeping label values few"""
+    program = Path(cmd[0]).name
+    for arg in cmd[1:]:
+        if not arg.startswith('-'):
+            return f"{program} {arg}" if arg.isidentifier() else program
+    return program
+
+def timed_run(cmd: Sequence[str], **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run that records its duration and which engine spawned it"""
+    SUBPROCESS_SPAWNS.inc(engine=CURRENT_ENGINE.get())
+    with SUBPROCESS_SECONDS.time(command=_command_label(cmd)):
+        return subprocess.run(cmd, **kwargs)
+
+_PROCESS_CPU = REGISTRY.counter('process_cpu_seconds', 'User and system CPU time of the daemon')
+_PROCESS_RSS = REGISTRY.gauge('process_resident_memory_bytes', 'Resident set size of the daemon')
+_PROCESS_START = REGISTRY.gauge('process_start_time_seconds', 'Start time of the daemon since the epoch')
+_PROCESS_START.set(time.time())
+
+def _collect_process_metrics():
+    times = os.times()
+    _PROCESS_CPU.set_total(times.user + times.system)
+    try:
+        with open('/proc/self/statm') as f:
+            _PROCESS_RSS.set(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE'))
+    except (OSError, ValueError, IndexError):
+        pass
+
+REGISTRY.add_collector(_collect_process_metrics)
+
+class MetricsExporter:
+    """Minimal HTTP server answering GET /metrics on localhost"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, host: str = '127.0.0.1', port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats = {'scrapes': 0, 'errors': 0, 'last_render_ms': None}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info(f"Metrics exporter listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5.0)
+            # Headers are not needed; read up to the blank line
+            while (await asyncio.wait_for(reader.readline(), 5.0)) not in (b'\r\n', b'\n', b''):
+                pass
+
+            parts = request_line.decode(errors='replace').split()
+            if len(parts) < 2 or parts[0] != 'GET':
+                status, body, content_type = '405 Method Not Allowed', b'', 'text/plain'
+            elif parts[1].split('?')[0] != '/metrics':
+                status, body, content_type = '404 Not Found', b'', 'text/plain'
+            else:
+                start = time.perf_counter()
+                body = self.registry.render().encode()
+                self.stats['last_render_ms'] = round((time.perf_counter() - start) * 1000, 2)
+                self.stats['scrapes'] += 1
+                status, content_type = '200 OK', CONTENT_TYPE
+
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error serving metrics: {e}")
+        finally:
+            writer.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "endpoint": f"http://{self.host}:{self.port}/metrics" if self._server else None,
+            "metric_families": len(self.registry)
+        }
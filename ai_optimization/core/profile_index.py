@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Preference Profile Index
+Embeds contexts as normalized vectors and answers nearest-profile queries with
+one cosine-similarity matrix product over a contiguous profile matrix
+"""
+
+import logging
+import math
+import os
+import time
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_DIM = 11
+CPU_COUNT = os.cpu_count() or 1
+
+def embed_context(hour_of_day: int, day_of_week: int, window_count: int,
+                  screen_brightness: float, system_load: float, battery_level: float,
+                  is_gaming: bool, is_coding: bool, is_media_consumption: bool) -> np.ndarray:
+    """Context feature vector centred on zero (cyclic time, bounded scalars, +-1 flags)"""
+    hour_angle = 2 * math.pi * hour_of_day / 24
+    day_angle = 2 * math.pi * day_of_week / 7
+    return np.array([
+        math.sin(hour_angle), math.cos(hour_angle),
+        math.sin(day_angle), math.cos(day_angle),
+        2 * min(window_count / 20, 1.0) - 1,
+        2 * min(max(screen_brightness, 0.0), 1.0) - 1,
+        2 * min(system_load / CPU_COUNT, 1.0) - 1,
+        2 * min(max(battery_level / 100, 0.0), 1.0) - 1,
+        1.0 if is_gaming else -1.0,
+        1.0 if is_coding else -1.0,
+        1.0 if is_media_consumption else -1.0
+    ], dtype=np.float32)
+
+def usage_weight(usage_frequency: float, saturation: float = 50.0) -> float:
+    """Bounded 0-1 weight for how often a profile was used"""
+    return min(math.log1p(max(usage_frequency, 0.0)) / math.log1p(saturation), 1.0)
+
+class ProfileIndex:
+    """Nearest-profile search over normalized context centroids"""
+
+    def __init__(self, dim: int = CONTEXT_DIM, initial_capacity: int = 64):
+        self.dim = dim
+        self._vectors = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._priors = np.zeros(initial_capacity, dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, profile_id: str) -> bool:
+        return profile_id in self._rows
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def _grow(self):
+        capacity = self._vectors.shape[0] * 2
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:len(self._ids)] = self._vectors[:len(self._ids)]
+        priors = np.zeros(capacity, dtype=np.float32)
+        priors[:len(self._ids)] = self._priors[:len(self._ids)]
+        self._vectors, self._priors = vectors, priors
+
+    def upsert(self, profile_id: str, centroid: np.ndarray, prior: float = 1.0):
+        """Insert or update a profile's centroid and its score multiplier"""
+        row = self._rows.get(profile_id)
+        if row is None:
+            if len(self._ids) == self._vectors.shape[0]:
+                self._grow()
+            row = len(self._ids)
+            self._ids.append(profile_id)
+            self._rows[profile_id] = row
+
+        self._vectors[row] = self._normalize(centroid)
+        self._priors[row] = prior
+
+    def set_prior(self, profile_id: str, prior: float):
+        """Update only the score multiplier of a profile"""
+        row = self._rows.get(profile_id)
+        if row is not None:
+            self._priors[row] = prior
+
+    def remove(self, profile_id: str):
+        """Remove a profile, moving the last row into its place"""
+        row = self._rows.pop(profile_id, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._vectors[row] = self._vectors[last]
+            self._priors[row] = self._priors[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+        self._ids.pop()
+
+    def query(self, vector: np.ndarray, k: int = 1) -> List[Tuple[str, float]]:
+        """Top-k profiles by cosine similarity times prior"""
+        n = len(self._ids)
+        if n == 0:
+            return []
+
+        scores = self._vectors[:n] @ self._normalize(vector)
+        scores *= self._priors[:n]
+
+        if k >= n:
+            top = np.argsort(-scores)
+        else:
+            top = np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], float(scores[i])) for i in top]
+
+def benchmark(profile_counts=(100, 1000, 5000, 20000), queries: int = 1000,
+              noise: float = 0.3, seed: int = 42) -> List[Dict[str, Any]]:
+    """Match quality and latency of the index against a per-profile Python loop
+
+    Each query is a noisy copy of a random profile centroid; recall@1 is how
+    often that profile is returned, agreement how often the index and the
+    loop return the same profile.
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+
+    for count in profile_counts:
+        centroids = rng.uniform(-1, 1, size=(count, CONTEXT_DIM)).astype(np.float32)
+        index = ProfileIndex()
+        start = time.perf_counter()
+        for i, centroid in enumerate(centroids):
+            index.upsert(f"p{i}", centroid)
+        insert_s = time.perf_counter() - start
+
+        targets = rng.integers(0, count, size=queries)
+        probes = centroids[targets] + rng.normal(0, noise, size=(queries, CONTEXT_DIM)).astype(np.float32)
+
+        start = time.perf_counter()
+        index_hits = [index.query(probe)[0][0] for probe in probes]
+        index_s = time.perf_counter() - start
+
+        normalized = [ProfileIndex._normalize(c) for c in centroids]
+        loop_queries = min(queries, 200)
+        start = time.perf_counter()
+        loop_hits = []
+        for probe in probes[:loop_queries]:
+            q = ProfileIndex._normalize(probe)
+            best_id, best_score = None, -2.0
+            for i, centroid in enumerate(normalized):
+                score = float(np.dot(centroid, q))
+                if score > best_score:
+                    best_id, best_score = f"p{i}", score
+            loop_hits.append(best_id)
+        loop_s = time.perf_counter() - start
+
+        results.append({
+            "profiles": count,
+            "insert_us_per_profile": round(insert_s / count * 1e6, 2),
+            "index_query_us": round(index_s / queries * 1e6, 2),
+            "loop_query_us": round(loop_s / loop_queries * 1e6, 2),
+            "recall_at_1": round(sum(hit == f"p{t}" for hit, t in zip(index_hits, targets)) / queries, 3),
+            "agreement_with_loop": round(
+                sum(a == b for a, b in zip(index_hits, loop_hits)) / loop_queries, 3
+            )
+        })
+
+    return results
+
+def main():
+    """Run the profile index benchmark"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Preference profile index benchmark")
+    parser.add_argument("--profiles", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--noise", type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(tuple(args.profiles), args.queries, args.noise), indent=2))
+
+if __name__ == "__main__":
+    main()
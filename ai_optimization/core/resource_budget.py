@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Resource Budget
+Accounts the daemon's own CPU time, memory, wakeups and subprocess spawns and
+throttles the engines when they go over the configured budget
+"""
+
+import json
+import logging
+import os
+import resource
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .metrics_exporter import REGISTRY, SUBPROCESS_SPAWNS
+
+logger = logging.getLogger(__name__)
+
+BUDGET_LEVEL = REGISTRY.gauge(
+    'hyprland_ai_budget_level', 'Throttle level applied to stay within the resource budget')
+BUDGET_USAGE = REGISTRY.gauge(
+    'hyprland_ai_budget_usage_ratio', 'Resource usage over the budget window as a fraction of the budget',
+    ['resource'])
+
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+@dataclass
+class ResourceBudget:
+    """Limits for the daemon including its workers and the commands it runs"""
+    cpu_percent: float = 2.0  # Of one core, averaged over the window
+    rss_mb: float = 400.0
+    wakeups_per_minute: float = 1200.0  # Voluntary context switches
+    spawns_per_minute: float = 30.0
+    window: float = 60.0  # Seconds usage is averaged over
+
+    @classmethod
+    def from_settings(cls, path: Path) -> 'ResourceBudget':
+        """The "budget" section of settings.json; defaults for anything missing"""
+        try:
+            with open(path) as f:
+                section = json.load(f).get('budget', {})
+            known = {f.name for f in fields(cls)}
+            return cls(**{key: float(value) for key, value in section.items() if key in known})
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logger.warning(f"Invalid budget settings in {path}, using defaults: {e}")
+            return cls()
+
+@dataclass(frozen=True)
+class Throttle:
+    """What the engines give up to stay within budget"""
+    level: int = 0
+    interval_scale: float = 1.0  # Multiplies loop sleep intervals
+    skip_training: bool = False  # Skip model updates and clustering fits
+    shed_optional: bool = False  # Skip collectors that are nice to have (GPU queries, probes, preloading)
+
+    def interval(self, seconds: float) -> float:
+        return seconds * self.interval_scale
+
+# Usage the throttle levels can reduce; memory stays with the loaded models whatever
+# the level, so rss_mb is reported but never raises or holds the throttle
+THROTTLED_RESOURCES = ('cpu_percent', 'wakeups_per_minute', 'spawns_per_minute')
+
+# Each level keeps what the previous one gave up
+THROTTLE_LEVELS = (
+    Throttle(0),
+    Throttle(1, interval_scale=2.0),
+    Throttle(2, interval_scale=4.0, skip_training=True),
+    Throttle(3, interval_scale=4.0, skip_training=True, shed_optional=True)
+)
+
+@dataclass
+class UsageSample:
+    timestamp: float  # time.monotonic()
+    cpu_seconds: float
+    wakeups: int
+    spawns: int
+    rss_bytes: int
+
+def _read_proc(pid: int) -> Optional[Dict[str, int]]:
+    """CPU ticks (own and reaped children), RSS and voluntary context switches of a process"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # The command name may contain spaces; fields after it are fixed
+            stat = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/status') as f:
+            switches = next(int(line.split()[1]) for line in f if line.startswith('voluntary_ctxt_switches'))
+        return {
+            'cpu_ticks': sum(int(value) for value in stat[11:15]),  # utime, stime, cutime, cstime
+            'rss_bytes': int(stat[21]) * _PAGE_SIZE,
+            'wakeups': switches
+        }
+    except (OSError, ValueError, IndexError, StopIteration):
+        return None
+
+class ResourceAccountant:
+    """Measures the daemon against its budget and picks a throttle level
+
+    Usage is averaged over the budget window. Going over a throttled limit raises
+    the throttle one level; staying under 70% of every throttled limit lowers it.
+    After a change the level holds for a window, so the effect can show.
+    """
+
+    def __init__(self, budget: Optional[ResourceBudget] = None):
+        self.budget = budget or ResourceBudget()
+        self.throttle = Throttle()
+        self.samples = deque(maxlen=64)
+        self.last_change = 0.0
+        self.level_changes = 0
+        self.usage: Dict[str, float] = {}
+        self.over_budget: List[str] = []
+        self.spawns_by_engine: Dict[str, int] = {}
+
+    def sample(self, worker_pids: Iterable[int] = (), worker_spawns: Optional[Dict[str, int]] = None) -> UsageSample:
+        """Totals since start for this process, the subprocesses it reaped and the given workers"""
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu_seconds = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+        wakeups = own.ru_nvcsw
+        rss_bytes = (_read_proc(os.getpid()) or {}).get('rss_bytes', own.ru_maxrss * 1024)
+
+        # Workers are only counted while alive; reaped ones show up in RUSAGE_CHILDREN
+        for pid in worker_pids:
+            usage = _read_proc(pid)
+            if usage:
+                cpu_seconds += usage['cpu_ticks'] / _CLOCK_TICKS
+                wakeups += usage['wakeups']
+                rss_bytes += usage['rss_bytes']
+
+        spawns = {labels[0]: int(count) for labels, count in SUBPROCESS_SPAWNS.totals().items()}
+        for engine, count in (worker_spawns or {}).items():
+            spawns[engine] = spawns.get(engine, 0) + count
+        self.spawns_by_engine = spawns
+
+        sample = UsageSample(time.monotonic(), cpu_seconds, wakeups, sum(spawns.values()), rss_bytes)
+        self.samples.append(sample)
+        return sample
+
+    def _rates(self) -> Optional[Dict[str, float]]:
+        latest = self.samples[-1]
+        oldest = next((s for s in self.samples if latest.timestamp - s.timestamp <= self.budget.window), latest)
+        elapsed = latest.timestamp - oldest.timestamp
+        if elapsed < self.budget.window / 4:
+            return None  # Too short to judge
+        per_minute = 60.0 / elapsed
+        return {
+            # A worker restart lowers the totals; negative deltas count as zero
+            'cpu_percent': max(0.0, latest.cpu_seconds - oldest.cpu_seconds) / elapsed * 100,
+            'rss_mb': latest.rss_bytes / (1024 * 1024),
+            'wakeups_per_minute': max(0, latest.wakeups - oldest.wakeups) * per_minute,
+            'spawns_per_minute': max(0, latest.spawns - oldest.spawns) * per_minute
+        }
+
+    def check(self, worker_pids: Iterable[int] = (), worker_spawns: Optional[Dict[str, int]] = None) -> bool:
+        """Take a sample and adjust the throttle; True when the level changed"""
+        sample = self.sample(worker_pids, worker_spawns)
+        rates = self._rates()
+        if rates is None:
+            return False
+        self.usage = rates
+
+        limits = {name: getattr(self.budget, name) for name in rates}
+        ratios = {name: rates[name] / limit if limit > 0 else 0.0 for name, limit in limits.items()}
+        for name, ratio in ratios.items():
+            BUDGET_USAGE.set(round(ratio, 3), resource=name)
+        over_budget = [name for name, ratio in ratios.items() if ratio > 1.0]
+        if 'rss_mb' in over_budget and 'rss_mb' not in self.over_budget:
+            logger.warning(f"Resource budget: RSS {rates['rss_mb']:.0f} MB over {self.budget.rss_mb:.0f} MB")
+        self.over_budget = over_budget
+
+        level = self.throttle.level
+        if sample.timestamp - self.last_change < self.budget.window:
+            return False
+        throttled = [name for name in THROTTLED_RESOURCES if name in over_budget]
+        if throttled and level < len(THROTTLE_LEVELS) - 1:
+            level += 1
+        elif not throttled and level > 0 and max(ratios[name] for name in THROTTLED_RESOURCES) < 0.7:
+            level -= 1
+        if level == self.throttle.level:
+            return False
+
+        logger.warning(f"Resource budget: throttle level {self.throttle.level} -> {level}"
+                       f" (over budget: {', '.join(throttled) or 'none'})")
+        self.throttle = THROTTLE_LEVELS[level]
+        self.last_change = sample.timestamp
+        self.level_changes += 1
+        BUDGET_LEVEL.set(level)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "budget": asdict(self.budget),
+            "usage": {name: round(value, 2) for name, value in self.usage.items()},
+            "over_budget": self.over_budget,
+            "throttle": asdict(self.throttle),
+            "level_changes": self.level_changes,
+            "spawns_by_engine": dict(self.spawns_by_engine)
+        }
@@ -9,7 +9,6 @@ import json
 import logging
 import subprocess
 import psutil
-import re
 import time
 from pathlib import Path
 from dataclasses import dataclass, asdict
@@ -22,9 +21,18 @@ from enum import Enum
 import threading
 import signal
 import os
+import numpy as np
+
+from .event_bus import ActionApplied, ConfigApplied, EventBus, IssueRaised, IssueResolved, OpenIssues, Subscription
+from .issue_registry import IssueRegistry
+from .latency_probe import LatencyProbe
+from .log_ingest import LogIngestor
+from .metrics_exporter import DB_WRITE_SECONDS, HEALING_ACTIONS, LOOP_SECONDS, timed_run
+from .resource_budget import Throttle
+from .shared_metrics import SNAPSHOT_FIELDS
+from .status_aggregates import TallyCounter
+from .strategy_ranker import StrategyRanker
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class IssueSeverity(Enum):
@@ -61,6 +69,13 @@ class SystemIssue:
     resolved: bool = False
     resolution_attempts: int = 0
     resolution_timestamp: Optional[float] = None
+    fingerprint: str = ""
+
+    def __post_init__(self):
+        # Stable identity of the issue kind: the id without its timestamp suffix
+        if not self.fingerprint:
+            prefix, _, suffix = self.issue_id.rpartition('_')
+            self.fingerprint = prefix if prefix and suffix.isdigit() else self.issue_id
 
 @dataclass
 class HealingAction:
@@ -75,26 +90,37 @@ class HealingAction:
     success: bool
     error_message: Optional[str]
     rollback_info: Optional[Dict[str, Any]]
+    effect_size: Optional[float] = None
+    category: Optional[str] = None
+    time_to_resolution: Optional[float] = None
 
 class SelfHealingSystem:
     """Main self-healing system orchestrator"""
     
-    def __init__(self):
+    def __init__(self, probe_targets: Optional[List[Dict[str, Any]]] = None):
         self.data_path = Path("/home/sasha/hyprland-project/ai_optimization/healing_data")
         self.data_path.mkdir(parents=True, exist_ok=True)
         
         # Database for issue tracking
         self.db_path = self.data_path / "healing_system.db"
+        self.checkpoint_path = self.data_path / "warm_start.ckpt"  # Metrics history across restarts
         self._init_database()
         
         # Issue tracking
         self.active_issues: Dict[str, SystemIssue] = {}
         self.resolved_issues: List[SystemIssue] = []
         self.healing_history: List[HealingAction] = []
+        # Maintained as issues open and close and actions complete, for constant-time status
+        self.issue_counts = TallyCounter()  # Active issues by severity
+        self.action_counts = {'total': 0, 'successful': 0}
         
         # Monitoring state
         self.monitoring_active = False
         self.monitoring_interval = 30  # seconds
+        self.last_heartbeat: Optional[float] = None  # time.monotonic() of the last loop iteration
+        self.shared_metrics = None  # MetricsRing of the collector process in multi-process mode
+        self.throttle = Throttle()  # Set by the orchestrator to keep the daemon within its resource budget
+        self.events = EventBus()  # Issues and actions are announced here; the orchestrator's bus replaces it
         self.issue_detection_thresholds = {
             'cpu_usage': 90.0,
             'memory_usage': 95.0,
@@ -102,16 +128,52 @@ class SelfHealingSystem:
             'temperature': 85.0,
             'fps_drop': 20.0,
             'audio_glitches': 5,
-            'crashes_per_hour': 3
+            'crashes_per_hour': 3,
+            'gpu_hangs': 1,
+            'display_errors': 1
+        }
+        
+        # Issues clear below these values (hysteresis against the raise thresholds above)
+        self.issue_clear_thresholds = {
+            'cpu_usage': 72.0,
+            'memory_usage': 76.0,
+            'temperature': 68.0
+        }
+        
+        # Active issue index with hold times and flap damping
+        self.issue_registry = IssueRegistry()
+        
+        # Kernel/journal log events: condition -> (window in seconds, threshold key)
+        self.log_ingestor = LogIngestor(self.data_path / "log_cursor.json")
+        self.log_event_rules = {
+            'gpu_hang': (600, 'gpu_hangs'),
+            'display_corruption': (600, 'display_errors'),
+            'audio_glitches': (600, 'audio_glitches'),
+            'frequent_crashes': (3600, 'crashes_per_hour')
         }
+        self._log_task: Optional[asyncio.Task] = None
+        
+        # Network latency probes run on their own cadence
+        self.latency_probe = LatencyProbe.from_config(probe_targets, interval=10.0, timeout=1.0)
+        self._probe_task: Optional[asyncio.Task] = None
         
         # System state tracking
         self.system_metrics_history = deque(maxlen=1440)  # 24 hours at 1-minute intervals
         self.process_restarts = defaultdict(int)
         self.last_known_good_config = {}
         
-        # Healing strategies
+        # Post-action verification (closed loop)
+        # Monitoring samples compared before and after an action, same size as the
+        # detection half-window; both windows come from the monitoring history
+        self.verification_window = 5
+        self.min_effect_size = 0.5  # Cohen's d required to count as an improvement
+        self.min_metric_std = 1.0  # floor for pooled std, in metric units
+
+        # Healing strategies, ranked by their measured effectiveness
         self.healing_strategies = self._initialize_healing_strategies()
+        self.strategy_ranker = StrategyRanker(self.db_path)
+        self._last_action_by_issue: Dict[str, HealingAction] = {}
+        self._verifications: Dict[str, asyncio.Task] = {}  # issue id -> post-action verification in flight
         
         logger.info("Self-Healing System initialized")
 
@@ -153,9 +215,15 @@ class SelfHealingSystem:
                 success INTEGER,
                 error_message TEXT,
                 rollback_info TEXT,
+                effect_size REAL,
+                category TEXT,
+                time_to_resolution REAL,
                 FOREIGN KEY (issue_id) REFERENCES system_issues (issue_id)
             )
         ''')
+        self._ensure_column(cursor, 'healing_actions', 'effect_size', 'REAL')
+        self._ensure_column(cursor, 'healing_actions', 'category', 'TEXT')
+        self._ensure_column(cursor, 'healing_actions', 'time_to_resolution', 'REAL')
         
         # System metrics table
         cursor.execute('''
@@ -175,8 +243,20 @@ class SelfHealingSystem:
         conn.commit()
         conn.close()
 
+    def _ensure_column(self, cursor, table: str, column: str, column_type: str):
+        """Add a column to an existing table created by an older version"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}')
+
     def _initialize_healing_strategies(self) -> Dict[IssueCategory, List[Dict[str, Any]]]:
-        """Initialize healing strategies for different issue types"""
+        """Initialize healing strategies for different issue types
+        
+        The list order is the fallback order when there is no history yet;
+        'cost' is the user-visible cost of the remedy (0 = invisible, 1 = disruptive).
+        Actions and rollbacks return whether they worked, or the compositor keywords
+        they set (empty when none could be set).
+        """
         return {
             IssueCategory.PERFORMANCE: [
                 {
@@ -184,21 +264,27 @@ class SelfHealingSystem:
                     'description': 'Disable or reduce animations to improve performance',
                     'action': self._reduce_animations,
                     'conditions': ['cpu_usage > 85', 'low_fps'],
-                    'rollback': self._restore_animations
+                    'rollback': self._restore_animations,
+                    'target_metric': 'cpu_usage',
+                    'cost': 0.6
                 },
                 {
                     'name': 'disable_blur',
                     'description': 'Disable blur effects to reduce GPU load',
                     'action': self._disable_blur,
                     'conditions': ['gpu_usage > 90', 'low_fps'],
-                    'rollback': self._enable_blur
+                    'rollback': self._enable_blur,
+                    'target_metric': 'gpu_usage',
+                    'cost': 0.4
                 },
                 {
                     'name': 'kill_resource_hogs',
                     'description': 'Terminate processes consuming excessive resources',
                     'action': self._kill_resource_hogs,
                     'conditions': ['memory_usage > 95'],
-                    'rollback': None
+                    'rollback': None,
+                    'target_metric': 'memory_usage',
+                    'cost': 0.9
                 }
             ],
             IssueCategory.STABILITY: [
@@ -207,14 +293,18 @@ class SelfHealingSystem:
                     'description': 'Restart Hyprland compositor',
                     'action': self._restart_hyprland,
                     'conditions': ['frequent_crashes', 'compositor_hang'],
-                    'rollback': None
+                    'rollback': None,
+                    'target_metric': None,
+                    'cost': 1.0
                 },
                 {
                     'name': 'reset_to_defaults',
                     'description': 'Reset to last known good configuration',
                     'action': self._reset_to_defaults,
                     'conditions': ['persistent_issues'],
-                    'rollback': self._restore_user_config
+                    'rollback': self._restore_user_config,
+                    'target_metric': None,
+                    'cost': 0.7
                 }
             ],
             IssueCategory.GRAPHICS: [
@@ -223,14 +313,18 @@ class SelfHealingSystem:
                     'description': 'Restart GPU driver modules',
                     'action': self._restart_gpu_driver,
                     'conditions': ['gpu_hang', 'display_corruption'],
-                    'rollback': None
+                    'rollback': None,
+                    'target_metric': None,
+                    'cost': 1.0
                 },
                 {
                     'name': 'adjust_refresh_rate',
                     'description': 'Lower display refresh rate',
                     'action': self._adjust_refresh_rate,
                     'conditions': ['display_issues', 'gpu_overload'],
-                    'rollback': self._restore_refresh_rate
+                    'rollback': self._restore_refresh_rate,
+                    'target_metric': 'gpu_usage',
+                    'cost': 0.5
                 }
             ],
             IssueCategory.MEMORY: [
@@ -239,14 +333,18 @@ class SelfHealingSystem:
                     'description': 'Clear system caches to free memory',
                     'action': self._clear_caches,
                     'conditions': ['memory_usage > 90'],
-                    'rollback': None
+                    'rollback': None,
+                    'target_metric': 'memory_usage',
+                    'cost': 0.2
                 },
                 {
                     'name': 'enable_zswap',
                     'description': 'Enable compressed swap in RAM',
                     'action': self._enable_zswap,
                     'conditions': ['memory_pressure'],
-                    'rollback': self._disable_zswap
+                    'rollback': self._disable_zswap,
+                    'target_metric': 'memory_usage',
+                    'cost': 0.1
                 }
             ],
             IssueCategory.AUDIO: [
@@ -255,7 +353,9 @@ class SelfHealingSystem:
                     'description': 'Restart PipeWire audio server',
                     'action': self._restart_pipewire,
                     'conditions': ['audio_glitches', 'no_audio'],
-                    'rollback': None
+                    'rollback': None,
+                    'target_metric': None,
+                    'cost': 0.3
                 }
             ]
         }
@@ -265,11 +365,22 @@ class SelfHealingSystem:
         logger.info("Starting self-healing monitoring")
         self.monitoring_active = True
         
-        # Load existing issues and history
+        # Load existing issues and history; the other engines hold for them as for new ones
         self._load_system_state()
+        for issue in list(self.active_issues.values()):
+            await self.events.publish(IssueRaised(issue.issue_id, issue.category.value,
+                                                  issue.severity.value, issue.title))
+        
+        # Follow kernel and journal logs in the background
+        self._log_task = asyncio.create_task(self.log_ingestor.start())
+        self._probe_task = asyncio.create_task(self.latency_probe.start())
         
         while self.monitoring_active:
             try:
+                iteration_start = time.perf_counter()
+                self.last_heartbeat = time.monotonic()
+                self.latency_probe.paused = self.throttle.shed_optional
+                
                 # Collect system metrics
                 metrics = await self._collect_system_metrics()
                 self.system_metrics_history.append(metrics)
@@ -287,11 +398,15 @@ class SelfHealingSystem:
                 
                 # Perform healing actions
                 await self._perform_healing_actions()
+                await self.events.publish(OpenIssues({
+                    issue_id: (issue.severity.value, issue.title) for issue_id, issue in self.active_issues.items()
+                }))
                 
                 # Cleanup old data
                 await self._cleanup_old_data()
+                LOOP_SECONDS.observe(time.perf_counter() - iteration_start, loop='self_healing')
                 
-                await asyncio.sleep(self.monitoring_interval)
+                await asyncio.sleep(self.throttle.interval(self.monitoring_interval))
                 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
@@ -300,41 +415,60 @@ class SelfHealingSystem:
     async def _collect_system_metrics(self) -> Dict[str, Any]:
         """Collect comprehensive system metrics"""
         try:
-            # Basic system metrics
-            cpu_usage = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            
-            # GPU metrics
-            gpu_usage, gpu_temp = await self._get_gpu_metrics()
-            
-            # CPU temperature
-            cpu_temp = await self._get_cpu_temperature()
-            
-            # Network metrics
-            network_latency = await self._measure_network_latency()
-            
-            # Process count
-            active_processes = len(psutil.pids())
+            shared = self.shared_metrics.latest(max_age=10) if self.shared_metrics else None
+            if shared:
+                # Sampled by the collector process, no blocking sample or nvidia-smi here
+                cpu_usage = shared['cpu_usage']
+                memory_percent = shared['memory_usage']
+                disk_percent = shared['disk_usage']
+                gpu_usage, gpu_temp = shared['gpu_usage'] or 0.0, shared['gpu_temperature'] or 0.0
+                cpu_temp = shared['cpu_temperature']
+                active_processes = int(shared['active_processes'])
+                system_load = shared['system_load']
+            else:
+                # Basic system metrics
+                cpu_usage = psutil.cpu_percent(interval=1)
+                memory_percent = psutil.virtual_memory().percent
+                disk_percent = psutil.disk_usage('/').percent
+                
+                # GPU metrics; nvidia-smi is shed when over budget
+                gpu_usage, gpu_temp = (0.0, 0.0) if self.throttle.shed_optional else await self._get_gpu_metrics()
+                
+                # CPU temperature
+                cpu_temp = await self._get_cpu_temperature()
+                
+                # Process count
+                active_processes = len(psutil.pids())
+                
+                # System load
+                system_load = psutil.getloadavg()[0] if hasattr(psutil, 'getloadavg') else 0
             
-            # System load
-            system_load = psutil.getloadavg()[0] if hasattr(psutil, 'getloadavg') else 0
+            # Network metrics (latest probe results, never blocks)
+            network_latency = self._measure_network_latency()
             
             # Hyprland-specific metrics
             hypr_metrics = await self._get_hyprland_metrics()
             
+            # Log event counters over their rule windows
+            log_metrics = {
+                condition: self.log_ingestor.count(condition, window)
+                for condition, (window, _) in self.log_event_rules.items()
+            }
+            
             return {
                 'timestamp': time.time(),
                 'cpu_usage': cpu_usage,
-                'memory_usage': memory.percent,
+                'memory_usage': memory_percent,
                 'gpu_usage': gpu_usage,
                 'cpu_temperature': cpu_temp,
                 'gpu_temperature': gpu_temp,
-                'disk_usage': disk.percent,
+                'disk_usage': disk_percent,
                 'network_latency': network_latency,
+                'network_loss_rate': self.latency_probe.get_loss_rate(),
                 'active_processes': active_processes,
                 'system_load': system_load,
-                **hypr_metrics
+                **hypr_metrics,
+                **log_metrics
             }
             
         except Exception as e:
@@ -344,7 +478,7 @@ class SelfHealingSystem:
     async def _get_gpu_metrics(self) -> Tuple[float, float]:
         """Get GPU usage and temperature"""
         try:
-            result = subprocess.run([
+            result = timed_run([
                 'nvidia-smi', '--query-gpu=utilization.gpu,temperature.gpu',
                 '--format=csv,noheader,nounits'
             ], capture_output=True, text=True, timeout=5)
@@ -368,21 +502,9 @@ class SelfHealingSystem:
             pass
         return 0.0
 
-    async def _measure_network_latency(self) -> float:
-        """Measure network latency"""
-        try:
-            result = subprocess.run(
-                ['ping', '-c', '1', '8.8.8.8'],
-                capture_output=True, text=True, timeout=5
-            )
-            
-            if result.returncode == 0:
-                match = re.search(r'time=(\d+\.?\d*)', result.stdout)
-                if match:
-                    return float(match.group(1))
-        except:
-            pass
-        return 0.0
+    def _measure_network_latency(self) -> Optional[float]:
+        """Median recent RTT from the latency probes, None when offline"""
+        return self.latency_probe.get_latency()
 
     async def _get_hyprland_metrics(self) -> Dict[str, Any]:
         """Get Hyprland-specific metrics"""
@@ -395,7 +517,7 @@ class SelfHealingSystem:
         
         try:
             # Get window count
-            result = subprocess.run(
+            result = timed_run(
                 ['hyprctl', 'clients'],
                 capture_output=True, text=True, timeout=5
             )
@@ -403,7 +525,7 @@ class SelfHealingSystem:
                 metrics['active_windows'] = result.stdout.count('class:')
             
             # Get workspace count
-            result = subprocess.run(
+            result = timed_run(
                 ['hyprctl', 'workspaces'],
                 capture_output=True, text=True, timeout=5
             )
@@ -420,6 +542,7 @@ class SelfHealingSystem:
     def _store_metrics(self, metrics: Dict[str, Any]):
         """Store metrics in database"""
         try:
+            write_start = time.perf_counter()
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
@@ -435,13 +558,14 @@ class SelfHealingSystem:
                 metrics.get('gpu_usage', 0),
                 metrics.get('cpu_temperature', 0),
                 metrics.get('disk_usage', 0),
-                metrics.get('network_latency', 0),
+                metrics.get('network_latency'),
                 metrics.get('active_processes', 0),
                 metrics.get('system_load', 0)
             ))
             
             conn.commit()
             conn.close()
+            DB_WRITE_SECONDS.observe(time.perf_counter() - write_start, store='healing')
         except Exception as e:
             logger.error(f"Error storing metrics: {e}")
 
@@ -468,6 +592,9 @@ class SelfHealingSystem:
         if not current_metrics.get('compositor_responsive', True):
             issues.append(self._create_compositor_issue(current_metrics))
         
+        # Kernel/journal log events
+        issues.extend(self._detect_log_issues(current_metrics))
+        
         # Check for patterns in historical data
         pattern_issues = await self._detect_pattern_issues()
         issues.extend(pattern_issues)
@@ -610,6 +737,67 @@ class SelfHealingSystem:
             auto_fixable=True
         )
 
+    def _log_event_triggered(self, condition: str, metrics: Dict[str, Any]) -> bool:
+        """Check a log event counter against its threshold"""
+        _, threshold_key = self.log_event_rules[condition]
+        return metrics.get(condition, 0) >= self.issue_detection_thresholds[threshold_key]
+
+    def _detect_log_issues(self, metrics: Dict[str, Any]) -> List[SystemIssue]:
+        """Create issues from kernel/journal log event counters"""
+        issue_specs = {
+            'gpu_hang': (
+                IssueCategory.GRAPHICS, IssueSeverity.CRITICAL, "GPU Hang Detected",
+                "GPU reset or hang events in the kernel log",
+                ["Display freezes", "Applications losing GPU context"],
+                ["GPU driver bug", "Overheating or unstable overclock", "Faulty hardware"],
+                ["Restart GPU driver", "Lower GPU load", "Update GPU drivers"]
+            ),
+            'display_corruption': (
+                IssueCategory.GRAPHICS, IssueSeverity.HIGH, "Display Pipeline Errors",
+                "DRM page-flip timeouts or FIFO underruns in the kernel log",
+                ["Flickering", "Corrupted or frozen frames"],
+                ["Display driver issues", "Refresh rate too high for the link"],
+                ["Lower refresh rate", "Check display cables"]
+            ),
+            'audio_glitches': (
+                IssueCategory.AUDIO, IssueSeverity.MEDIUM, "Audio Glitches",
+                "PipeWire reported buffer xruns",
+                ["Audio crackling", "Audio dropouts"],
+                ["Quantum too small", "CPU starvation of the audio thread"],
+                ["Restart PipeWire", "Increase audio buffer size"]
+            ),
+            'frequent_crashes': (
+                IssueCategory.STABILITY, IssueSeverity.CRITICAL, "Compositor Crashing",
+                "Hyprland crashed repeatedly within the last hour",
+                ["Session restarts", "Lost windows"],
+                ["Compositor bug", "Plugin or configuration errors", "GPU driver issues"],
+                ["Reset configuration", "Disable plugins", "Update Hyprland"]
+            )
+        }
+        
+        issues = []
+        for condition, (category, severity, title, description, symptoms,
+                        causes, fixes) in issue_specs.items():
+            if not self._log_event_triggered(condition, metrics):
+                continue
+            
+            window, _ = self.log_event_rules[condition]
+            issues.append(SystemIssue(
+                issue_id=f"log_{condition}_{int(time.time())}",
+                timestamp=time.time(),
+                category=category,
+                severity=severity,
+                title=title,
+                description=f"{description} ({metrics.get(condition, 0)} in the last {window // 60} minutes)",
+                symptoms=symptoms,
+                metrics={**metrics, 'log_condition': condition},
+                potential_causes=causes,
+                suggested_fixes=fixes,
+                auto_fixable=True
+            ))
+        
+        return issues
+
     async def _detect_pattern_issues(self) -> List[SystemIssue]:
         """Detect issues based on historical patterns"""
         issues = []
@@ -664,25 +852,43 @@ class SelfHealingSystem:
         first_half = values[:len(values)//2]
         second_half = values[len(values)//2:]
         
-        avg_first = sum(first_half) / len(first_half)
-        avg_second = sum(second_half) / len(second_half)
+        avg_first, _ = self._window_stats(first_half)
+        avg_second, _ = self._window_stats(second_half)
         
         return (avg_second - avg_first) > threshold
 
+    def _window_stats(self, values: List[float]) -> Tuple[float, float]:
+        """Mean and sample variance of a metric window"""
+        n = len(values)
+        if n == 0:
+            return 0.0, 0.0
+        
+        mean = sum(values) / n
+        variance = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else 0.0
+        return mean, variance
+
+    def _compare_windows(self, pre: List[float], post: List[float]) -> Tuple[float, float, float]:
+        """Compare pre/post windows; positive effect size means the metric went down"""
+        pre_mean, pre_var = self._window_stats(pre)
+        post_mean, post_var = self._window_stats(post)
+        
+        pooled_std = max(((pre_var + post_var) / 2) ** 0.5, self.min_metric_std)
+        effect_size = (pre_mean - post_mean) / pooled_std
+        
+        return pre_mean, post_mean, effect_size
+
     def _is_duplicate_issue(self, new_issue: SystemIssue) -> bool:
-        """Check if this is a duplicate of an existing issue"""
-        for existing_issue in self.active_issues.values():
-            if (existing_issue.category == new_issue.category and
-                existing_issue.title == new_issue.title):
-                return True
-        return False
+        """Check if this issue is already active, held quiet or damped as flapping"""
+        return not self.issue_registry.should_raise(new_issue.category.value, new_issue.fingerprint)
 
     async def _handle_new_issue(self, issue: SystemIssue):
         """Handle a newly detected issue"""
         logger.warning(f"Detected new issue: {issue.title}")
         
         # Store in active issues
-        self.active_issues[issue.issue_id] = issue
+        self._add_active_issue(issue)
+        self.issue_registry.register(issue.category.value, issue.fingerprint, issue.issue_id)
+        await self.events.publish(IssueRaised(issue.issue_id, issue.category.value, issue.severity.value, issue.title))
         
         # Store in database
         self._store_issue(issue)
@@ -727,29 +933,80 @@ class SelfHealingSystem:
         else:
             logger.info(f"LOW SEVERITY: {issue.title} - {issue.description}")
 
+    def subscribe_events(self, bus: EventBus) -> List[Subscription]:
+        """Publish issues and actions to bus; self-healing follows no other engine"""
+        self.events = bus
+        return []
+
+    def _add_active_issue(self, issue: SystemIssue):
+        self.active_issues[issue.issue_id] = issue
+        self.issue_counts.add(issue.issue_id, issue.severity)
+
+    def _remove_active_issue(self, issue_id: str):
+        del self.active_issues[issue_id]
+        self.issue_counts.remove(issue_id)
+
     async def _monitor_existing_issues(self):
         """Monitor existing issues for resolution or escalation"""
         for issue_id, issue in list(self.active_issues.items()):
+            # Issues must be held for a minimum time before they can clear, and an action
+            # on them must be verified first so the resolution is attributed to it
+            if (not self.issue_registry.can_clear(issue.category.value, issue.fingerprint)
+                    or issue_id in self._verifications):
+                continue
+            
             # Check if issue has been resolved naturally
             if await self._is_issue_resolved(issue):
                 logger.info(f"Issue resolved naturally: {issue.title}")
                 issue.resolved = True
                 issue.resolution_timestamp = time.time()
                 self.resolved_issues.append(issue)
-                del self.active_issues[issue_id]
+                self._remove_active_issue(issue_id)
+                await self.events.publish(IssueResolved(issue_id, issue.category.value))
+                self.issue_registry.clear(issue.category.value, issue.fingerprint)
                 self._update_issue_in_db(issue)
+                self._record_time_to_resolution(issue)
+
+    def _record_time_to_resolution(self, issue: SystemIssue):
+        """Attribute the resolution time of an issue to the last strategy applied to it"""
+        action = self._last_action_by_issue.pop(issue.issue_id, None)
+        if action is None or issue.resolution_timestamp is None:
+            return
+        
+        action.time_to_resolution = issue.resolution_timestamp - action.timestamp
+        self.strategy_ranker.record_resolution(
+            issue.category.value, action.action_type, action.time_to_resolution
+        )
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute(
+                'UPDATE healing_actions SET time_to_resolution = ? WHERE action_id = ?',
+                (action.time_to_resolution, action.action_id)
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error storing time to resolution: {e}")
 
     async def _is_issue_resolved(self, issue: SystemIssue) -> bool:
         """Check if an issue has been resolved"""
         current_metrics = self.system_metrics_history[-1] if self.system_metrics_history else {}
         
+        log_condition = issue.metrics.get('log_condition')
+        if log_condition in self.log_event_rules:
+            window, _ = self.log_event_rules[log_condition]
+            counts = {log_condition: self.log_ingestor.count(log_condition, window)}
+            return not self._log_event_triggered(log_condition, counts)
+        
         if issue.category == IssueCategory.PERFORMANCE:
             cpu_usage = current_metrics.get('cpu_usage', 100)
-            return cpu_usage < self.issue_detection_thresholds['cpu_usage'] * 0.8
+            return cpu_usage < self.issue_clear_thresholds['cpu_usage']
         
         elif issue.category == IssueCategory.MEMORY:
             memory_usage = current_metrics.get('memory_usage', 100)
-            return memory_usage < self.issue_detection_thresholds['memory_usage'] * 0.8
+            return memory_usage < self.issue_clear_thresholds['memory_usage']
         
         elif issue.category == IssueCategory.SYSTEM:
             if 'temperature' in issue.title.lower():
@@ -757,7 +1014,7 @@ class SelfHealingSystem:
                     current_metrics.get('cpu_temperature', 100),
                     current_metrics.get('gpu_temperature', 100)
                 )
-                return max_temp < self.issue_detection_thresholds['temperature'] * 0.8
+                return max_temp < self.issue_clear_thresholds['temperature']
         
         elif issue.category == IssueCategory.STABILITY:
             return current_metrics.get('compositor_responsive', False)
@@ -787,14 +1044,17 @@ class SelfHealingSystem:
     async def _perform_healing_actions(self):
         """Perform automated healing actions for active issues"""
         for issue_id, issue in self.active_issues.items():
-            if not issue.auto_fixable or issue.resolution_attempts > 2:
+            if not issue.auto_fixable or issue.resolution_attempts > 2 or issue_id in self._verifications:
                 continue
             
-            # Find appropriate healing strategies
-            strategies = self.healing_strategies.get(issue.category, [])
+            # Find appropriate healing strategies, best measured first
+            strategies, decision = self.strategy_ranker.rank(
+                issue.category.value, self.healing_strategies.get(issue.category, [])
+            )
             
             for strategy in strategies:
                 if await self._should_apply_strategy(strategy, issue):
+                    self.strategy_ranker.record_decision(decision, issue.issue_id, strategy['name'])
                     await self._apply_healing_strategy(strategy, issue)
                     break
 
@@ -820,8 +1080,8 @@ class SelfHealingSystem:
             return metrics.get('memory_usage', 0) > 95
         elif 'low_fps' in condition:
             return True  # Simplified
-        elif 'frequent_crashes' in condition:
-            return issue.category == IssueCategory.STABILITY
+        elif condition in self.log_event_rules:
+            return self._log_event_triggered(condition, metrics)
         elif 'compositor_hang' in condition:
             return not metrics.get('compositor_responsive', True)
         
@@ -843,108 +1103,208 @@ class SelfHealingSystem:
             config_changes={},
             success=False,
             error_message=None,
-            rollback_info=None
+            rollback_info=None,
+            category=issue.category.value
         )
         
+        target_metric = strategy.get('target_metric')
+        pre_window = self._recent_metric_window(target_metric) if target_metric else []
+        
         try:
             # Execute the healing action
-            success = await strategy['action'](issue)
-            action.success = success
-            
-            if success:
-                logger.info(f"Healing action successful: {strategy['description']}")
-                issue.resolution_attempts += 1
-            else:
-                logger.warning(f"Healing action failed: {strategy['description']}")
-                issue.resolution_attempts += 1
-            
+            result = await strategy['action'](issue)
+            action.success = bool(result)
+            if isinstance(result, dict):
+                action.config_changes = result
+                await self._publish_config_changes(result)
         except Exception as e:
             logger.error(f"Error executing healing strategy: {e}")
             action.error_message = str(e)
             action.success = False
-            issue.resolution_attempts += 1
+        
+        # Verify the effect and roll back remedies that did not help, without holding
+        # up the monitoring loop for the post-action window
+        if action.success and target_metric and len(pre_window) >= 2:
+            self._verifications[issue.issue_id] = asyncio.get_event_loop().create_task(
+                self._verify_and_record(action, strategy, issue, pre_window), name=f"verify:{action_id}")
+            return
+        
+        await self._record_healing_action(action, issue)
+
+    async def _verify_and_record(self, action: HealingAction, strategy: Dict[str, Any],
+                                 issue: SystemIssue, pre_window: List[float]):
+        """Post-action verification task; records the action once it is verified"""
+        try:
+            action.success = await self._verify_healing_action(action, strategy, issue, pre_window)
+        except Exception as e:
+            logger.error(f"Error verifying healing strategy: {e}")
+            action.error_message = str(e)
+            action.success = False
+        finally:
+            self._verifications.pop(issue.issue_id, None)
+        await self._record_healing_action(action, issue)
+
+    async def _record_healing_action(self, action: HealingAction, issue: SystemIssue):
+        """Count, store and publish the outcome of a finished (and verified) action"""
+        issue.resolution_attempts += 1
+        if action.success:
+            logger.info(f"Healing action successful: {action.description}")
+        else:
+            logger.warning(f"Healing action failed: {action.description}")
+        
+        if action.error_message:
+            outcome = 'error'
+        elif action.success:
+            outcome = 'success'
+        elif (action.rollback_info or {}).get('rolled_back'):
+            outcome = 'rolled_back'
+        else:
+            outcome = 'failed'
+        HEALING_ACTIONS.inc(strategy=action.action_type, outcome=outcome)
         
         # Store the action
         self.healing_history.append(action)
+        self.action_counts['total'] += 1
+        self.action_counts['successful'] += bool(action.success)
         self._store_healing_action(action)
+        self._last_action_by_issue[issue.issue_id] = action
+        self.strategy_ranker.record_outcome(
+            action.category, action.action_type, action.success, action.effect_size
+        )
+        await self.events.publish(ActionApplied(
+            issue.issue_id, action.action_type, action.success, dict(action.config_changes or {})))
+
+    def _ring_has(self, metric: str) -> bool:
+        return self.shared_metrics is not None and metric in SNAPSHOT_FIELDS
+
+    def _recent_metric_window(self, metric: str) -> List[float]:
+        """Last verification-window values of a metric, from the collector's ring when
+        attached, otherwise from the history"""
+        if self._ring_has(metric):
+            values = self.shared_metrics.column(metric, self.verification_window).tolist()
+            return [value for value in values if not np.isnan(value)]
+        recent = list(self.system_metrics_history)[-self.verification_window:]
+        return [m[metric] for m in recent if m.get(metric) is not None]
+
+    async def _collect_post_window(self, metric: str, after: float) -> List[float]:
+        """Values of a metric in the first verification-window monitoring samples taken
+        after a time, sampled like the pre-window; fewer if they don't arrive in time"""
+        if self._ring_has(metric):
+            # The collector stays the only sampler; its samples come every few seconds
+            deadline = time.time() + self.throttle.interval(self.monitoring_interval)
+            while True:
+                values = self.shared_metrics.since(metric, after, self.verification_window)
+                if len(values) >= self.verification_window or time.time() > deadline:
+                    return values
+                await asyncio.sleep(1.0)
+        interval = self.throttle.interval(self.monitoring_interval)
+        deadline = time.time() + (self.verification_window + 2) * interval
+        while True:
+            values = [m[metric] for m in list(self.system_metrics_history)
+                      if m.get('timestamp', 0) > after and m.get(metric) is not None]
+            if len(values) >= self.verification_window or time.time() > deadline:
+                return values[:self.verification_window]
+            await asyncio.sleep(interval / 2)
+
+    async def _verify_healing_action(self, action: HealingAction, strategy: Dict[str, Any],
+                                     issue: SystemIssue, pre_window: List[float]) -> bool:
+        """Measure the effect of an applied action and roll it back if it did not help"""
+        metric = strategy['target_metric']
+        post_window = await self._collect_post_window(metric, action.timestamp)
+        if len(post_window) < 2:
+            logger.warning(f"Could not verify {strategy['name']}: no samples for {metric}")
+            return True
+        
+        pre_mean, post_mean, effect_size = self._compare_windows(pre_window, post_window)
+        improved = effect_size >= self.min_effect_size
+        action.effect_size = effect_size
+        action.rollback_info = {
+            'target_metric': metric,
+            'pre_mean': pre_mean,
+            'post_mean': post_mean,
+            'improved': improved,
+            'rollback_available': strategy.get('rollback') is not None,
+            'rolled_back': False
+        }
+        
+        logger.info(f"Verified {strategy['name']}: {metric} {pre_mean:.1f} -> {post_mean:.1f} "
+                    f"(effect size {effect_size:.2f})")
+        
+        if not improved and strategy.get('rollback'):
+            logger.warning(f"No significant improvement from {strategy['name']}, rolling back")
+            try:
+                result = await strategy['rollback'](issue)
+                action.rollback_info['rolled_back'] = bool(result)
+                if isinstance(result, dict):
+                    action.rollback_info['rollback_changes'] = result
+                    await self._publish_config_changes(result)
+            except Exception as e:
+                logger.error(f"Error rolling back {strategy['name']}: {e}")
+                action.rollback_info['rollback_error'] = str(e)
+        
+        return improved
 
     def _store_healing_action(self, action: HealingAction):
         """Store healing action in database"""
         try:
+            write_start = time.perf_counter()
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
                 INSERT INTO healing_actions 
                 (action_id, timestamp, issue_id, action_type, description,
-                 command, config_changes, success, error_message, rollback_info)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 command, config_changes, success, error_message, rollback_info,
+                 effect_size, category)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 action.action_id, action.timestamp, action.issue_id,
                 action.action_type, action.description, action.command,
                 json.dumps(action.config_changes), action.success,
-                action.error_message, json.dumps(action.rollback_info)
+                action.error_message, json.dumps(action.rollback_info),
+                action.effect_size, action.category
             ))
             
             conn.commit()
             conn.close()
+            DB_WRITE_SECONDS.observe(time.perf_counter() - write_start, store='healing')
         except Exception as e:
             logger.error(f"Error storing healing action: {e}")
 
-    # Healing strategy implementations
-    async def _reduce_animations(self, issue: SystemIssue) -> bool:
-        """Reduce animations to improve performance"""
+    async def _publish_config_changes(self, changes: Dict[str, str]):
+        """Let the other engines know which options healing changed"""
+        if changes:
+            await self.events.publish(ConfigApplied('self_healing', dict(changes)))
+
+    def _set_keywords(self, keywords: Dict[str, str]) -> Dict[str, str]:
+        """Set compositor keywords in order, stopping at the first failure; returns those set"""
+        applied = {}
         try:
-            commands = [
-                ['hyprctl', 'keyword', 'animations:enabled', 'no'],
-                ['hyprctl', 'keyword', 'decoration:blur:enabled', 'no']
-            ]
-            
-            for cmd in commands:
-                result = subprocess.run(cmd, capture_output=True, text=True)
+            for key, value in keywords.items():
+                result = subprocess.run(['hyprctl', 'keyword', key, value], capture_output=True, text=True)
                 if result.returncode != 0:
-                    return False
-            
-            return True
-        except Exception:
-            return False
+                    break
+                applied[key] = value
+        except Exception as e:
+            logger.error(f"Error setting compositor keywords: {e}")
+        return applied
 
-    async def _restore_animations(self, issue: SystemIssue) -> bool:
+    # Healing strategy implementations
+    async def _reduce_animations(self, issue: SystemIssue) -> Dict[str, str]:
+        """Reduce animations to improve performance"""
+        return self._set_keywords({'animations:enabled': 'no', 'decoration:blur:enabled': 'no'})
+
+    async def _restore_animations(self, issue: SystemIssue) -> Dict[str, str]:
         """Restore animations"""
-        try:
-            commands = [
-                ['hyprctl', 'keyword', 'animations:enabled', 'yes'],
-                ['hyprctl', 'keyword', 'decoration:blur:enabled', 'yes']
-            ]
-            
-            for cmd in commands:
-                subprocess.run(cmd, capture_output=True, text=True)
-            
-            return True
-        except Exception:
-            return False
+        return self._set_keywords({'animations:enabled': 'yes', 'decoration:blur:enabled': 'yes'})
 
-    async def _disable_blur(self, issue: SystemIssue) -> bool:
+    async def _disable_blur(self, issue: SystemIssue) -> Dict[str, str]:
         """Disable blur effects"""
-        try:
-            result = subprocess.run(
-                ['hyprctl', 'keyword', 'decoration:blur:enabled', 'no'],
-                capture_output=True, text=True
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
+        return self._set_keywords({'decoration:blur:enabled': 'no'})
 
-    async def _enable_blur(self, issue: SystemIssue) -> bool:
+    async def _enable_blur(self, issue: SystemIssue) -> Dict[str, str]:
         """Enable blur effects"""
-        try:
-            result = subprocess.run(
-                ['hyprctl', 'keyword', 'decoration:blur:enabled', 'yes'],
-                capture_output=True, text=True
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
+        return self._set_keywords({'decoration:blur:enabled': 'yes'})
 
     async def _kill_resource_hogs(self, issue: SystemIssue) -> bool:
         """Kill processes consuming excessive resources"""
@@ -1031,27 +1391,13 @@ class SelfHealingSystem:
         except Exception:
             return False
 
-    async def _adjust_refresh_rate(self, issue: SystemIssue) -> bool:
+    async def _adjust_refresh_rate(self, issue: SystemIssue) -> Dict[str, str]:
         """Lower display refresh rate"""
-        try:
-            result = subprocess.run(
-                ['hyprctl', 'keyword', 'monitor', ',preferred,auto,1,60'],
-                capture_output=True, text=True
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
+        return self._set_keywords({'monitor': ',preferred,auto,1,60'})
 
-    async def _restore_refresh_rate(self, issue: SystemIssue) -> bool:
+    async def _restore_refresh_rate(self, issue: SystemIssue) -> Dict[str, str]:
         """Restore display refresh rate"""
-        try:
-            result = subprocess.run(
-                ['hyprctl', 'keyword', 'monitor', ',preferred,auto,1'],
-                capture_output=True, text=True
-            )
-            return result.returncode == 0
-        except Exception:
-            return False
+        return self._set_keywords({'monitor': ',preferred,auto,1'})
 
     async def _reset_to_defaults(self, issue: SystemIssue) -> bool:
         """Reset to last known good configuration"""
@@ -1078,9 +1424,10 @@ class SelfHealingSystem:
             
             # Load active issues
             cursor.execute('''
-                SELECT * FROM system_issues WHERE resolved = 0
+                SELECT * FROM system_issues WHERE resolved = 0 ORDER BY timestamp DESC
             ''')
             
+            duplicates = []
             for row in cursor.fetchall():
                 issue_id, timestamp, category, severity, title, description, \
                 symptoms, metrics, potential_causes, suggested_fixes, \
@@ -1103,7 +1450,22 @@ class SelfHealingSystem:
                     resolution_timestamp=resolution_timestamp
                 )
                 
-                self.active_issues[issue_id] = issue
+                # Keep only the newest open issue per fingerprint
+                if self.issue_registry.get_active(issue.category.value, issue.fingerprint):
+                    duplicates.append(issue_id)
+                    continue
+                
+                self._add_active_issue(issue)
+                self.issue_registry.register(
+                    issue.category.value, issue.fingerprint, issue_id, now=issue.timestamp
+                )
+            
+            if duplicates:
+                cursor.executemany(
+                    'UPDATE system_issues SET resolved = 1, resolution_timestamp = ? WHERE issue_id = ?',
+                    [(time.time(), issue_id) for issue_id in duplicates]
+                )
+                conn.commit()
             
             conn.close()
             logger.info(f"Loaded {len(self.active_issues)} active issues")
@@ -1111,6 +1473,31 @@ class SelfHealingSystem:
         except Exception as e:
             logger.error(f"Error loading system state: {e}")
 
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """Warm-start state: numeric metrics as columns, NaN where a sample lacks one"""
+        history = list(self.system_metrics_history)
+        numeric = lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+        columns = sorted({key for metrics in history for key, value in metrics.items() if numeric(value)})
+        integer = [all(isinstance(metrics[key], int) for metrics in history if numeric(metrics.get(key)))
+                   for key in columns]
+        values = np.full((len(history), len(columns)), np.nan)
+        for row, metrics in enumerate(history):
+            for column, key in enumerate(columns):
+                value = metrics.get(key)
+                if numeric(value):
+                    values[row, column] = value
+        return {'metrics_columns': columns, 'integer_columns': integer, 'metrics_history': values}
+
+    def restore_checkpoint(self, state: Dict[str, Any]):
+        """Refill the metrics history so trend detection works from the first cycle"""
+        columns = list(zip(state['metrics_columns'], state['integer_columns']))
+        for row in state['metrics_history'][-self.system_metrics_history.maxlen:].tolist():
+            self.system_metrics_history.append({
+                key: int(value) if integer else value
+                for (key, integer), value in zip(columns, row) if value == value  # NaN: not sampled
+            })
+        logger.info(f"Restored {len(self.system_metrics_history)} metrics samples")
+
     async def _cleanup_old_data(self):
         """Clean up old data to prevent database bloat"""
         try:
@@ -1160,32 +1547,52 @@ class SelfHealingSystem:
                     "type": action.action_type,
                     "description": action.description,
                     "success": action.success,
+                    "effect_size": action.effect_size,
                     "timestamp": action.timestamp
                 }
                 for action in self.healing_history[-10:]
             ],
             "system_health": {
-                "critical_issues": len([i for i in self.active_issues.values() if i.severity == IssueSeverity.CRITICAL]),
-                "high_priority_issues": len([i for i in self.active_issues.values() if i.severity == IssueSeverity.HIGH]),
+                "critical_issues": self.issue_counts[IssueSeverity.CRITICAL],
+                "high_priority_issues": self.issue_counts[IssueSeverity.HIGH],
                 "auto_healing_success_rate": self._calculate_success_rate()
-            }
+            },
+            "strategy_effectiveness": self.strategy_ranker.get_summary(),
+            "log_events_last_hour": self.log_ingestor.get_counters(3600),
+            "network_probes": self.latency_probe.get_report(),
+            "issue_registry": self.issue_registry.get_stats()
+        }
+
+    @property
+    def status_summary(self) -> Dict[str, Any]:
+        """What the orchestrator's status needs, in constant time"""
+        return {
+            "active_issues": len(self.active_issues),
+            "critical_issues": self.issue_counts[IssueSeverity.CRITICAL],
+            "high_priority_issues": self.issue_counts[IssueSeverity.HIGH],
+            "healing_actions": self.action_counts['total'],
+            "success_rate": self._calculate_success_rate()
         }
 
     def _calculate_success_rate(self) -> float:
         """Calculate auto-healing success rate"""
-        if not self.healing_history:
+        if not self.action_counts['total']:
             return 0.0
         
-        successful_actions = len([a for a in self.healing_history if a.success])
-        return (successful_actions / len(self.healing_history)) * 100
+        return (self.action_counts['successful'] / self.action_counts['total']) * 100
 
     def stop_monitoring(self):
         """Stop the monitoring system"""
         logger.info("Stopping self-healing monitoring")
         self.monitoring_active = False
+        for task in self._verifications.values():
+            task.cancel()
+        self.log_ingestor.stop()
+        self.latency_probe.stop()
 
 async def main():
     """Main entry point for self-healing system"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     healing_system = SelfHealingSystem()
     
     try:
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Shared Metric Snapshots
+Host metric samples published by a single collector process into a
+multiprocessing.shared_memory ring buffer, read in place by the engine workers
+and the orchestrator
+"""
+
+import logging
+import math
+import os
+import shutil
+import subprocess
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Snapshot columns; host metrics both the optimizer and self-healing used to sample themselves
+SNAPSHOT_FIELDS = (
+    'timestamp', 'cpu_usage', 'memory_usage', 'disk_usage', 'system_load', 'active_processes',
+    'io_read', 'io_write', 'network_sent', 'network_recv', 'cpu_temperature',
+    'gpu_usage', 'gpu_memory', 'gpu_temperature', 'battery_level'
+)
+_INDEX = {name: i for i, name in enumerate(SNAPSHOT_FIELDS)}
+
+_MAGIC = 0x48595052  # 'HYPR'
+_HEADER_WORDS = 4  # magic, slots, fields, published samples
+
+class MetricsRing:
+    """Single-writer ring of float64 snapshots in shared memory
+
+    Each slot holds the sequence number of the sample in it followed by the
+    fields. The writer clears the sequence number before overwriting a slot and
+    stamps it last, so readers detect samples that changed while being read.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self._header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        if self._header[0] != _MAGIC:
+            raise ValueError(f"Shared memory {shm.name} does not hold a metrics ring")
+        slots, fields = int(self._header[1]), int(self._header[2])
+        self._slots = np.ndarray((slots, fields + 1), dtype=np.float64, buffer=shm.buf,
+                                 offset=_HEADER_WORDS * 8)
+
+    @classmethod
+    def create(cls, slots: int = 256, name: Optional[str] = None) -> 'MetricsRing':
+        size = _HEADER_WORDS * 8 + slots * (len(SNAPSHOT_FIELDS) + 1) * 8
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (_MAGIC, slots, len(SNAPSHOT_FIELDS), 0)
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'MetricsRing':
+        # Workers are spawned by the owner and share its resource tracker, so the
+        # segment stays registered once and is unlinked by the owner only
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def published(self) -> int:
+        return int(self._header[3])
+
+    def publish(self, sample: Dict[str, Any]):
+        """Write one sample; missing or None fields are stored as NaN"""
+        seq = self.published + 1
+        row = self._slots[seq % len(self._slots)]
+        row[0] = 0
+        row[1:] = [math.nan if sample.get(name) is None else sample[name] for name in SNAPSHOT_FIELDS]
+        row[0] = seq
+        self._header[3] = seq
+
+    def latest_view(self) -> Optional[np.ndarray]:
+        """Zero-copy view of the newest slot (sequence number, fields...); None before the first sample"""
+        seq = self.published
+        if seq == 0:
+            return None
+        return self._slots[seq % len(self._slots)]
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[Dict[str, Optional[float]]]:
+        """Newest sample as a dict, None when there is none or it is older than max_age seconds"""
+        for _ in range(3):
+            seq = self.published
+            if seq == 0:
+                return None
+            row = self._slots[seq % len(self._slots)]
+            values = row[1:].tolist()
+            if row[0] == seq:
+                break
+        else:
+            return None
+
+        sample = {name: None if math.isnan(value) else value for name, value in zip(SNAPSHOT_FIELDS, values)}
+        if max_age is not None and time.time() - sample['timestamp'] > max_age:
+            return None
+        return sample
+
+    def column(self, field: str, count: int) -> np.ndarray:
+        """Last count values of one field, oldest first"""
+        seq = self.published
+        count = min(count, seq, len(self._slots) - 1)
+        if count <= 0:
+            return np.empty(0)
+        indexes = np.arange(seq - count + 1, seq + 1) % len(self._slots)
+        return self._slots[indexes, _INDEX[field] + 1]
+
+    def since(self, field: str, timestamp: float, count: int) -> List[float]:
+        """Up to count values of one field from samples taken after timestamp, oldest
+        first; NaNs and slots overwritten while being read are left out"""
+        seq = self.published
+        available = min(seq, len(self._slots) - 1)
+        if available <= 0:
+            return []
+        sequences = np.arange(seq - available + 1, seq + 1)
+        rows = self._slots[sequences % len(self._slots)]  # Copy
+        rows = rows[(rows[:, 0] == sequences) & (rows[:, _INDEX['timestamp'] + 1] > timestamp)]
+        values = rows[:, _INDEX[field] + 1]
+        return values[~np.isnan(values)][:count].tolist()
+
+    def close(self):
+        self._header = self._slots = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        latest = self.latest()
+        return {
+            "name": self.name,
+            "slots": len(self._slots),
+            "published": self.published,
+            "latest_age_s": round(time.time() - latest['timestamp'], 1) if latest else None
+        }
+
+def collect_host_metrics(gpu: bool = True) -> Dict[str, Any]:
+    """One non-blocking host sample; CPU usage is measured since the previous call"""
+    import psutil
+
+    memory = psutil.virtual_memory()
+    io = psutil.disk_io_counters()
+    net = psutil.net_io_counters()
+    sample = {
+        'timestamp': time.time(),
+        'cpu_usage': psutil.cpu_percent(interval=None),
+        'memory_usage': memory.percent,
+        'disk_usage': psutil.disk_usage('/').percent,
+        'system_load': os.getloadavg()[0],
+        'active_processes': len(psutil.pids()),
+        'io_read': io.read_bytes if io else 0,
+        'io_write': io.write_bytes if io else 0,
+        'network_sent': net.bytes_sent if net else 0,
+        'network_recv': net.bytes_recv if net else 0,
+        'cpu_temperature': 0.0,
+        'battery_level': 100.0
+    }
+
+    try:
+        temps = psutil.sensors_temperatures()
+        for chip in ('coretemp', 'k10temp'):
+            if chip in temps:
+                sample['cpu_temperature'] = temps[chip][0].current
+                break
+    except (AttributeError, OSError):
+        pass
+
+    try:
+        battery = psutil.sensors_battery()
+        if battery:
+            sample['battery_level'] = battery.percent
+    except (AttributeError, OSError):
+        pass
+
+    if gpu:
+        try:
+            result = subprocess.run([
+                'nvidia-smi', '--query-gpu=utilization.gpu,memory.used,memory.total,temperature.gpu',
+                '--format=csv,noheader,nounits'
+            ], capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                usage, used, total, temperature = (float(v) for v in result.stdout.strip().split(', ')[:4])
+                sample.update(gpu_usage=usage, gpu_memory=used / total * 100, gpu_temperature=temperature)
+        except (OSError, ValueError, subprocess.SubprocessError):
+            pass
+
+    return sample
+
+def run_collector(ring_name: str, interval: float, stop_event, gpu_every: int = 5):
+    """Collector process entry point: publish a host sample every interval seconds"""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Shutdown is driven by the orchestrator
+
+    ring = MetricsRing.attach(ring_name)
+    has_gpu = shutil.which('nvidia-smi') is not None
+    last_gpu: Dict[str, Any] = {}
+    collect_host_metrics(gpu=False)  # Prime the CPU usage counter
+
+    samples = 0
+    try:
+        while not stop_event.wait(interval):
+            try:
+                # nvidia-smi is a process spawn; GPU values are refreshed every gpu_every samples
+                sample_gpu = has_gpu and samples % gpu_every == 0
+                sample = collect_host_metrics(gpu=sample_gpu)
+                if sample_gpu:
+                    last_gpu = {key: sample.get(key) for key in ('gpu_usage', 'gpu_memory', 'gpu_temperature')}
+                ring.publish({**last_gpu, **sample})
+                samples += 1
+            except Exception as e:
+                logger.error(f"Error collecting host metrics: {e}")
+    finally:
+        ring.close()
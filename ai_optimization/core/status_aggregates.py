@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Status Aggregates
+Running aggregates the engines update as samples and events arrive, so a
+status summary is produced in constant time instead of walking histories
+"""
+
+import math
+from collections import Counter, deque
+from typing import Any, Dict, Hashable, Iterable
+
+class WindowedMean:
+    """Mean of the last size values, updated in O(1) per value"""
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self._adds = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value: float):
+        if len(self.values) == self.values.maxlen:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self._adds += 1
+        if self._adds % (self.values.maxlen * 64) == 0:
+            self.total = math.fsum(self.values)  # Bound the drift of subtracting floats
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else 0.0
+
+    @property
+    def last(self) -> float:
+        return self.values[-1] if self.values else 0.0
+
+class WindowedMeans:
+    """WindowedMean per field of records appended to a history"""
+
+    def __init__(self, fields: Iterable[str], size: int):
+        self.size = size
+        self.means = {name: WindowedMean(size) for name in fields}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.means.values()), ()))
+
+    def add(self, record: Any):
+        for name, mean in self.means.items():
+            mean.add(getattr(record, name))
+
+    def mean(self, name: str) -> float:
+        return self.means[name].mean
+
+    def last(self, name: str) -> float:
+        return self.means[name].last
+
+class TallyCounter:
+    """Live counts by key of items that come and go, e.g. open issues by severity"""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self._keys: Dict[Hashable, Hashable] = {}  # Item id -> key it is counted under
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, item_id: Hashable, key: Hashable):
+        self.remove(item_id)  # Re-adding an item moves it instead of counting it twice
+        self._keys[item_id] = key
+        self.counts[key] += 1
+
+    def remove(self, item_id: Hashable):
+        key = self._keys.pop(item_id, None)
+        if key is not None:
+            self.counts[key] -= 1
+
+    def __getitem__(self, key: Hashable) -> int:
+        return self.counts[key]
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Healing Strategy Ranker
+Orders healing strategies per issue category by their measured effectiveness and cost
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StrategyStats:
+    """Observed outcomes of one strategy within one issue category"""
+    successes: int = 0
+    failures: int = 0
+    effect_total: float = 0.0
+    effect_samples: int = 0
+    resolution_time_total: float = 0.0
+    resolution_samples: int = 0
+
+    @property
+    def trials(self) -> int:
+        return self.successes + self.failures
+
+    @property
+    def mean_effect(self) -> float:
+        return self.effect_total / self.effect_samples if self.effect_samples else 0.0
+
+    @property
+    def mean_time_to_resolution(self) -> Optional[float]:
+        if not self.resolution_samples:
+            return None
+        return self.resolution_time_total / self.resolution_samples
+
+@dataclass
+class RankingDecision:
+    """A single ranking of the strategies for an issue category"""
+    timestamp: float
+    category: str
+    policy: str  # 'static' or 'thompson'
+    ranking: List[str]
+    scores: Dict[str, float] = field(default_factory=dict)
+
+class StrategyRanker:
+    """Thompson-sampling ranker over healing strategy outcomes"""
+
+    def __init__(self, db_path: Path, seed: Optional[int] = None):
+        self.db_path = db_path
+        self.rng = random.Random(seed)
+
+        # (category, strategy name) -> stats
+        self.stats: Dict[Tuple[str, str], StrategyStats] = {}
+
+        # Score shaping on top of the sampled success rate
+        self.effect_weight = 0.1  # per unit of mean effect size, clamped to +-2
+        self.cost_weight = 0.2  # per unit of user-visible cost (0-1)
+        self.time_weight = 0.1  # full penalty at max_resolution_time
+        self.max_resolution_time = 600.0  # seconds
+
+        self._init_database()
+        self.load_history()
+
+    def _init_database(self):
+        """Create the decision audit table"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS strategy_decisions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp REAL,
+                issue_id TEXT,
+                category TEXT,
+                policy TEXT,
+                ranking TEXT,
+                scores TEXT,
+                chosen TEXT
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def load_history(self):
+        """Rebuild strategy statistics from the healing_actions table"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                SELECT ha.action_type, COALESCE(ha.category, si.category),
+                       ha.success, ha.effect_size, ha.time_to_resolution
+                FROM healing_actions ha
+                LEFT JOIN system_issues si ON ha.issue_id = si.issue_id
+            ''')
+            rows = cursor.fetchall()
+            conn.close()
+
+            self.stats.clear()
+            for action_type, category, success, effect_size, time_to_resolution in rows:
+                if category is None:
+                    continue
+                self.record_outcome(category, action_type, bool(success), effect_size)
+                if time_to_resolution is not None:
+                    self.record_resolution(category, action_type, time_to_resolution)
+
+            logger.info(f"Loaded healing history for {len(self.stats)} strategies ({len(rows)} actions)")
+
+        except Exception as e:
+            logger.error(f"Error loading healing history: {e}")
+
+    def record_outcome(self, category: str, strategy_name: str, success: bool,
+                       effect_size: Optional[float] = None):
+        """Update statistics with the outcome of an applied strategy"""
+        stats = self.stats.setdefault((category, strategy_name), StrategyStats())
+        if success:
+            stats.successes += 1
+        else:
+            stats.failures += 1
+
+        if effect_size is not None:
+            stats.effect_total += effect_size
+            stats.effect_samples += 1
+
+    def record_resolution(self, category: str, strategy_name: str, seconds: float):
+        """Update statistics with the time an issue took to resolve after the strategy ran"""
+        stats = self.stats.setdefault((category, strategy_name), StrategyStats())
+        stats.resolution_time_total += seconds
+        stats.resolution_samples += 1
+
+    def rank(self, category: str, strategies: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], RankingDecision]:
+        """Order strategies for a category, falling back to the static order without data"""
+        names = [strategy['name'] for strategy in strategies]
+
+        if not any(self.stats.get((category, name)) for name in names):
+            return list(strategies), RankingDecision(
+                timestamp=time.time(), category=category, policy='static', ranking=names
+            )
+
+        scores = {strategy['name']: self._score(category, strategy) for strategy in strategies}
+        ordered = sorted(strategies, key=lambda s: scores[s['name']], reverse=True)
+
+        return ordered, RankingDecision(
+            timestamp=time.time(),
+            category=category,
+            policy='thompson',
+            ranking=[strategy['name'] for strategy in ordered],
+            scores=scores
+        )
+
+    def _score(self, category: str, strategy: Dict[str, Any]) -> float:
+        """Sample a score for a strategy from its posterior"""
+        stats = self.stats.get((category, strategy['name']), StrategyStats())
+
+        # Beta(1, 1) prior keeps untried strategies in the exploration set
+        score = self.rng.betavariate(1 + stats.successes, 1 + stats.failures)
+        score += self.effect_weight * max(min(stats.mean_effect, 2.0), -2.0)
+        score -= self.cost_weight * strategy.get('cost', 0.0)
+
+        resolution_time = stats.mean_time_to_resolution
+        if resolution_time is not None:
+            score -= self.time_weight * min(resolution_time / self.max_resolution_time, 1.0)
+
+        return score
+
+    def record_decision(self, decision: RankingDecision, issue_id: str, chosen: Optional[str]):
+        """Log a ranking decision for audit"""
+        logger.info(f"Strategy ranking for {decision.category} ({decision.policy}): "
+                    f"{' > '.join(decision.ranking)} -> {chosen}")
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                INSERT INTO strategy_decisions
+                (timestamp, issue_id, category, policy, ranking, scores, chosen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                decision.timestamp, issue_id, decision.category, decision.policy,
+                json.dumps(decision.ranking), json.dumps(decision.scores), chosen
+            ))
+
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error storing strategy decision: {e}")
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Per-strategy statistics for reports"""
+        return {
+            f"{category}/{name}": {
+                "trials": stats.trials,
+                "success_rate": stats.successes / stats.trials if stats.trials else None,
+                "mean_effect_size": stats.mean_effect,
+                "mean_time_to_resolution": stats.mean_time_to_resolution
+            }
+            for (category, name), stats in self.stats.items()
+        }
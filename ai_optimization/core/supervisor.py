@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Engine Supervisor
+Runs each engine loop as its own task, watches the heartbeat the loop stamps on
+its engine (`last_heartbeat`, a time.monotonic() value) and rebuilds engines that
+crash or stall, backing off exponentially while they keep failing
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .metrics_exporter import CURRENT_ENGINE, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ENGINE_RESTARTS = REGISTRY.counter(
+    'hyprland_ai_engine_restarts', 'Engine restarts by the supervisor', ['engine', 'reason'])
+ENGINE_UP = REGISTRY.gauge(
+    'hyprland_ai_engine_up', 'Whether an engine loop is running', ['engine'])
+
+@dataclass
+class SupervisedEngine:
+    """An engine, how to build, run and stop it, and its supervision state"""
+    name: str
+    factory: Callable[[], Any]  # Builds a fresh engine
+    run: Callable[[Any], Awaitable]  # The engine's main loop
+    stop: Optional[Callable[[Any], Any]] = None  # Cleanup before a restart, may be a coroutine
+    stall_timeout: float = 300.0  # Seconds without a heartbeat before the engine counts as stalled
+
+    engine: Any = None
+    task: Optional[asyncio.Task] = None
+    state: str = 'stopped'  # running, backoff, restarting, stopped
+    started_at: float = 0.0
+    next_start: Optional[float] = None  # Monotonic time of the scheduled restart
+    restarts: int = 0
+    consecutive_failures: int = 0
+    restart_reasons: Dict[str, int] = field(default_factory=dict)
+    last_error: Optional[str] = None
+
+    def heartbeat_age(self, now: float) -> Optional[float]:
+        if self.state != 'running':
+            return None
+        beat = getattr(self.engine, 'last_heartbeat', None)
+        return now - max(beat or 0.0, self.started_at)
+
+class EngineSupervisor:
+    """Restarts crashed or stalled engines with exponential backoff"""
+
+    def __init__(self, check_interval: float = 5.0, initial_backoff: float = 2.0,
+                 max_backoff: float = 300.0, stable_after: float = 600.0, stop_timeout: float = 10.0):
+        self.check_interval = check_interval
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after  # Running this long resets the backoff
+        self.stop_timeout = stop_timeout
+
+        self.engines: Dict[str, SupervisedEngine] = {}
+        self.running = False
+        self.loop_lag_ms = 0.0  # How late the last check ran; large values mean something blocks the loop
+        self.max_loop_lag_ms = 0.0
+
+    def register(self, name: str, factory: Callable[[], Any], run: Callable[[Any], Awaitable],
+                 stop: Optional[Callable[[Any], Any]] = None, stall_timeout: float = 300.0):
+        self.engines[name] = SupervisedEngine(name, factory, run, stop, stall_timeout)
+
+    def engine(self, name: str) -> Any:
+        """The running engine instance, None while it is down"""
+        supervised = self.engines.get(name)
+        return supervised.engine if supervised and supervised.state == 'running' else None
+
+    def _start(self, supervised: SupervisedEngine) -> bool:
+        """Build the engine and start its loop; failures are scheduled for a retry"""
+        try:
+            supervised.engine = supervised.factory()
+        except Exception as e:
+            # Import and construction errors stay confined to this engine
+            logger.error(f"Failed to start {supervised.name}: {e}")
+            self._schedule_restart(supervised, 'start_failed', str(e))
+            return False
+
+        supervised.started_at = time.monotonic()
+        supervised.task = asyncio.get_event_loop().create_task(
+            self._run(supervised), name=supervised.name
+        )
+        supervised.state = 'running'
+        supervised.next_start = None
+        ENGINE_UP.set(1, engine=supervised.name)
+        logger.info(f"✓ {supervised.name} started")
+        return True
+
+    async def _run(self, supervised: SupervisedEngine):
+        # Tasks the engine starts inherit the context, so their spawns are attributed to it
+        CURRENT_ENGINE.set(supervised.name)
+        await supervised.run(supervised.engine)
+
+    def _schedule_restart(self, supervised: SupervisedEngine, reason: str, error: Optional[str]):
+        delay = min(self.initial_backoff * 2 ** supervised.consecutive_failures, self.max_backoff)
+        supervised.consecutive_failures += 1
+        supervised.last_error = error
+        supervised.restart_reasons[reason] = supervised.restart_reasons.get(reason, 0) + 1
+        supervised.engine = None
+        supervised.task = None
+        supervised.state = 'backoff'
+        supervised.next_start = time.monotonic() + delay
+        ENGINE_UP.set(0, engine=supervised.name)
+        logger.warning(f"{supervised.name} {reason}, restarting in {delay:.0f}s")
+
+    async def _stop_engine(self, supervised: SupervisedEngine):
+        """Cancel the loop and run the engine's cleanup"""
+        task, engine = supervised.task, supervised.engine
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await asyncio.wait_for(asyncio.shield(task), self.stop_timeout)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                pass
+            except Exception as e:
+                logger.debug(f"{supervised.name} raised while stopping: {e}")
+        if engine is not None and supervised.stop is not None:
+            try:
+                result = supervised.stop(engine)
+                if inspect.isawaitable(result):
+                    await asyncio.wait_for(result, self.stop_timeout)
+            except Exception as e:
+                logger.error(f"Error stopping {supervised.name}: {e}")
+        supervised.task = None
+
+    async def _fail(self, supervised: SupervisedEngine, reason: str, error: Optional[str]):
+        supervised.state = 'restarting'
+        await self._stop_engine(supervised)
+        supervised.restarts += 1
+        ENGINE_RESTARTS.inc(engine=supervised.name, reason=reason)
+        self._schedule_restart(supervised, reason, error)
+
+    async def restart(self, name: str) -> Dict[str, Any]:
+        """Restart an engine now, clearing its backoff"""
+        supervised = self.engines.get(name)
+        if supervised is None:
+            return {"error": f"Unknown component: {name}"}
+
+        supervised.state = 'restarting'  # Keeps check() from seeing the cancelled loop as a crash
+        await self._stop_engine(supervised)
+        supervised.restarts += 1
+        supervised.consecutive_failures = 0
+        supervised.restart_reasons['manual'] = supervised.restart_reasons.get('manual', 0) + 1
+        ENGINE_RESTARTS.inc(engine=name, reason='manual')
+        if not self._start(supervised):
+            return {"error": f"{name} failed to start: {supervised.last_error}"}
+        return {"status": f"restarted {name}", "restarts": supervised.restarts}
+
+    async def check(self):
+        """One supervision pass over all engines"""
+        now = time.monotonic()
+        for supervised in self.engines.values():
+            if supervised.state == 'backoff':
+                if now >= supervised.next_start:
+                    self._start(supervised)
+                continue
+            if supervised.state != 'running':
+                continue
+
+            task = supervised.task
+            if task.done():
+                if task.cancelled():
+                    error = 'cancelled'
+                else:
+                    error = repr(task.exception()) if task.exception() else 'loop returned'
+                logger.error(f"{supervised.name} stopped unexpectedly: {error}")
+                await self._fail(supervised, 'crashed', error)
+            elif supervised.heartbeat_age(now) > supervised.stall_timeout:
+                logger.error(f"{supervised.name} has not reported for {supervised.heartbeat_age(now):.0f}s")
+                await self._fail(supervised, 'stalled', f"No heartbeat for {supervised.stall_timeout:.0f}s")
+            elif supervised.consecutive_failures and now - supervised.started_at > self.stable_after:
+                supervised.consecutive_failures = 0
+
+    async def run(self):
+        """Start every registered engine and supervise them until stop_all"""
+        self.running = True
+        for supervised in self.engines.values():
+            self._start(supervised)
+
+        while self.running:
+            expected = time.monotonic() + self.check_interval
+            await asyncio.sleep(self.check_interval)
+            self.loop_lag_ms = max(0.0, (time.monotonic() - expected) * 1000)
+            self.max_loop_lag_ms = max(self.max_loop_lag_ms, self.loop_lag_ms)
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Error in engine supervisor: {e}")
+
+    async def stop_all(self):
+        self.running = False
+        for supervised in self.engines.values():
+            supervised.state = 'stopped'
+            await self._stop_engine(supervised)
+            supervised.engine = None
+            ENGINE_UP.set(0, engine=supervised.name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        engines = {}
+        for name, supervised in self.engines.items():
+            heartbeat_age = supervised.heartbeat_age(now)
+            engines[name] = {
+                "state": supervised.state,
+                "restarts": supervised.restarts,
+                "restart_reasons": dict(supervised.restart_reasons),
+                "consecutive_failures": supervised.consecutive_failures,
+                "heartbeat_age_s": round(heartbeat_age, 1) if heartbeat_age is not None else None,
+                "next_restart_in_s": round(supervised.next_start - now, 1) if supervised.next_start else None,
+                "last_error": supervised.last_error
+            }
+        return {
+            "engines": engines,
+            "total_restarts": sum(supervised.restarts for supervised in self.engines.values()),
+            "loop_lag_ms": round(self.loop_lag_ms, 1),
+            "max_loop_lag_ms": round(self.max_loop_lag_ms, 1)
+        }
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Engine Worker Runtime
+Runs each engine in its own process so a training step, clustering fit or
+blocking subprocess call in one engine cannot delay the others. Workers read
+host samples from the shared metrics ring and talk to the orchestrator over a
+pipe: calls and replies one way, heartbeats and mirrored engine state the other,
+and bus events both ways.
+"""
+
+import asyncio
+import importlib
+import inspect
+import logging
+import signal
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .checkpoint import run_with_checkpoints
+from .event_bus import Event, EventBus
+from .log_pipeline import LogSettings, setup_logging
+from .metrics_exporter import CURRENT_ENGINE, REGISTRY, SUBPROCESS_SPAWNS
+from .resource_budget import Throttle
+from .shared_metrics import MetricsRing, run_collector
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class EngineSpec:
+    """How to build and drive an engine, and what of it the orchestrator reads"""
+    module: str
+    cls: str
+    run: str  # Main loop coroutine method
+    stop: Optional[str] = None  # Cleanup method, may be a coroutine
+    methods: Tuple[str, ...] = ()  # Coroutine methods callable from the orchestrator
+    # Attributes mirrored to the orchestrator: 'full' copies the value,
+    # 'tail' the length and last item, 'len' only the length
+    mirrored: Dict[str, str] = field(default_factory=dict)
+
+ENGINE_SPECS: Dict[str, EngineSpec] = {
+    'self_healing': EngineSpec(
+        '.self_healing', 'SelfHealingSystem', run='start_monitoring', stop='stop_monitoring',
+        methods=('get_healing_report',),
+        mirrored={'active_issues': 'full', 'system_metrics_history': 'tail', 'healing_history': 'len',
+                  'status_summary': 'full'}
+    ),
+    'ai_optimizer': EngineSpec(
+        '.ai_optimizer', 'AIOptimizer', run='start_optimization_loop', stop='_save_models',
+        methods=('get_optimization_report', 'optimize_now'),
+        mirrored={'optimization_history': 'len', 'status_summary': 'full'}
+    ),
+    'adaptive_config': EngineSpec(
+        '.adaptive_config', 'AdaptiveConfigManager', run='start_adaptive_learning', stop='close',
+        methods=('get_adaptation_report',),
+        mirrored={'current_context': 'full', 'config_history': 'len', 'status_summary': 'full'}
+    )
+}
+
+def build_engine(name: str) -> Any:
+    """Import and construct an engine; import errors surface here, per engine"""
+    spec = ENGINE_SPECS[name]
+    module = importlib.import_module(spec.module, __package__)
+    return getattr(module, spec.cls)()
+
+class MirroredSequence:
+    """Length and last item of an engine history kept in another process"""
+
+    def __init__(self, length: int, tail: List[Any]):
+        self.length = length
+        self.tail = tail
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> Any:
+        if not -len(self.tail) <= index < 0:
+            raise IndexError("Only the last item of a mirrored history is available")
+        return self.tail[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.tail)
+
+def _mirror(engine: Any, spec: EngineSpec) -> Dict[str, Any]:
+    state = {
+        'last_heartbeat': getattr(engine, 'last_heartbeat', None),
+        'subprocess_spawns': int(sum(SUBPROCESS_SPAWNS.totals().values())),
+        'metrics': REGISTRY.snapshot()  # Rendered by the orchestrator's exporter, labelled by engine
+    }
+    for attribute, mode in spec.mirrored.items():
+        value = getattr(engine, attribute, None)
+        if mode == 'full' or value is None:
+            state[attribute] = value
+        else:
+            length = len(value)
+            state[attribute] = MirroredSequence(length, [value[-1]] if mode == 'tail' and length else [])
+    return state
+
+async def _serve(name: str, engine: Any, conn: Connection, state_interval: float):
+    """Run the engine loop and answer the orchestrator until told to stop"""
+    spec = ENGINE_SPECS[name]
+    loop = asyncio.get_event_loop()
+    stopping = loop.create_future()
+    
+    # The worker's own bus: events the engine publishes go up to the orchestrator's
+    # bus, events from there are delivered to the engine's subscriptions
+    bus = EventBus()
+    engine.subscribe_events(bus)
+    bus.add_sink(lambda event: conn.send(('event', event)))
+    run_task = loop.create_task(run_with_checkpoints(name, engine, getattr(engine, spec.run)), name=name)
+    
+    # A SIGTERM not sent by the orchestrator (e.g. the session ending) still checkpoints
+    loop.add_signal_handler(signal.SIGTERM, lambda: stopping.done() or stopping.set_result(None))
+
+    async def call(request_id: int, method: str, args: list, kwargs: dict):
+        try:
+            if method not in spec.methods:
+                raise AttributeError(f"{name} does not expose {method}")
+            result = getattr(engine, method)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            conn.send(('result', request_id, True, result))
+        except Exception as e:
+            conn.send(('result', request_id, False, repr(e)))
+
+    def on_message():
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            message = ('stop',)  # Orchestrator is gone
+        if message[0] == 'call':
+            loop.create_task(call(*message[1:]))
+        elif message[0] == 'throttle':
+            engine.throttle = message[1]
+        elif message[0] == 'event':
+            bus.publish_nowait(message[1], origin='orchestrator')
+        elif message[0] == 'stop' and not stopping.done():
+            stopping.set_result(None)
+
+    loop.add_reader(conn.fileno(), on_message)
+    try:
+        while not stopping.done() and not run_task.done():
+            conn.send(('state', _mirror(engine, spec)))
+            await asyncio.wait([stopping, run_task], timeout=state_interval,
+                               return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        loop.remove_reader(conn.fileno())
+
+    if run_task.done():
+        run_task.result()  # Re-raise so the worker exits with an error
+        raise RuntimeError(f"{name} loop returned")
+
+    run_task.cancel()
+    await asyncio.gather(run_task, return_exceptions=True)  # Let the final checkpoint be written
+    if spec.stop:
+        result = getattr(engine, spec.stop)()
+        if inspect.isawaitable(result):
+            await result
+
+def run_worker(name: str, conn: Connection, ring_name: Optional[str], throttle: Throttle,
+               state_interval: float = 2.0, log_file: Optional[Path] = None,
+               log_settings: Optional[LogSettings] = None):
+    """Worker process entry point"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Shutdown is driven by the orchestrator
+    log_pipeline = setup_logging(log_file, log_settings)  # Own file: rotation is not safe across processes
+
+    try:
+        CURRENT_ENGINE.set(name)
+        engine = build_engine(name)
+        engine.throttle = throttle
+        if ring_name:
+            engine.shared_metrics = MetricsRing.attach(ring_name)
+        asyncio.run(_serve(name, engine, conn, state_interval))
+    finally:
+        log_pipeline.stop()
+
+async def wait_for_exit(process):
+    """Wait without blocking the event loop until a process exits; raises when it failed"""
+    loop = asyncio.get_event_loop()
+    exited = loop.create_future()
+    loop.add_reader(process.sentinel, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(process.sentinel)
+    process.join()
+    raise RuntimeError(f"{process.name} exited with code {process.exitcode}")
+
+async def stop_process(process, timeout: float = 10.0):
+    """Give a process timeout seconds to exit, then terminate it"""
+    deadline = time.monotonic() + timeout
+    while process.is_alive() and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if process.is_alive():
+        logger.warning(f"{process.name} did not exit in {timeout:.0f}s, terminating")
+        process.terminate()
+        await asyncio.sleep(0.5)
+        if process.is_alive():
+            process.kill()
+    process.join(timeout=1)
+
+class EngineProcess:
+    """Orchestrator-side handle on an engine worker
+
+    Exposes the engine's mirrored attributes and callable coroutine methods, so the
+    orchestrator uses it like the engine itself.
+    """
+
+    def __init__(self, name: str, context, ring_name: Optional[str] = None,
+                 throttle: Throttle = Throttle(), events: Optional[EventBus] = None, call_timeout: float = 60.0,
+                 log_file: Optional[Path] = None, log_settings: Optional[LogSettings] = None):
+        self.name = name
+        self.spec = ENGINE_SPECS[name]
+        self.call_timeout = call_timeout
+        self._throttle = throttle
+        self.events = events
+        self._state: Dict[str, Any] = {}
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self.stats = {'calls': 0, 'call_errors': 0, 'state_updates': 0}
+
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run_worker, args=(name, child_conn, ring_name, throttle),
+                                       kwargs={'log_file': log_file, 'log_settings': log_settings},
+                                       name=f"{name}_worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        asyncio.get_event_loop().add_reader(self.conn.fileno(), self._on_message)
+        
+        # Every event goes to the worker except the ones it published itself
+        self._subscription = events.subscribe(Event, self._forward_event, f"{name}_worker",
+                                              skip_origin=name) if events else None
+
+    @property
+    def last_heartbeat(self) -> Optional[float]:
+        return self._state.get('last_heartbeat')
+
+    @property
+    def subprocess_spawns(self) -> int:
+        return self._state.get('subprocess_spawns', 0)
+
+    @property
+    def throttle(self) -> Throttle:
+        return self._throttle
+
+    @throttle.setter
+    def throttle(self, throttle: Throttle):
+        """Forwarded to the worker when it changes"""
+        if throttle != self._throttle and not self.conn.closed:
+            try:
+                self.conn.send(('throttle', throttle))
+            except OSError:
+                pass  # The supervisor restarts the worker with the current throttle
+        self._throttle = throttle
+
+    def __getattr__(self, attribute: str) -> Any:
+        spec = self.__dict__.get('spec')
+        if spec is None:
+            raise AttributeError(attribute)
+        if attribute in spec.mirrored:
+            return self._state.get(attribute)
+        if attribute in spec.methods:
+            return lambda *args, **kwargs: self.call(attribute, *args, **kwargs)
+        raise AttributeError(f"{self.name} worker does not expose {attribute}")
+
+    def _on_message(self):
+        try:
+            message = self.conn.recv()
+        except (EOFError, OSError):
+            self._close_pipe()
+            return
+        if message[0] == 'state':
+            self._state = message[1]
+            REGISTRY.set_remote(self.name, self._state.pop('metrics', {}))
+            self.stats['state_updates'] += 1
+        elif message[0] == 'event':
+            if self.events is not None:
+                self.events.publish_nowait(message[1], origin=self.name)
+        elif message[0] == 'result':
+            _, request_id, ok, value = message
+            future = self._pending.pop(request_id, None)
+            if future is not None and not future.done():
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError(value))
+
+    def _forward_event(self, event: Event):
+        if not self.conn.closed:
+            try:
+                self.conn.send(('event', event))
+            except OSError:
+                pass
+
+    def _close_pipe(self):
+        if self._subscription is not None:
+            self.events.unsubscribe(self._subscription)
+            self._subscription = None
+        if not self.conn.closed:
+            asyncio.get_event_loop().remove_reader(self.conn.fileno())
+            self.conn.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"{self.name} worker is gone"))
+        self._pending.clear()
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        if self.conn.closed:
+            raise ConnectionError(f"{self.name} worker is gone")
+        self._next_id += 1
+        request_id = self._next_id  # Other calls advance _next_id while this one waits
+        future = asyncio.get_event_loop().create_future()
+        self._pending[request_id] = future
+        self.stats['calls'] += 1
+        self.conn.send(('call', request_id, method, list(args), kwargs))
+        try:
+            return await asyncio.wait_for(future, self.call_timeout)
+        except Exception:
+            self.stats['call_errors'] += 1
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def wait(self):
+        await wait_for_exit(self.process)
+
+    async def stop(self):
+        if not self.conn.closed:
+            try:
+                self.conn.send(('stop',))
+            except OSError:
+                pass
+        await stop_process(self.process)
+        self._close_pipe()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "pid": self.process.pid, "alive": self.process.is_alive()}
+
+class CollectorProcess:
+    """Handle on the host metrics collector, supervised like an engine"""
+
+    def __init__(self, ring: MetricsRing, context, interval: float = 2.0):
+        self.ring = ring
+        self._stop = context.Event()
+        self.process = context.Process(target=run_collector, args=(ring.name, interval, self._stop),
+                                       name='metrics_collector', daemon=True)
+        self.process.start()
+
+    @property
+    def last_heartbeat(self) -> Optional[float]:
+        """Monotonic time of the newest published sample"""
+        latest = self.ring.latest()
+        if latest is None:
+            return None
+        return time.monotonic() - (time.time() - latest['timestamp'])
+
+    async def wait(self):
+        await wait_for_exit(self.process)
+
+    async def stop(self):
+        self._stop.set()
+        await stop_process(self.process)
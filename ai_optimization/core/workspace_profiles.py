@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Workspace Effect Profiles
+Per-workspace option sets learned from user changes made on a workspace and
+from the activity of the applications it holds, each precompiled into the
+keyword batch that switches the compositor to it
+"""
+
+import logging
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Any
+
+from .config_reconciler import format_value
+
+logger = logging.getLogger(__name__)
+
+WorkspaceKey = Tuple[int, str]  # (workspace id, workspace name)
+
+@dataclass
+class WorkspaceProfile:
+    """Options preferred on one workspace"""
+    workspace_id: int
+    workspace_name: str
+    activity: Optional[str] = None  # Dominant activity of the workspace's applications
+    activity_configs: Dict[str, Any] = field(default_factory=dict)  # From the activity's profile
+    user_configs: Dict[str, Any] = field(default_factory=dict)  # Set by the user on this workspace
+    samples: int = 0
+    last_used: float = 0.0
+
+    @property
+    def key(self) -> WorkspaceKey:
+        return (self.workspace_id, self.workspace_name)
+
+    @property
+    def preferred_configs(self) -> Dict[str, Any]:
+        return {**self.activity_configs, **self.user_configs}
+
+class WorkspaceProfileSet:
+    """Workspace profiles with compiled switch batches"""
+
+    def __init__(self, min_samples: int = 3):
+        self.min_samples = min_samples  # Observations before a workspace's activity is trusted
+        self.profiles: Dict[WorkspaceKey, WorkspaceProfile] = {}
+        self._by_name: Dict[str, WorkspaceKey] = {}
+        self._activity_votes: Dict[WorkspaceKey, Counter] = defaultdict(Counter)
+
+        # Value of each workspace-scoped option on workspaces that don't set it
+        self.baseline: Dict[str, Any] = {}
+        self._compiled: Dict[Optional[WorkspaceKey], Tuple[str, Dict[str, Any]]] = {}
+        self._stale = True
+        self.dirty: Set[WorkspaceKey] = set()
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def add(self, profile: WorkspaceProfile):
+        self.profiles[profile.key] = profile
+        self._by_name[profile.workspace_name] = profile.key
+        self._stale = True
+
+    def get(self, workspace_id: Optional[int] = None, name: Optional[str] = None) -> Optional[WorkspaceProfile]:
+        """Profile by id and name, or by name alone (workspace>> events carry only the name)"""
+        if workspace_id is None:
+            key = self._by_name.get(name)
+            return self.profiles.get(key) if key else None
+        return self.profiles.get((workspace_id, name))
+
+    def _profile(self, workspace: WorkspaceKey) -> WorkspaceProfile:
+        profile = self.profiles.get(workspace)
+        if profile is None:
+            profile = WorkspaceProfile(workspace_id=workspace[0], workspace_name=workspace[1])
+            self.add(profile)
+        return profile
+
+    def observe_option(self, workspace: WorkspaceKey, key: str, value: Any):
+        """A user option change made while the workspace was active"""
+        profile = self._profile(workspace)
+        if profile.user_configs.get(key) != value:
+            profile.user_configs[key] = value
+            self._changed(profile)
+
+    def observe_activity(self, workspace: WorkspaceKey, activity: Optional[str], activity_configs: Dict[str, Any]):
+        """The activity of the applications currently on a workspace and that activity's options"""
+        if activity is None:
+            return
+        votes = self._activity_votes[workspace]
+        votes[activity] += 1
+        dominant, count = votes.most_common(1)[0]
+        if count < self.min_samples:
+            return
+
+        profile = self._profile(workspace)
+        profile.samples = sum(votes.values())
+        if dominant == activity and (profile.activity != dominant or profile.activity_configs != activity_configs):
+            profile.activity = dominant
+            profile.activity_configs = dict(activity_configs)
+            self._changed(profile)
+
+    def _changed(self, profile: WorkspaceProfile):
+        profile.last_used = time.time()
+        self.dirty.add(profile.key)
+        self._stale = True
+
+    def set_baseline(self, options: Dict[str, Any]):
+        if options != self.baseline:
+            self.baseline = dict(options)
+            self._stale = True
+
+    def scoped_keys(self) -> Set[str]:
+        """Options set by any workspace profile"""
+        return {key for profile in self.profiles.values() for key in profile.preferred_configs}
+
+    def compile(self):
+        """Build the switch batch of every workspace over all workspace-scoped options"""
+        keys = sorted(self.scoped_keys())
+        compiled = {}
+        # None: workspaces without a profile get the baseline back
+        for workspace, profile in [(None, None), *self.profiles.items()]:
+            preferred = profile.preferred_configs if profile else {}
+            options = {}
+            for key in keys:
+                value = preferred.get(key, self.baseline.get(key))
+                if value is not None:
+                    options[key] = value
+            if options:
+                batch = ' ; '.join(f"keyword {key} {format_value(value)}" for key, value in options.items())
+                compiled[workspace] = (batch, options)
+        self._compiled = compiled
+        self._stale = False
+
+    def switch_batch(self, workspace_id: Optional[int], name: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Compiled (batch, options) for switching to a workspace; None when nothing is scoped"""
+        if self._stale:
+            self.compile()
+        profile = self.get(workspace_id, name)
+        return self._compiled.get(profile.key if profile else None)
+
+    def options_for(self, workspace: Optional[WorkspaceKey]) -> Dict[str, Any]:
+        profile = self.profiles.get(workspace) if workspace else None
+        return profile.preferred_configs if profile else {}
+
+    def take_dirty(self) -> List[WorkspaceProfile]:
+        """Profiles changed since the last call"""
+        dirty = [self.profiles[key] for key in self.dirty if key in self.profiles]
+        self.dirty = set()
+        return dirty
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workspaces": {
+                f"{profile.workspace_id}:{profile.workspace_name}": {
+                    "activity": profile.activity,
+                    "options": len(profile.preferred_configs)
+                } for profile in self.profiles.values()
+            },
+            "scoped_options": len(self.scoped_keys()),
+            "dirty": len(self.dirty)
+        }
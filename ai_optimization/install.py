@@ -224,9 +224,17 @@ class HyprlandAIInstaller:
                 "auto_fix_enabled": True,
                 "max_fix_attempts": 3
             },
+            "budget": {
+                "cpu_percent": 2.0,
+                "rss_mb": 400,
+                "wakeups_per_minute": 1200,
+                "spawns_per_minute": 30,
+                "window": 60
+            },
             "system": {
                 "log_level": "INFO",
                 "max_log_size": "100MB",
+                "log_backups": 3,
                 "data_retention_days": 30
             }
         }
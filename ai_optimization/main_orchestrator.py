@@ -7,31 +7,39 @@ Coordinates all AI systems and provides unified management interface
 import asyncio
 import json
 import logging
+import multiprocessing
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
 from datetime import datetime
 import argparse
 import signal
 import sys
 import subprocess
-from dataclasses import dataclass, asdict
-
-# Import our AI modules
-from core.ai_optimizer import AIOptimizer
-from core.adaptive_config import AdaptiveConfigManager
-from core.self_healing import SelfHealingSystem
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/home/sasha/hyprland-project/ai_optimization/logs/orchestrator.log'),
-        logging.StreamHandler()
-    ]
-)
+import time
+from dataclasses import dataclass, asdict, field
+from functools import partial
+
+# Engines are imported when the supervisor builds them, so a broken ML stack
+# only takes the AI optimizer down
+from core.checkpoint import Checkpointer, run_with_checkpoints
+from core.control_api import ControlClient, ControlServer
+from core.event_bus import ConfigApplied, EventBus
+from core.log_pipeline import LogPipeline, LogSettings, setup_logging
+from core.metrics_exporter import LOOP_SECONDS, REGISTRY, SYSTEM_METRIC, MetricsExporter
+from core.resource_budget import ResourceAccountant, ResourceBudget
+from core.shared_metrics import MetricsRing
+from core.supervisor import EngineSupervisor
+from core.worker_runtime import ENGINE_SPECS, CollectorProcess, EngineProcess, build_engine
+
+if TYPE_CHECKING:
+    from core.ai_optimizer import AIOptimizer
+    from core.adaptive_config import AdaptiveConfigManager
+    from core.self_healing import SelfHealingSystem
+
 logger = logging.getLogger(__name__)
 
+BASE_PATH = Path("/home/sasha/hyprland-project/ai_optimization")
+
 @dataclass
 class SystemStatus:
     """Overall system status"""
@@ -45,26 +53,43 @@ class SystemStatus:
     uptime_hours: float
     performance_score: float
     stability_score: float
+    engine_restarts: int = 0
+    resource_budget: Dict[str, Any] = field(default_factory=dict)
 
 class HyprlandAIOrchestrator:
     """Main orchestrator for all AI optimization systems"""
     
-    def __init__(self):
-        self.base_path = Path("/home/sasha/hyprland-project/ai_optimization")
+    def __init__(self, metrics_port: int = 9464, multiprocess: bool = False,
+                 log_pipeline: Optional[LogPipeline] = None):
+        self.base_path = BASE_PATH
         self.base_path.mkdir(parents=True, exist_ok=True)
         
         # Create logs directory
         self.logs_path = self.base_path / "logs"
         self.logs_path.mkdir(exist_ok=True)
+        self.log_pipeline = log_pipeline  # Recent records for the "logs" command
+        
+        # AI systems run as supervised tasks, each restarted on its own when it fails
+        self.supervisor = EngineSupervisor()
+        
+        # Typed events between the engines (context, issues, healing actions, applied config)
+        self.event_bus = EventBus()
         
-        # Initialize AI systems
-        self.ai_optimizer: Optional[AIOptimizer] = None
-        self.adaptive_config: Optional[AdaptiveConfigManager] = None
-        self.self_healing: Optional[SelfHealingSystem] = None
+        # Engine state snapshots, restored when an engine (re)starts; workers keep their own
+        self.checkpoints: Dict[str, Checkpointer] = {}
+        
+        # Multi-process mode: one worker process per engine fed by a shared metrics ring
+        self.multiprocess = multiprocess
+        self.metrics_ring: Optional[MetricsRing] = None
+        
+        # The daemon's own CPU, memory, wakeups and spawns, throttled to stay within budget
+        self.accountant = ResourceAccountant(ResourceBudget.from_settings(self.base_path / "config" / "settings.json"))
+        self.budget_interval = 15  # seconds
         
         # System state
         self.running = False
         self.start_time = None
+        self._tasks: List[asyncio.Task] = []
         self.optimization_stats = {
             'total_optimizations': 0,
             'successful_optimizations': 0,
@@ -73,8 +98,60 @@ class HyprlandAIOrchestrator:
             'healing_actions': 0
         }
         
+        # Control API: answers from snapshots refreshed in the background
+        self.control_server = ControlServer(self.execute_command)
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self.snapshot_interval = 10  # seconds
+        
+        # OpenMetrics endpoint for Prometheus; port 0 disables it
+        self.metrics_exporter = MetricsExporter(REGISTRY, port=metrics_port) if metrics_port else None
+        REGISTRY.add_collector(self._collect_system_metrics)
+        
         logger.info("Hyprland AI Orchestrator initialized")
 
+    def _register_engine_workers(self, names: List[str]):
+        """Supervise a collector process and one worker process per engine"""
+        context = multiprocessing.get_context('spawn')  # Workers must not inherit the loop or its threads
+        self.metrics_ring = MetricsRing.create()
+        self.supervisor.register(
+            "metrics_collector", partial(CollectorProcess, self.metrics_ring, context),
+            run=lambda collector: collector.wait(),
+            stop=lambda collector: collector.stop(),
+            stall_timeout=60.0
+        )
+        for name in names:
+            self.supervisor.register(
+                name, lambda name=name: EngineProcess(
+                    name, context, self.metrics_ring.name, throttle=self.accountant.throttle, events=self.event_bus,
+                    log_file=self.logs_path / f"{name}.log",
+                    log_settings=self.log_pipeline.settings if self.log_pipeline else None
+                ),
+                run=lambda worker: worker.wait(),
+                stop=lambda worker: worker.stop()
+            )
+        logger.info(f"Multi-process mode: {len(names)} engine workers, metrics ring {self.metrics_ring.name}")
+
+    async def _run_engine(self, name: str, engine: Any, run: str):
+        """Run an engine loop warm-started from its checkpoint; its event subscriptions end with it"""
+        subscriptions = engine.subscribe_events(self.event_bus)
+        self.checkpoints[name] = Checkpointer(name, engine)
+        try:
+            await run_with_checkpoints(name, engine, getattr(engine, run), self.checkpoints[name])
+        finally:
+            self.event_bus.unsubscribe(subscriptions)
+
+    @property
+    def ai_optimizer(self) -> Optional['AIOptimizer']:
+        return self.supervisor.engine('ai_optimizer')
+
+    @property
+    def adaptive_config(self) -> Optional['AdaptiveConfigManager']:
+        return self.supervisor.engine('adaptive_config')
+
+    @property
+    def self_healing(self) -> Optional['SelfHealingSystem']:
+        return self.supervisor.engine('self_healing')
+
     async def start_all_systems(self, 
                                 enable_ai_optimizer: bool = True,
                                 enable_adaptive_config: bool = True,
@@ -89,35 +166,22 @@ class HyprlandAIOrchestrator:
         tasks = []
         
         try:
-            # Initialize and start AI Optimizer
-            if enable_ai_optimizer:
-                logger.info("Initializing AI Optimizer...")
-                self.ai_optimizer = AIOptimizer()
-                tasks.append(asyncio.create_task(
-                    self.ai_optimizer.start_optimization_loop(),
-                    name="ai_optimizer"
-                ))
-                logger.info("✓ AI Optimizer started")
-            
-            # Initialize and start Adaptive Configuration Manager
-            if enable_adaptive_config:
-                logger.info("Initializing Adaptive Configuration Manager...")
-                self.adaptive_config = AdaptiveConfigManager()
-                tasks.append(asyncio.create_task(
-                    self.adaptive_config.start_adaptive_learning(),
-                    name="adaptive_config"
-                ))
-                logger.info("✓ Adaptive Configuration Manager started")
+            # Self-healing first: it must come up even when the other engines cannot
+            enabled = [name for name, enable in (("self_healing", enable_self_healing),
+                                                 ("ai_optimizer", enable_ai_optimizer),
+                                                 ("adaptive_config", enable_adaptive_config)) if enable]
+            if self.multiprocess:
+                self._register_engine_workers(enabled)
+            else:
+                for name in enabled:
+                    spec = ENGINE_SPECS[name]
+                    self.supervisor.register(
+                        name, partial(build_engine, name),
+                        run=lambda engine, name=name, spec=spec: self._run_engine(name, engine, spec.run),
+                        stop=lambda engine, spec=spec: getattr(engine, spec.stop)()
+                    )
             
-            # Initialize and start Self-Healing System
-            if enable_self_healing:
-                logger.info("Initializing Self-Healing System...")
-                self.self_healing = SelfHealingSystem()
-                tasks.append(asyncio.create_task(
-                    self.self_healing.start_monitoring(),
-                    name="self_healing"
-                ))
-                logger.info("✓ Self-Healing System started")
+            tasks.append(asyncio.create_task(self.supervisor.run(), name="supervisor"))
             
             # Add orchestrator monitoring task
             tasks.append(asyncio.create_task(
@@ -131,11 +195,38 @@ class HyprlandAIOrchestrator:
                 name="status_reporter"
             ))
             
+            # Keep the daemon within its resource budget
+            tasks.append(asyncio.create_task(
+                self._budget_loop(),
+                name="resource_budget"
+            ))
+            
+            # Serve the control API
+            try:
+                await self.control_server.start()
+                tasks.append(asyncio.create_task(
+                    self._snapshot_loop(),
+                    name="control_api"
+                ))
+            except OSError as e:
+                logger.error(f"Control API unavailable: {e}")
+            
+            if self.metrics_exporter:
+                try:
+                    await self.metrics_exporter.start()
+                except OSError as e:
+                    logger.error(f"Metrics exporter unavailable: {e}")
+            
             logger.info(f"All systems started! Running {len(tasks)} tasks.")
             
             # Wait for all tasks
+            self._tasks = tasks
             await asyncio.gather(*tasks)
             
+        except asyncio.CancelledError:
+            if self.running:
+                raise
+            logger.info("Orchestrator tasks ended for shutdown")
         except Exception as e:
             logger.error(f"Error in orchestrator: {e}")
             await self.stop_all_systems()
@@ -146,20 +237,20 @@ class HyprlandAIOrchestrator:
         
         while self.running:
             try:
+                iteration_start = time.perf_counter()
+                
                 # Monitor system health
                 await self._monitor_system_health()
                 
-                # Coordinate between systems
-                await self._coordinate_systems()
-                
                 # Update statistics
                 await self._update_statistics()
                 
                 # Check for critical issues
                 await self._handle_critical_issues()
+                LOOP_SECONDS.observe(time.perf_counter() - iteration_start, loop='orchestrator')
                 
                 # Sleep before next iteration
-                await asyncio.sleep(60)  # Check every minute
+                await asyncio.sleep(self.accountant.throttle.interval(60))  # Check every minute
                 
             except Exception as e:
                 logger.error(f"Error in orchestrator monitoring: {e}")
@@ -187,26 +278,78 @@ class HyprlandAIOrchestrator:
                 logger.error(f"Error in status reporting: {e}")
                 await asyncio.sleep(600)
 
-    async def _monitor_system_health(self):
-        """Monitor overall system health"""
+    async def _snapshot_loop(self):
+        """Keep status and report snapshots fresh for the control API"""
+        while self.running:
+            await self._refresh_snapshots()
+            await asyncio.sleep(self.accountant.throttle.interval(self.snapshot_interval))
+
+    async def _budget_loop(self):
+        """Measure the daemon against its resource budget and pass the throttle to the engines"""
+        while self.running:
+            try:
+                self._check_budget()
+            except Exception as e:
+                logger.error(f"Error checking resource budget: {e}")
+            await asyncio.sleep(self.budget_interval)
+
+    def _check_budget(self):
+        handles = [supervised.engine for supervised in self.supervisor.engines.values()
+                   if supervised.engine is not None]
+        # Worker and collector processes count against the budget too
+        worker_pids = [handle.process.pid for handle in handles if hasattr(handle, 'process')]
+        worker_spawns = {handle.name: handle.subprocess_spawns for handle in handles
+                         if isinstance(handle, EngineProcess)}
+        self.accountant.check(worker_pids, worker_spawns)
+        
+        for name in ENGINE_SPECS:
+            engine = self.supervisor.engine(name)
+            if engine is not None:
+                engine.throttle = self.accountant.throttle
+
+    async def _refresh_snapshots(self):
+        """Rebuild the status and report snapshots and push them to subscribers"""
         try:
-            # Collect metrics from all systems
-            health_data = {}
+            report = await self.get_detailed_report()
+            status = asdict(await self.get_system_status())
             
-            if self.ai_optimizer:
-                ai_report = await self.ai_optimizer.get_optimization_report()
-                health_data['ai_optimizer'] = ai_report
-            
-            if self.adaptive_config:
-                adaptive_report = await self.adaptive_config.get_adaptation_report()
-                health_data['adaptive_config'] = adaptive_report
-            
-            if self.self_healing:
-                healing_report = await self.self_healing.get_healing_report()
-                health_data['self_healing'] = healing_report
+            self._snapshots = {'status': status, 'report': report}
+            self.control_server.publish('status', status)
+            self.control_server.publish('report', report)
             
+        except Exception as e:
+            logger.error(f"Error refreshing status snapshots: {e}")
+
+    def _collect_system_metrics(self):
+        """Export the latest metrics sample of the engines, refreshed on every scrape"""
+        latest = {}
+        if self.self_healing and self.self_healing.system_metrics_history:
+            latest.update(self.self_healing.system_metrics_history[-1])
+        if self.metrics_ring is not None:
+            latest.update(self.metrics_ring.latest() or {})
+        elif self.ai_optimizer and self.ai_optimizer.metrics_history:
+            latest.update(asdict(self.ai_optimizer.metrics_history[-1]))
+        
+        for metric, value in latest.items():
+            if metric != 'timestamp' and isinstance(value, (int, float)):
+                SYSTEM_METRIC.set(value, metric=metric)
+
+    def _status_summaries(self) -> Dict[str, Dict[str, Any]]:
+        """Constant-time summaries the engines keep up to date, by engine name"""
+        summaries = {}
+        for name in ('ai_optimizer', 'adaptive_config', 'self_healing'):
+            engine = self.supervisor.engine(name)
+            # A worker has no summary until its first state update arrives
+            summary = engine.status_summary if engine is not None else None
+            if summary is not None:
+                summaries[name] = summary
+        return summaries
+
+    async def _monitor_system_health(self):
+        """Monitor overall system health"""
+        try:
             # Calculate overall health score
-            health_score = self._calculate_health_score(health_data)
+            health_score = self._calculate_health_score(self._status_summaries())
             
             # Log health issues if needed
             if health_score < 70:
@@ -215,38 +358,38 @@ class HyprlandAIOrchestrator:
         except Exception as e:
             logger.error(f"Error monitoring system health: {e}")
 
-    def _calculate_health_score(self, health_data: Dict[str, Any]) -> float:
+    def _calculate_health_score(self, summaries: Dict[str, Dict[str, Any]]) -> float:
         """Calculate overall system health score"""
         try:
             score_components = []
             
             # AI Optimizer health
-            if 'ai_optimizer' in health_data:
-                ai_data = health_data['ai_optimizer']
+            if 'ai_optimizer' in summaries:
+                ai_data = summaries['ai_optimizer']
                 # Base score on recent performance
                 ai_score = 80.0  # Base score
-                if ai_data.get('system_health', {}).get('avg_cpu', 0) > 90:
+                if ai_data.get('avg_cpu', 0) > 90:
                     ai_score -= 20
-                if ai_data.get('system_health', {}).get('avg_memory', 0) > 90:
+                if ai_data.get('avg_memory', 0) > 90:
                     ai_score -= 20
                 score_components.append(ai_score)
             
             # Adaptive Config health
-            if 'adaptive_config' in health_data:
-                adaptive_data = health_data['adaptive_config']
+            if 'adaptive_config' in summaries:
+                adaptive_data = summaries['adaptive_config']
                 adaptive_score = 80.0
                 # Boost score if learning is active
-                if adaptive_data.get('learning_data', {}).get('config_changes', 0) > 0:
+                if adaptive_data.get('config_changes', 0) > 0:
                     adaptive_score += 10
                 score_components.append(adaptive_score)
             
             # Self-Healing health
-            if 'self_healing' in health_data:
-                healing_data = health_data['self_healing']
+            if 'self_healing' in summaries:
+                healing_data = summaries['self_healing']
                 healing_score = 90.0
                 # Reduce score based on active issues
-                critical_issues = healing_data.get('system_health', {}).get('critical_issues', 0)
-                high_issues = healing_data.get('system_health', {}).get('high_priority_issues', 0)
+                critical_issues = healing_data.get('critical_issues', 0)
+                high_issues = healing_data.get('high_priority_issues', 0)
                 healing_score -= (critical_issues * 15 + high_issues * 10)
                 score_components.append(max(healing_score, 0))
             
@@ -257,29 +400,6 @@ class HyprlandAIOrchestrator:
             logger.error(f"Error calculating health score: {e}")
             return 50.0
 
-    async def _coordinate_systems(self):
-        """Coordinate actions between different AI systems"""
-        try:
-            # Check if self-healing is taking action
-            if self.self_healing and len(self.self_healing.active_issues) > 0:
-                # Pause aggressive optimizations during healing
-                if hasattr(self.ai_optimizer, 'set_conservative_mode'):
-                    await self.ai_optimizer.set_conservative_mode(True)
-            
-            # Check if adaptive config is learning new patterns
-            if (self.adaptive_config and 
-                hasattr(self.adaptive_config, 'current_context') and
-                self.adaptive_config.current_context):
-                
-                # Share context with AI optimizer if it supports it
-                if hasattr(self.ai_optimizer, 'update_user_context'):
-                    await self.ai_optimizer.update_user_context(
-                        self.adaptive_config.current_context
-                    )
-            
-        except Exception as e:
-            logger.error(f"Error coordinating systems: {e}")
-
     async def _update_statistics(self):
         """Update system-wide statistics"""
         try:
@@ -357,6 +477,9 @@ class HyprlandAIOrchestrator:
                 subprocess.run(cmd, capture_output=True, timeout=5)
             except:
                 continue
+        
+        # Engines track the running config from these events
+        await self.event_bus.publish(ConfigApplied('orchestrator', {cmd[2]: cmd[3] for cmd in emergency_commands}))
 
     async def _emergency_memory_cleanup(self):
         """Emergency memory cleanup"""
@@ -374,7 +497,7 @@ class HyprlandAIOrchestrator:
             logger.error(f"Error in emergency memory cleanup: {e}")
 
     async def get_system_status(self) -> SystemStatus:
-        """Get comprehensive system status"""
+        """Get comprehensive system status from the engines' running aggregates, in constant time"""
         try:
             now = datetime.now()
             uptime = (now - self.start_time).total_seconds() / 3600 if self.start_time else 0
@@ -384,33 +507,22 @@ class HyprlandAIOrchestrator:
             adaptive_active = self.adaptive_config is not None
             healing_active = self.self_healing is not None
             
-            # Get active issues count
-            active_issues = 0
-            if self.self_healing:
-                active_issues = len(self.self_healing.active_issues)
-            
-            # Calculate health score
-            health_data = {}
-            if ai_active:
-                health_data['ai_optimizer'] = await self.ai_optimizer.get_optimization_report()
-            if adaptive_active:
-                health_data['adaptive_config'] = await self.adaptive_config.get_adaptation_report()
-            if healing_active:
-                health_data['self_healing'] = await self.self_healing.get_healing_report()
-            
-            health_score = self._calculate_health_score(health_data)
+            summaries = self._status_summaries()
             
             return SystemStatus(
                 timestamp=now.isoformat(),
                 ai_optimizer_active=ai_active,
                 adaptive_config_active=adaptive_active,
                 self_healing_active=healing_active,
-                total_optimizations=self.optimization_stats['total_optimizations'],
-                active_issues=active_issues,
-                system_health_score=health_score,
+                total_optimizations=summaries.get('ai_optimizer', {}).get(
+                    'total_optimizations', self.optimization_stats['total_optimizations']),
+                active_issues=summaries.get('self_healing', {}).get('active_issues', 0),
+                system_health_score=self._calculate_health_score(summaries),
                 uptime_hours=uptime,
-                performance_score=self._calculate_performance_score(health_data),
-                stability_score=self._calculate_stability_score(health_data)
+                performance_score=self._calculate_performance_score(summaries),
+                stability_score=self._calculate_stability_score(summaries),
+                engine_restarts=sum(engine.restarts for engine in self.supervisor.engines.values()),
+                resource_budget=self.accountant.get_stats()
             )
             
         except Exception as e:
@@ -428,15 +540,14 @@ class HyprlandAIOrchestrator:
                 stability_score=0.0
             )
 
-    def _calculate_performance_score(self, health_data: Dict[str, Any]) -> float:
+    def _calculate_performance_score(self, summaries: Dict[str, Dict[str, Any]]) -> float:
         """Calculate performance score"""
         try:
-            if 'ai_optimizer' in health_data:
-                ai_data = health_data['ai_optimizer']
-                system_health = ai_data.get('system_health', {})
+            if 'ai_optimizer' in summaries:
+                ai_data = summaries['ai_optimizer']
                 
-                cpu = system_health.get('avg_cpu', 0)
-                memory = system_health.get('avg_memory', 0)
+                cpu = ai_data.get('avg_cpu', 0)
+                memory = ai_data.get('avg_memory', 0)
                 
                 # Higher usage = lower performance score
                 performance_score = 100 - (cpu * 0.5 + memory * 0.3)
@@ -446,15 +557,14 @@ class HyprlandAIOrchestrator:
         except:
             return 75.0
 
-    def _calculate_stability_score(self, health_data: Dict[str, Any]) -> float:
+    def _calculate_stability_score(self, summaries: Dict[str, Dict[str, Any]]) -> float:
         """Calculate stability score"""
         try:
-            if 'self_healing' in health_data:
-                healing_data = health_data['self_healing']
-                system_health = healing_data.get('system_health', {})
+            if 'self_healing' in summaries:
+                healing_data = summaries['self_healing']
                 
-                critical = system_health.get('critical_issues', 0)
-                high = system_health.get('high_priority_issues', 0)
+                critical = healing_data.get('critical_issues', 0)
+                high = healing_data.get('high_priority_issues', 0)
                 
                 stability_score = 100 - (critical * 20 + high * 10)
                 return max(stability_score, 0)
@@ -463,19 +573,27 @@ class HyprlandAIOrchestrator:
         except:
             return 85.0
 
+    def request_stop(self):
+        """Begin a graceful shutdown: end the orchestrator's tasks so start_all_systems returns"""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+
     async def stop_all_systems(self):
         """Stop all AI optimization systems gracefully"""
         logger.info("Stopping all AI optimization systems...")
         
         self.running = False
         
-        # Stop individual systems
-        if self.self_healing:
-            self.self_healing.stop_monitoring()
+        # Stop the engines and save their state
+        await self.supervisor.stop_all()
+        if self.metrics_ring is not None:
+            self.metrics_ring.close()
+            self.metrics_ring = None
         
-        # Save states
-        if self.adaptive_config:
-            self.adaptive_config.save_preference_profiles()
+        await self.control_server.stop()
+        if self.metrics_exporter:
+            await self.metrics_exporter.stop()
         
         logger.info("All systems stopped gracefully")
 
@@ -486,7 +604,14 @@ class HyprlandAIOrchestrator:
             "orchestrator": {
                 "running": self.running,
                 "uptime_hours": (datetime.now() - self.start_time).total_seconds() / 3600 if self.start_time else 0,
-                "statistics": self.optimization_stats
+                "statistics": self.optimization_stats,
+                "supervisor": self.supervisor.get_stats(),
+                "runtime": self._runtime_stats(),
+                "event_bus": self.event_bus.get_stats(),
+                "checkpoints": {name: checkpointer.get_stats() for name, checkpointer in self.checkpoints.items()},
+                "control_api": self.control_server.get_stats(),
+                "logging": self.log_pipeline.get_stats() if self.log_pipeline else None,
+                "metrics_exporter": self.metrics_exporter.get_stats() if self.metrics_exporter else None
             }
         }
         
@@ -506,28 +631,57 @@ class HyprlandAIOrchestrator:
         
         return report
 
+    def _runtime_stats(self) -> Dict[str, Any]:
+        stats = {"mode": "multiprocess" if self.multiprocess else "single_process"}
+        if self.metrics_ring is not None:
+            stats["metrics_ring"] = self.metrics_ring.get_stats()
+            stats["workers"] = {
+                name: supervised.engine.get_stats()
+                for name, supervised in self.supervisor.engines.items()
+                if isinstance(supervised.engine, EngineProcess)
+            }
+        return stats
+
     async def execute_command(self, command: str, args: Dict[str, Any] = None) -> Dict[str, Any]:
         """Execute orchestrator commands"""
         args = args or {}
         
         try:
             if command == "status":
-                status = await self.get_system_status()
-                return asdict(status)
+                # Built from running aggregates, cheap enough to answer every request fresh
+                return asdict(await self.get_system_status())
             
             elif command == "report":
-                return await self.get_detailed_report()
+                # Cached snapshot unless a fresh one is asked for
+                if args.get("fresh") or command not in self._snapshots:
+                    await self._refresh_snapshots()
+                return self._snapshots.get(command, {"error": "Snapshot unavailable"})
+            
+            elif command == "subscribe":
+                topics = [topic for topic in args.get("topics", ["status"]) if topic in ("status", "report")]
+                if not topics:
+                    return {"error": "Nothing to subscribe to; topics are status and report"}
+                return {"topics": topics, "snapshot": {topic: self._snapshots.get(topic) for topic in topics}}
+            
+            elif command == "optimize":
+                if not self.ai_optimizer:
+                    return {"error": "AI optimizer is not running"}
+                # Joins the cycle already running, if any, instead of starting a second one
+                return await self.ai_optimizer.optimize_now()
             
             elif command == "emergency_stop":
                 await self.stop_all_systems()
                 return {"status": "stopped"}
             
             elif command == "restart_component":
-                component = args.get("component")
-                if component == "ai_optimizer" and self.ai_optimizer:
-                    # Would implement restart logic
-                    return {"status": f"restarted {component}"}
-                
+                return await self.supervisor.restart(args.get("component"))
+            
+            elif command == "logs":
+                if not self.log_pipeline:
+                    return {"error": "Log pipeline is not running"}
+                return {"records": self.log_pipeline.recent(int(args.get("limit", 100)), args.get("level"),
+                                                            args.get("logger"))}
+            
             else:
                 return {"error": f"Unknown command: {command}"}
                 
@@ -535,14 +689,18 @@ class HyprlandAIOrchestrator:
             return {"error": str(e)}
 
 def setup_signal_handlers(orchestrator):
-    """Setup signal handlers for graceful shutdown"""
-    def signal_handler(signum, frame):
+    """Setup signal handlers for graceful shutdown
+    
+    Handled on the event loop: start_all_systems returns and main() stops the
+    engines, which checkpoints their state.
+    """
+    def signal_handler(signum):
         logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-        asyncio.create_task(orchestrator.stop_all_systems())
-        sys.exit(0)
+        orchestrator.request_stop()
     
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, signal_handler, signum)
 
 async def main():
     """Main entry point"""
@@ -553,26 +711,34 @@ async def main():
     parser.add_argument("--status", action="store_true", help="Get system status and exit")
     parser.add_argument("--report", action="store_true", help="Get detailed report and exit")
     parser.add_argument("--daemon", action="store_true", help="Run as daemon")
+    parser.add_argument("--multiprocess", action="store_true",
+                        help="Run each engine in its own worker process")
+    parser.add_argument("--metrics-port", type=int, default=9464,
+                        help="Localhost port for the OpenMetrics endpoint (0 disables it)")
     
     args = parser.parse_args()
     
+    # Status/report come from the running orchestrator
+    if args.status or args.report:
+        try:
+            reply = ControlClient().request("status" if args.status else "report")
+        except OSError:
+            print(json.dumps({"error": "Orchestrator is not running"}, indent=2))
+            sys.exit(1)
+        print(json.dumps(reply["result"], indent=2))
+        return
+    
+    # All records go through a background listener to rotating JSON-lines files
+    log_pipeline = setup_logging(BASE_PATH / "logs" / "orchestrator.log",
+                                 LogSettings.from_settings(BASE_PATH / "config" / "settings.json"))
+    
     # Create orchestrator
-    orchestrator = HyprlandAIOrchestrator()
+    orchestrator = HyprlandAIOrchestrator(metrics_port=args.metrics_port, multiprocess=args.multiprocess,
+                                          log_pipeline=log_pipeline)
     
     # Setup signal handlers
     setup_signal_handlers(orchestrator)
     
-    # Handle status/report commands
-    if args.status:
-        status = await orchestrator.get_system_status()
-        print(json.dumps(asdict(status), indent=2))
-        return
-    
-    if args.report:
-        report = await orchestrator.get_detailed_report()
-        print(json.dumps(report, indent=2))
-        return
-    
     # Start all systems
     logger.info("Starting Hyprland AI Optimization Suite")
     
@@ -18,6 +18,7 @@ from dataclasses import dataclass, asdict
 from typing import Dict, List, Optional, Tuple, Any
 import argparse
 import logging
+import logging.handlers
 
 # Try to import advanced AI libraries
 try:
@@ -33,6 +34,29 @@ try:
 except ImportError:
     HAS_SKLEARN = False
 
+# Shared hyprland.conf parser from the AI optimization core
+for _core_parent in (Path(__file__).resolve().parents[2] / "ai_optimization",
+                     Path(os.environ.get("AI_OPTIMIZATION_HOME",
+                                         Path.home() / "hyprland-project" / "ai_optimization"))):
+    if (_core_parent / "core" / "config_parser.py").exists():
+        sys.path.insert(0, str(_core_parent))
+        break
+
+# Project settings, shared with the orchestrator
+SETTINGS_FILE = _core_parent / "config" / "settings.json"
+
+try:
+    from core.config_parser import HyprlandConfigParser, is_keyword, value_span
+    HAS_CONFIG_PARSER = True
+except ImportError:
+    HAS_CONFIG_PARSER = False
+
+try:
+    from core.log_pipeline import LogSettings, setup_logging
+    HAS_LOG_PIPELINE = True
+except ImportError:
+    HAS_LOG_PIPELINE = False
+
 @dataclass
 class UserPattern:
     """Data class for user behavior patterns"""
@@ -90,6 +114,9 @@ class AIConfigTuner:
         self.performance_baseline = {}
         self.optimization_history = []
         
+        # Structure-aware config parser (cached per file)
+        self.config_parser = HyprlandConfigParser() if HAS_CONFIG_PARSER else None
+        
         # Setup logging
         self.setup_logging()
         
@@ -100,14 +127,29 @@ class AIConfigTuner:
 
     def setup_logging(self):
         """Setup logging configuration"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(self.log_file),
-                logging.StreamHandler()
-            ]
-        )
+        if HAS_LOG_PIPELINE:
+            # Same non-blocking, rotating JSON-lines pipeline and settings as the orchestrator
+            setup_logging(self.log_file, LogSettings.from_settings(SETTINGS_FILE))
+        else:
+            # Without the core package only byte counts are understood for max_log_size
+            try:
+                with open(SETTINGS_FILE) as f:
+                    system = json.load(f).get('system', {})
+            except (OSError, ValueError):
+                system = {}
+            max_log_size = system.get('max_log_size')
+            backups = int(system.get('log_backups', 3))
+            if not isinstance(max_log_size, (int, float)):
+                max_log_size = 100 * 1024 ** 2
+            logging.basicConfig(
+                level=str(system.get('log_level', 'INFO')).upper(),
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                handlers=[
+                    logging.handlers.RotatingFileHandler(self.log_file, maxBytes=int(max_log_size) // (backups + 1),
+                                                         backupCount=backups),
+                    logging.StreamHandler()
+                ]
+            )
         self.logger = logging.getLogger('AIConfigTuner')
 
     def init_database(self):
@@ -476,7 +518,7 @@ class AIConfigTuner:
             optimizations.append(ConfigOptimization(
                 config_path="hyprland.conf",
                 parameter="animations:speed",
-                current_value="1.0",
+                current_value=self._get_config_value("animations:speed", "1.0"),
                 recommended_value="0.8" if any(h < 9 or h > 17 for h in peak_hours) else "1.2",
                 confidence=insight['confidence'],
                 reason=f"Optimized for peak usage hours: {peak_hours}",
@@ -516,7 +558,7 @@ class AIConfigTuner:
             optimizations.append(ConfigOptimization(
                 config_path="hyprland.conf",
                 parameter="animations:enabled",
-                current_value="true",
+                current_value=self._get_config_value("animations:enabled", "true"),
                 recommended_value="conditional",
                 confidence=insight['confidence'],
                 reason=f"High CPU usage detected with: {', '.join(common_apps[:3])}",
@@ -606,6 +648,16 @@ class AIConfigTuner:
             self.logger.error(f"Error applying optimization: {e}")
             return False
 
+    def _get_config_value(self, parameter: str, default: str) -> str:
+        """Current effective value of a fully qualified hyprland.conf option"""
+        if self.config_parser is None or not self.config_files["hyprland"].exists():
+            return default
+        try:
+            return self.config_parser.parse(self.config_files["hyprland"]).get(parameter, default)
+        except Exception as e:
+            self.logger.warning(f"Error parsing config: {e}")
+            return default
+
     def _modify_config_file(self, optimization: ConfigOptimization) -> bool:
         """Modify configuration file with the optimization"""
         config_path = self.config_dir / optimization.config_path
@@ -614,6 +666,9 @@ class AIConfigTuner:
             self.logger.warning(f"Config file not found: {config_path}")
             return False
         
+        if self.config_parser is not None and config_path.name == "hyprland.conf":
+            return self._modify_hyprland_option(config_path, optimization)
+        
         try:
             with open(config_path, 'r') as f:
                 content = f.read()
@@ -638,6 +693,39 @@ class AIConfigTuner:
             self.logger.error(f"Error modifying config file: {e}")
             return False
 
+    def _modify_hyprland_option(self, config_path: Path, optimization: ConfigOptimization) -> bool:
+        """Rewrite an option where it is defined (following sections and sourced files)"""
+        try:
+            parameter = optimization.parameter
+            location = None
+            if not is_keyword(parameter):
+                location = self.config_parser.parse(config_path).location(parameter)
+            
+            if location:
+                # Replace only the value on the defining line, keeping the name, a trailing
+                # comment and the braces of a one-line section
+                file_path, line_number = location
+                with open(file_path, 'r') as f:
+                    lines = f.readlines()
+                
+                line = lines[line_number - 1]
+                start, end = value_span(line)
+                lines[line_number - 1] = f"{line[:start]}{optimization.recommended_value}{line[end:]}"
+                
+                with open(file_path, 'w') as f:
+                    f.writelines(lines)
+                self.logger.info(f"Updated {parameter} at {file_path}:{line_number}")
+            else:
+                # New option or repeatable keyword (windowrule, workspace): append
+                with open(config_path, 'a') as f:
+                    f.write(f'\n{parameter} = {optimization.recommended_value}\n')
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error modifying config file: {e}")
+            return False
+
     def _get_active_windows(self) -> List[str]:
         """Get list of currently active windows"""
         try:
@@ -13,6 +13,21 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 from collections import defaultdict
+import sys
+
+# Shared activity classifier from the AI optimization core
+for _core_parent in (Path(__file__).resolve().parents[2] / "ai_optimization",
+                     Path(os.environ.get("AI_OPTIMIZATION_HOME",
+                                         Path.home() / "hyprland-project" / "ai_optimization"))):
+    if (_core_parent / "core" / "activity_classifier.py").exists():
+        sys.path.insert(0, str(_core_parent))
+        break
+
+try:
+    from core.activity_classifier import ActivityClassifier
+    HAS_ACTIVITY_CLASSIFIER = True
+except ImportError:
+    HAS_ACTIVITY_CLASSIFIER = False
 
 class AILearningSystem:
     def __init__(self):
@@ -20,6 +35,10 @@ class AILearningSystem:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         self.data_file = self.config_dir / "learning_data.json"
         self.recommendations_file = self.config_dir / "recommendations.json"
+        self.workload_classifier = (
+            ActivityClassifier.load('processes', self.config_dir / "activity_rules.json")
+            if HAS_ACTIVITY_CLASSIFIER else None
+        )
         self.load_data()
         
     def load_data(self):
@@ -124,24 +143,29 @@ class AILearningSystem:
         """Detect current workload type based on running applications"""
         processes = [proc.name() for proc in psutil.process_iter()]
         
+        if self.workload_classifier is not None:
+            return self.workload_classifier.classify(processes).category or 'general'
+        
+        process_names = ' '.join(processes).lower()
+        
         # Gaming workload
         gaming_apps = ['steam', 'lutris', 'heroic', 'wine', 'proton']
-        if any(app in ' '.join(processes).lower() for app in gaming_apps):
+        if any(app in process_names for app in gaming_apps):
             return 'gaming'
         
         # Development workload
         dev_apps = ['code', 'nvim', 'vim', 'jetbrains', 'cargo', 'make', 'gcc', 'python']
-        if any(app in ' '.join(processes).lower() for app in dev_apps):
+        if any(app in process_names for app in dev_apps):
             return 'development'
         
         # Media workload
         media_apps = ['vlc', 'mpv', 'ffmpeg', 'obs', 'gimp', 'inkscape', 'blender']
-        if any(app in ' '.join(processes).lower() for app in media_apps):
+        if any(app in process_names for app in media_apps):
             return 'media'
         
         # Productivity workload
         productivity_apps = ['firefox', 'chrome', 'thunderbird', 'libreoffice', 'discord']
-        if any(app in ' '.join(processes).lower() for app in productivity_apps):
+        if any(app in process_names for app in productivity_apps):
             return 'productivity'
         
         return 'general'
@@ -23,6 +23,10 @@ HEALTH_LOG="$HEALTH_DIR/health_history.json"
 PREDICTIONS_LOG="$DATA_DIR/failure_predictions.json"
 MAINTENANCE_LOG="$DATA_DIR/maintenance_history.json"
 
+# Log event counters maintained by the self-healing log ingestor
+LOG_COUNTERS="${AI_HEALING_DATA:-$HOME/hyprland-project/ai_optimization/healing_data}/log_counters.json"
+LOG_COUNTERS_MAX_AGE=300  # seconds before falling back to dmesg
+
 # Health thresholds
 CPU_TEMP_WARNING=75
 CPU_TEMP_CRITICAL=85
@@ -106,8 +110,16 @@ collect_health_metrics() {
     # System uptime
     local uptime_seconds=$(cat /proc/uptime | awk '{print $1}' | cut -d'.' -f1)
     
-    # File system health
-    local fs_errors=$(dmesg | grep -i "error\|fail\|corrupt" | tail -10 | wc -l)
+    # File system health (prefer the log ingestor's counters over re-scanning dmesg)
+    local fs_errors=""
+    if [[ -f "$LOG_COUNTERS" ]]; then
+        fs_errors=$(jq -r --argjson now "$(date +%s)" --argjson max_age "$LOG_COUNTERS_MAX_AGE" \
+            'if ($now - .timestamp) < $max_age then .counts_1h.fs_errors else empty end' \
+            "$LOG_COUNTERS" 2>/dev/null || true)
+    fi
+    if [[ -z "$fs_errors" ]]; then
+        fs_errors=$(dmesg | grep -i "error\|fail\|corrupt" | tail -10 | wc -l)
+    fi
     
     # Service health
     local failed_services=$(systemctl list-units --failed --no-legend | wc -l)